@@ -37,6 +37,60 @@ class Settings(BaseSettings):
     LLM_TIMEOUT_MS: int = 3500
     LLM_SEED: int = 42  # Fixed seed for reproducibility
 
+    # HTTP connection pool for the OpenAI clients
+    LLM_POOL_MAX_CONNECTIONS: int = 32
+    LLM_POOL_MAX_KEEPALIVE: int = 16
+    LLM_POOL_KEEPALIVE_S: float = 30
+    LLM_CONNECT_TIMEOUT_MS: int = 2000
+    LLM_HTTP2: bool = True  # used only when the h2 package is installed
+
+    # LLM response cache
+    LLM_CACHE_MAX_ENTRIES: int = 256
+    LLM_CACHE_TTL_S: int = 1800
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 0 = no byte limit
+    LLM_CACHE_SWEEP_S: int = 60  # background expiry sweep, 0 = disabled
+    # shared on-disk tier: "sqlite" | "none"; stores summaries of patient intakes
+    # unencrypted, so opt-in only and always off under HIPAA_MODE
+    LLM_CACHE_BACKEND: str = "none"
+    LLM_CACHE_PATH: str = "./data/llm_cache.db"
+    LLM_CACHE_DISK_TTL_S: int = 86400
+    LLM_CACHE_DISK_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_COMPRESS_MIN_BYTES: int = 2048
+
+    # Summary cache keyed on the canonical (order/format-insensitive) intake
+    LLM_CANONICAL_CACHE: bool = True
+    LLM_CANONICAL_CACHE_MAX_ENTRIES: int = 4096
+
+    # Client-side rate limiting (0 = unlimited)
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_RPM_LIMIT: int = 500
+    LLM_TPM_LIMIT: int = 200000
+    LLM_EST_OUTPUT_TOKENS: int = 600  # reserved per call on top of the prompt estimate
+
+    # Circuit breaker around provider calls
+    LLM_BREAKER_WINDOW_S: int = 30
+    LLM_BREAKER_MIN_CALLS: int = 5
+    LLM_BREAKER_FAILURE_RATE: float = 0.5
+    LLM_BREAKER_OPEN_S: int = 20
+    LLM_BREAKER_PROBES: int = 1
+
+    # Hedged requests: duplicate a call still pending after the observed p90
+    LLM_HEDGE: bool = False
+    LLM_HEDGE_MAX_RATIO: float = 0.1  # extra requests as a fraction of primaries
+    LLM_HEDGE_MIN_DELAY_MS: int = 300
+
+    # Summary pipeline profiling: per-stage spans, optional cProfile sampling
+    LLM_PROFILE_WINDOW: int = 500  # samples per stage kept for p50/p95
+    LLM_PROFILE_SAMPLE_RATE: float = 0.0  # share of summaries run under cProfile
+
+    # Batch summarisation
+    LLM_BATCH_BACKEND: str = "auto"  # "openai" | "local" | "auto" (openai when a key is set)
+    LLM_BATCH_POLL_S: int = 30
+    LLM_BATCH_TIMEOUT_S: int = 24 * 3600
+    LLM_BATCH_MAX_ITEMS: int = 500
+    LLM_BATCH_JOB_TTL_S: int = 3600  # finished jobs (and their results) kept this long
+    LLM_BATCH_MAX_JOBS: int = 100
+
     # Demo settings
     DEMO_MODE: bool = True
     HIPAA_MODE: bool = False
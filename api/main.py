@@ -25,6 +25,7 @@ from api.core.exceptions import setup_exception_handlers
 # Configure structured logging
 from api.core.logging_config import setup_logging
 from api.core.startup import perform_startup_checks
+from api.services.rag.precompute import precomputed_cards
 
 logger = setup_logging()
 
@@ -64,6 +65,13 @@ logger = logging.getLogger("uvicorn.access")
 logger.addFilter(NoBodyLoggingFilter())
 
 
+@app.on_event("startup")
+async def warm_evidence_cards():
+    """Precompute evidence cards for common flag/code combinations (background)"""
+    if precomputed_cards.schedule_warmup():
+        logger.info("Evidence card warm-up scheduled")
+
+
 # Request size limit middleware
 @app.middleware("http")
 async def limit_request_size(request: Request, call_next):
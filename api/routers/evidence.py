@@ -12,7 +12,8 @@ from typing import Any
 from fastapi import APIRouter, Body
 
 from api.services.evidence import select_evidence as static_cards
-from api.services.rag.retrieve import USE_RAG, init_retriever, retrieve
+from api.services.rag.precompute import card_keywords, precomputed_cards
+from api.services.rag.retrieve import USE_RAG, init_retriever, retrieve_async
 from api.services.rag.summarize import to_cards
 
 # Get logger
@@ -31,6 +32,7 @@ def _ensure_init():
         try:
             init_retriever()
             _initialized = True
+            precomputed_cards.schedule_warmup()
         except Exception as e:
             logger.warning(f"RAG init failed → static only: {e!s}")
 
@@ -62,37 +64,30 @@ def _dedupe(cards: list[dict]) -> list[dict]:
 
 async def _rag_cards(
     summary: dict[str, Any], timeout_ms: int = 600, k: int = 6, max_cards: int = 2
-) -> list[dict]:
-    """RAG card extraction with timeout and jitter"""
+) -> tuple[list[dict], bool]:
+    """RAG card extraction with per-stage deadlines, overall timeout and jitter.
+
+    Returns (cards, degraded); degraded is True when retrieval returned partial
+    results (e.g. BM25-only because the encoder missed its deadline) or failed.
+    """
     if not USE_RAG:
-        return []
+        return [], False
 
     try:
-        # retrieve() is sync → use executor
         # Add jitter to prevent thundering herd
         jitter = random.randint(-100, 150)  # nosec S311
         t = (timeout_ms + jitter) / 1000.0
-        rets = await asyncio.wait_for(
-            asyncio.get_event_loop().run_in_executor(
-                None, lambda: retrieve(summary, k=k)
-            ),
-            timeout=t,
-        )
+        # Stage deadlines inside retrieve_async are tighter; this is a backstop
+        out = await asyncio.wait_for(retrieve_async(summary, k=k), timeout=t)
 
         # Extract for keyword highlighting (optional)
-        flags = list((summary.get("flags") or {}).keys())
-        codes = summary.get("codes") or {}
-        kw = (
-            flags
-            + (codes.get("icd") or [])[:3]
-            + (codes.get("cpt") or [])[:3]
-            + (codes.get("labels") or [])[:5]
-        )
+        kw = card_keywords(summary)
 
-        return to_cards(rets, max_cards=max_cards, keywords=kw)  # type: ignore
+        cards = to_cards(out["results"], max_cards=max_cards, keywords=kw)  # type: ignore
+        return cards, out["degraded"]
     except Exception as e:
         logger.info(f"RAG timeout/fail → []: {e!s}")
-        return []
+        return [], True
 
 
 @router.post("")
@@ -108,9 +103,14 @@ async def evidence(summary: dict[str, Any] = Body(...)):
         logger.info("Cache hit for evidence request")
         return hit[1]
 
-    # 1) RAG first (max 2 cards)
-    rag = await _rag_cards(summary, timeout_ms=600, k=8, max_cards=2)
-    logger.info(f"Retrieved {len(rag)} RAG evidence cards")
+    # 1) RAG first (max 2 cards): precomputed flag/code combinations, live RAG on miss
+    degraded = False
+    rag = precomputed_cards.get(summary, max_cards=2)
+    if rag is not None:
+        logger.info(f"Precomputed evidence hit: {len(rag)} cards")
+    else:
+        rag, degraded = await _rag_cards(summary, timeout_ms=600, k=8, max_cards=2)
+        logger.info(f"Retrieved {len(rag)} RAG evidence cards (degraded={degraded})")
 
     # 2) Static card supplement
     static = static_cards(summary)
@@ -124,8 +124,10 @@ async def evidence(summary: dict[str, Any] = Body(...)):
         c["rank"] = i
         c.setdefault("score", 0.0)
 
-    resp = {"items": merged}  # ← Final schema for UI
-    _CACHE[ck] = (now, resp)
+    resp = {"items": merged, "degraded": degraded}  # ← Final schema for UI
+    if not degraded:
+        # don't pin partial results; the next request may get the full set
+        _CACHE[ck] = (now, resp)
 
     logger.info(f"Returning {len(merged)} evidence cards with ranking")
     return resp
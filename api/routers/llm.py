@@ -13,6 +13,9 @@ from pydantic import BaseModel
 from api.core.config import settings
 from api.core.exceptions import LLMServiceException
 from api.services.llm import llm_service
+from api.services.llm.breaker import llm_breaker
+from api.services.llm.profiling import pipeline_profiler
+from api.services.llm.telemetry import llm_telemetry
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -280,12 +283,28 @@ async def chat_completion(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Chat completion error: {e!s}")
 
 
+@router.get("/metrics")
+async def llm_metrics(*, recent: int = 20, profiles: bool = False):
+    """
+    Per-call telemetry (latency/token histograms, percentiles, cost, recent calls)
+    plus per-stage p50/p95 of the summary pipeline; profiles=true adds the
+    sampled cProfile reports.
+    """
+    return {
+        **llm_telemetry.get_stats(recent=recent),
+        "pipeline": pipeline_profiler.get_stats(profiles=profiles),
+    }
+
+
 @router.get("/health")
 async def health_check():
     """LLM service health check"""
+    breaker = llm_breaker.get_state()
     return {
         "service": "llm",
-        "status": "healthy",
+        # open breaker → summaries are served from the templated fallback
+        "status": "healthy" if breaker["state"] == "closed" else "degraded",
         "model": llm_service.model,
+        "circuit_breaker": breaker,
         "timestamp": datetime.now().isoformat(),
     }
@@ -14,6 +14,7 @@ from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
 
 from api.core.config import settings
+from api.services.intake.answers import form_answers
 from api.services.llm import llm_service
 
 # Get logger
@@ -73,17 +74,7 @@ def _generate_llm_summary_background(
         summary_data = {
             "encounterId": token,
             "patient": {},  # Will be populated from patient_data if available
-            "answers": {
-                "chief_complaint": appointment_data.get("q1", ""),
-                "location": appointment_data.get("q2", ""),
-                "character": appointment_data.get("q3", ""),
-                "aggravating_factors": appointment_data.get("q4", ""),
-                "alleviating_factors": appointment_data.get("q5", ""),
-                "associated_symptoms": appointment_data.get("q6", ""),
-                "severity": appointment_data.get("q7", ""),
-                "duration": appointment_data.get("q8", ""),
-                "notes": appointment_data.get("q9", ""),
-            },
+            "answers": form_answers(appointment_data),
         }
 
         # Generate LLM summary
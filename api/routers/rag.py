@@ -6,8 +6,10 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 
 from api.core.exceptions import RAGServiceException
-from api.services.rag import build_index, init_retriever, make_query, retrieve
-from api.services.rag.retrieve import USE_RAG
+from api.services.rag import build_index, init_retriever, make_query, retrieve_async
+from api.services.rag.precompute import precomputed_cards
+from api.services.rag.rerank import reranker
+from api.services.rag.retrieve import RAG_INDEX_DIR, USE_RAG
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -31,6 +33,7 @@ class SearchResponse(BaseModel):
     query: str
     total_results: int
     rag_enabled: bool
+    degraded: bool = False
 
 
 class IndexRequest(BaseModel):
@@ -61,6 +64,8 @@ class RAGStatusResponse(BaseModel):
     index_path: str | None = None
     index_size: int | None = None
     model_name: str | None = None
+    precomputed_cards: dict[str, Any] | None = None
+    reranker: dict[str, Any] | None = None
 
 
 @router.get("/status", response_model=RAGStatusResponse)
@@ -75,6 +80,8 @@ async def get_rag_status():
             "index_path": None,
             "index_size": None,
             "model_name": None,
+            "precomputed_cards": precomputed_cards.get_stats(),
+            "reranker": reranker.get_stats(),
         }
 
         if USE_RAG:
@@ -129,8 +136,11 @@ async def search_documents(request: SearchRequest):
 
         # Perform search
         k_value = request.k or 4  # Default to 4 if None
-        results = retrieve(summary, k=k_value)
-        logger.info(f"RAG search completed: {len(results)} results found")
+        out = await retrieve_async(summary, k=k_value)
+        results = out["results"]
+        logger.info(
+            f"RAG search completed: {len(results)} results found (degraded={out['degraded']})"
+        )
 
         # Convert results to response format
         search_results = []
@@ -154,6 +164,7 @@ async def search_documents(request: SearchRequest):
             query=request.query,
             total_results=len(search_results),
             rag_enabled=True,
+            degraded=out["degraded"],
         )
 
     except RAGServiceException:
@@ -185,6 +196,12 @@ async def build_rag_index(request: IndexRequest):
 
         logger.info(f"RAG index built successfully: {stats}")
 
+        if USE_RAG and request.out_dir == RAG_INDEX_DIR:
+            # live index changed → reload and re-warm precomputed evidence cards
+            precomputed_cards.clear()
+            init_retriever()
+            precomputed_cards.schedule_warmup()
+
         return IndexResponse(
             success=True, message="Index built successfully", stats=stats
         )
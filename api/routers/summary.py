@@ -1,20 +1,96 @@
 # api/routers/summary.py
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
 from typing import Any
 
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
+from api.core.config import settings
+from api.services.llm.batch import BatchSummaryRunner, batch_jobs, summarize_pending
+from api.services.llm.profiling import DEBUG_HEADER
 from api.services.llm.service import llm_service
 
 router = APIRouter(prefix="/summary", tags=["summary"])
 
 
+def _debug(value: str | None) -> bool:
+    return value is not None and value.strip().lower() not in ("", "0", "false", "no")
+
+
 @router.post("")
-async def summarize(intake: dict[str, Any] = Body(...)):
-    """Structured intake → HPI/ROS/flags JSON (LLM Summarizer API from diagram)"""
+async def summarize(
+    intake: dict[str, Any] = Body(...),
+    debug_timings: str | None = Header(None, alias=DEBUG_HEADER),
+):
+    """
+    Structured intake → HPI/ROS/flags JSON (LLM Summarizer API from diagram).
+    Send `X-Debug-Timings: 1` to get per-stage spans in `_metadata.timings`.
+    """
     try:
-        data = await llm_service.summary(intake)
+        data = await llm_service.summary(intake, debug=_debug(debug_timings))
         return {"summary": data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"summary failed: {e!s}")
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/stream")
+async def summarize_stream(
+    intake: dict[str, Any] = Body(...),
+    debug_timings: str | None = Header(None, alias=DEBUG_HEADER),
+):
+    """
+    Server-sent events variant of /summary: `field` events carry top-level
+    fields (HPI first) as they are generated, `final` carries the full summary.
+    """
+
+    async def events() -> AsyncIterator[str]:
+        async for event, data in llm_service.summary_stream(intake, debug=_debug(debug_timings)):
+            yield _sse(event, {"summary": data} if event == "final" else data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class BatchSummaryRequest(BaseModel):
+    """Either explicit intakes keyed by id, or `pending` to backfill intake_payload"""
+
+    intakes: dict[str, dict[str, Any]] | None = None
+    pending: bool = False
+    limit: int = Field(500, ge=1)
+
+
+@router.post("/batch", status_code=202)
+async def summarize_batch(req: BatchSummaryRequest):
+    """Start a batch summarisation job; poll GET /summary/batch/{job_id}"""
+    max_items = getattr(settings, "LLM_BATCH_MAX_ITEMS", 500)
+    if req.pending:
+        limit = max(1, min(req.limit, max_items))
+        job_id = batch_jobs.start(summarize_pending(limit=limit), "pending", limit)
+    elif req.intakes:
+        if len(req.intakes) > max_items:
+            raise HTTPException(status_code=413, detail=f"at most {max_items} intakes per batch")
+        job_id = batch_jobs.start(
+            BatchSummaryRunner().run(req.intakes), "intakes", len(req.intakes)
+        )
+    else:
+        raise HTTPException(status_code=400, detail="provide intakes or pending=true")
+    return {"job_id": job_id, "status": "running"}
+
+
+@router.get("/batch/{job_id}")
+async def summarize_batch_status(job_id: str):
+    job = batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
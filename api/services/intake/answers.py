@@ -0,0 +1,20 @@
+# api/services/intake/answers.py
+from typing import Any
+
+# appointment form question → answer key the summariser sees
+FORM_FIELDS = {
+    "q1": "chief_complaint",
+    "q2": "location",
+    "q3": "character",
+    "q4": "aggravating_factors",
+    "q5": "alleviating_factors",
+    "q6": "associated_symptoms",
+    "q7": "severity",
+    "q8": "duration",
+    "q9": "notes",
+}
+
+
+def form_answers(form: dict[str, Any]) -> dict[str, Any]:
+    """Summary answers from an appointment form; unanswered questions become "" """
+    return {key: form.get(question, "") for question, key in FORM_FIELDS.items()}
@@ -0,0 +1,423 @@
+# api/services/llm/batch.py
+"""
+Batch summarisation.
+
+BatchSummaryRunner prepares many intakes with the same pipeline as
+LLMService.summary, serves cache hits directly, submits the rest through a
+batch backend, polls until the batch settles and finalises each item. Items
+the backend didn't return (errors, expiry, bad JSON) get the templated
+fallback, so a batch never loses an intake.
+
+Backends:
+- OpenAIBatchBackend: provider Batch API (JSONL upload, 24h window, ~half price)
+- LocalBatchBackend: runs the requests as interactive calls; stand-in for tests
+  and for deployments without batch access
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import api.services.llm.client as llm_client
+from api.core.config import settings
+from api.services.intake.answers import form_answers
+from api.services.llm.canonical import summary_cache
+from api.services.llm.fallback import templated as fallback_summary
+from api.services.llm.service import LLMService, llm_service
+
+log = logging.getLogger("llm")
+
+BATCH_DONE_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+class LocalBatchBackend:
+    """Runs each request through `complete(body)` with bounded concurrency"""
+
+    def __init__(
+        self,
+        complete: Callable[[dict[str, Any]], Awaitable[dict[str, Any]]] | None = None,
+        concurrency: int = 4,
+    ):
+        self._complete = complete or self._chat_json
+        self.concurrency = concurrency
+        self._batches: dict[str, dict[str, Any]] = {}
+
+    @staticmethod
+    async def _chat_json(body: dict[str, Any]) -> dict[str, Any]:
+        return await llm_client.chat_json(
+            messages=body["messages"],
+            model=body["model"],
+            temperature=body["temperature"],
+            top_p=body["top_p"],
+            response_schema=body["response_format"].get("json_schema"),
+            seed=body.get("seed"),
+            use_cache=False,  # the runner already checked and fills the cache
+        )
+
+    async def submit(self, requests: list[dict[str, Any]]) -> str:
+        batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        sem = asyncio.Semaphore(self.concurrency)
+        state: dict[str, Any] = {"status": "in_progress", "results": {}}
+
+        async def _one(req):
+            async with sem:
+                try:
+                    state["results"][req["custom_id"]] = await self._complete(req["body"])
+                except Exception as e:
+                    log.warning(f"Batch item {req['custom_id']} failed: {e}")
+                    state["results"][req["custom_id"]] = None
+
+        async def _all():
+            await asyncio.gather(*(_one(r) for r in requests))
+            state["status"] = "completed"
+
+        state["task"] = asyncio.ensure_future(_all())
+        self._batches[batch_id] = state
+        return batch_id
+
+    async def poll(self, batch_id: str) -> str:
+        return self._batches[batch_id]["status"]
+
+    async def results(self, batch_id: str) -> dict[str, dict[str, Any] | None]:
+        return self._batches.pop(batch_id)["results"]
+
+
+class OpenAIBatchBackend:
+    """Provider Batch API over /v1/chat/completions"""
+
+    def __init__(self, completion_window: str = "24h"):
+        self.completion_window = completion_window
+
+    @staticmethod
+    def _client():
+        client = llm_client.get_async_client()
+        if client is None:
+            raise RuntimeError("LLM client unavailable (no OPENAI_API_KEY)")
+        return client
+
+    async def submit(self, requests: list[dict[str, Any]]) -> str:
+        client = self._client()
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": r["custom_id"],
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": r["body"],
+                },
+                ensure_ascii=False,
+            )
+            for r in requests
+        ]
+        upload = await client.files.create(
+            file=("summary_batch.jsonl", io.BytesIO("\n".join(lines).encode())),
+            purpose="batch",
+        )
+        batch = await client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    async def poll(self, batch_id: str) -> str:
+        batch = await self._client().batches.retrieve(batch_id)
+        return batch.status
+
+    async def results(self, batch_id: str) -> dict[str, dict[str, Any] | None]:
+        client = self._client()
+        batch = await client.batches.retrieve(batch_id)
+        out: dict[str, dict[str, Any] | None] = {}
+        if not batch.output_file_id:
+            return out
+        content = await client.files.content(batch.output_file_id)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            try:
+                body = row["response"]["body"]
+                out[row["custom_id"]] = json.loads(body["choices"][0]["message"]["content"])
+            except Exception as e:
+                log.warning(f"Unusable batch result for {row.get('custom_id')}: {e}")
+                out[row.get("custom_id", "")] = None
+        return out
+
+
+def default_backend() -> LocalBatchBackend | OpenAIBatchBackend:
+    kind = str(getattr(settings, "LLM_BATCH_BACKEND", "auto")).lower()
+    if kind == "openai" or (kind == "auto" and llm_client.get_async_client() is not None):
+        return OpenAIBatchBackend()
+    return LocalBatchBackend()
+
+
+class BatchSummaryRunner:
+    def __init__(
+        self,
+        backend: LocalBatchBackend | OpenAIBatchBackend | None = None,
+        service: LLMService = llm_service,
+        poll_interval_s: float = getattr(settings, "LLM_BATCH_POLL_S", 30),
+        timeout_s: float = getattr(settings, "LLM_BATCH_TIMEOUT_S", 24 * 3600),
+    ):
+        self.backend = backend or default_backend()
+        self.service = service
+        self.poll_interval_s = poll_interval_s
+        self.timeout_s = timeout_s
+
+    def _finalize(self, raw, prepared, intake) -> tuple[dict[str, Any], str]:
+        if raw is None or prepared is None:
+            return fallback_summary(intake), "fallback"  # type: ignore
+        try:
+            return self.service.finalize(raw, prepared), "done"
+        except Exception as e:
+            log.warning(f"Batch item finalization failed → fallback: {e}")
+            return fallback_summary(intake), "fallback"  # type: ignore
+
+    async def run(self, items: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """
+        items: {item_id: intake}. Returns {item_id: {"summary", "status"}} with
+        status "done" (LLM), "cached" or "fallback".
+        """
+        kwargs = self.service.chat_kwargs()
+        rf = llm_client.response_format(kwargs["response_schema"])
+        prepared: dict[str, dict[str, Any] | None] = {}
+        keys: dict[str, str] = {}
+        raws: dict[str, dict[str, Any] | None] = {}
+        cached: set[str] = set()
+        requests = []
+
+        for item_id, intake in items.items():
+            try:
+                prep = self.service.prepare(intake)
+            except Exception as e:
+                log.warning(f"Batch item {item_id} preparation failed: {e}")
+                prepared[item_id] = None
+                continue
+            prepared[item_id] = prep
+            near = summary_cache.get(prep["processed_intake"], kwargs["model"])
+            if near is not None:
+                raws[item_id] = near
+                cached.add(item_id)
+                continue
+            keys[item_id] = llm_client.cache_key(
+                prep["messages"],
+                kwargs["model"],
+                kwargs["temperature"],
+                rf,
+                top_p=kwargs["top_p"],
+                seed=kwargs["seed"],
+            )
+            hit = llm_client.cache_get(keys[item_id])
+            if hit is not None:
+                raws[item_id] = hit
+                cached.add(item_id)
+                continue
+            requests.append(
+                {
+                    "custom_id": item_id,
+                    "body": {
+                        "model": kwargs["model"],
+                        "messages": prep["messages"],
+                        "temperature": kwargs["temperature"],
+                        "top_p": kwargs["top_p"],
+                        "seed": kwargs["seed"],
+                        "response_format": rf,
+                    },
+                }
+            )
+
+        if requests:
+            log.info(f"Submitting summary batch: {len(requests)} items ({len(cached)} cached)")
+            try:
+                raws.update(await self._submit_and_wait(requests))
+            except Exception as e:
+                log.error(f"Summary batch failed → per-item fallback: {e}")
+
+        out: dict[str, dict[str, Any]] = {}
+        for item_id, intake in items.items():
+            raw = raws.get(item_id)
+            if raw is not None and item_id not in cached and item_id in keys:
+                llm_client.cache_set(keys[item_id], raw)
+                summary_cache.put(prepared[item_id]["processed_intake"], kwargs["model"], raw)
+            summary, status = self._finalize(raw, prepared.get(item_id), intake)
+            if status == "done" and item_id in cached:
+                status = "cached"
+            out[item_id] = {"summary": summary, "status": status}
+        return out
+
+    async def _submit_and_wait(self, requests: list[dict[str, Any]]) -> dict[str, Any]:
+        batch_id = await self.backend.submit(requests)
+        deadline = time.monotonic() + self.timeout_s
+        while True:
+            status = await self.backend.poll(batch_id)
+            if status in BATCH_DONE_STATES:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"batch {batch_id} still {status} after {self.timeout_s}s")
+            await asyncio.sleep(self.poll_interval_s)
+        log.info(f"Summary batch {batch_id} finished: {status}")
+        return await self.backend.results(batch_id)
+
+
+# ---- intake_payload write-back ----
+def _db_path() -> str:
+    return settings.db_url.replace("sqlite:///", "")
+
+
+def _ensure_summary_column(conn: sqlite3.Connection) -> None:
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(intake_payload)")}
+    if "ai_summary_json" not in cols:
+        conn.execute("ALTER TABLE intake_payload ADD COLUMN ai_summary_json TEXT")
+
+
+def intake_from_row(patient_json: str | None, answers_json: str | None) -> dict[str, Any]:
+    """Same shape the interactive path builds from the appointment form"""
+    patient = json.loads(patient_json) if patient_json else {}
+    answers = json.loads(answers_json) if answers_json else {}
+    if "q1" in answers:
+        answers = form_answers(answers)
+    # profile holds PHI (name/phone/email); only age/sex feed the summary
+    sex = {"male": "M", "female": "F"}.get(str(patient.get("gender", "")).lower())
+    return {"patient": {"age": patient.get("age"), "sex": sex}, "answers": answers}
+
+
+def _claim_pending(db_path: str, limit: int) -> list[tuple[str, str | None, str | None]]:
+    with sqlite3.connect(db_path) as conn:
+        _ensure_summary_column(conn)
+        # one statement selects and marks the rows, so overlapping jobs or
+        # workers can never claim the same 'pending' row twice
+        return conn.execute(
+            "UPDATE intake_payload SET ai_summary_status = 'processing'"
+            " WHERE session_id IN (SELECT session_id FROM intake_payload"
+            " WHERE ai_summary_status = 'pending' LIMIT ?)"
+            " RETURNING session_id, patient_data, answers_json",
+            (max(limit, 1),),
+        ).fetchall()
+
+
+def _release(db_path: str, session_ids: list[str]) -> None:
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "UPDATE intake_payload SET ai_summary_status = 'pending' WHERE session_id = ?",
+            [(sid,) for sid in session_ids],
+        )
+
+
+def _write_results(db_path: str, results: dict[str, dict[str, Any]]) -> None:
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "UPDATE intake_payload SET ai_summary_status = 'done', ai_summary_json = ?"
+            " WHERE session_id = ?",
+            [(json.dumps(res["summary"], ensure_ascii=False), sid) for sid, res in results.items()],
+        )
+
+
+async def summarize_pending(
+    runner: BatchSummaryRunner | None = None,
+    limit: int = 500,
+    db_path: str | None = None,
+) -> dict[str, int]:
+    """Summarise intake_payload rows still 'pending' and write the results back"""
+    db_path = db_path or _db_path()
+    # sqlite3 blocks; keep it off the event loop
+    rows = await asyncio.to_thread(_claim_pending, db_path, limit)
+    if not rows:
+        return {"selected": 0}
+
+    items = {r[0]: intake_from_row(r[1], r[2]) for r in rows}
+    try:
+        results = await (runner or BatchSummaryRunner()).run(items)
+    except BaseException:
+        # CancelledError included (shutdown, job cancel): claimed rows must not
+        # stay 'processing'. The UPDATE finishes in its thread even if this
+        # await is cancelled again.
+        try:
+            await asyncio.to_thread(_release, db_path, list(items))
+        except RuntimeError:  # default executor already shut down
+            _release(db_path, list(items))
+        raise
+
+    await asyncio.to_thread(_write_results, db_path, results)
+    counts: dict[str, int] = {"selected": len(rows)}
+    for res in results.values():
+        counts[res["status"]] = counts.get(res["status"], 0) + 1
+    return counts
+
+
+# ---- job registry (in-process) ----
+class BatchJobs:
+    """
+    Running and recently finished jobs. Finished jobs (with their results) are
+    dropped after `ttl_s`, and the oldest finished ones go first once more than
+    `max_jobs` are held; running jobs are never evicted.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = getattr(settings, "LLM_BATCH_JOB_TTL_S", 3600),
+        max_jobs: int = getattr(settings, "LLM_BATCH_MAX_JOBS", 100),
+    ):
+        self.ttl_s = ttl_s
+        self.max_jobs = max_jobs
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def _prune(self) -> None:
+        finished = sorted(
+            (job["finished_at"], job_id)
+            for job_id, job in self.jobs.items()
+            if "finished_at" in job
+        )
+        cutoff = time.time() - self.ttl_s
+        excess = len(self.jobs) - self.max_jobs
+        for finished_at, job_id in finished:
+            if finished_at > cutoff and excess <= 0:
+                break
+            del self.jobs[job_id]
+            excess -= 1
+
+    def start(self, coro: Awaitable[Any], kind: str, size: int) -> str:
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "size": size,
+            "status": "running",
+            "created_at": time.time(),
+        }
+        self.jobs[job_id] = job
+        self._prune()
+
+        async def _run():
+            try:
+                job["result"] = await coro
+                job["status"] = "completed"
+            except asyncio.CancelledError:
+                job["status"] = "cancelled"
+                raise
+            except Exception as e:
+                log.error(f"Batch job {job_id} failed: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+            finally:
+                job["finished_at"] = time.time()
+
+        task = asyncio.ensure_future(_run())
+        self._tasks.add(task)  # keep a reference until done
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        self._prune()
+        return self.jobs.get(job_id)
+
+
+batch_jobs = BatchJobs()
@@ -0,0 +1,150 @@
+# api/services/llm/breaker.py
+"""
+Circuit breaker for provider calls.
+
+closed     → calls flow; outcomes are kept for a sliding `window_s`. Once at least
+             `min_calls` were seen and the failure rate reaches `failure_rate`,
+             the breaker opens.
+open       → calls are rejected immediately (chat_json goes straight to its
+             fallback) for `open_s`.
+half_open  → up to `probes` calls are let through; a success closes the breaker,
+             a failure re-opens it.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from api.core.config import settings
+
+logger = logging.getLogger("llm")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the breaker is open"""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window_s: float = 30,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        open_s: float = 20,
+        probes: int = 1,
+    ):
+        self.window_s = window_s
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_s = open_s
+        self.probes = probes
+        self.state = CLOSED
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened_count = 0
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_s:
+            self._outcomes.popleft()
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self.opened_count += 1
+        logger.warning(f"LLM circuit breaker opened for {self.open_s}s")
+
+    def allow(self) -> bool:
+        """Whether a provider call may proceed now (reserves a probe when half-open)"""
+        with self._lock:
+            now = self._now()
+            if self.state == OPEN and now - self._opened_at >= self.open_s:
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info("LLM circuit breaker half-open: probing provider")
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight and now - self._probe_started >= self.open_s:
+                    # probe never reported back (cancelled request) → free its slot
+                    self._probes_in_flight = 0
+                if self._probes_in_flight < self.probes:
+                    self._probes_in_flight += 1
+                    self._probe_started = now
+                    return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            now = self._now()
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+                logger.info("LLM circuit breaker closed: probe succeeded")
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = self._now()
+            if self.state == HALF_OPEN:
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for _, ok in self._outcomes if not ok)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._open(now)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self._outcomes.clear()
+            self._probes_in_flight = 0
+
+    def get_state(self) -> dict[str, Any]:
+        with self._lock:
+            now = self._now()
+            self._trim(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "failure_rate": round(failures / calls, 3) if calls else 0,
+                "threshold": self.failure_rate,
+                "open_remaining_s": (
+                    round(max(0.0, self.open_s - (now - self._opened_at)), 2)
+                    if self.state == OPEN
+                    else 0
+                ),
+                "rejected": self.rejected,
+                "opened_count": self.opened_count,
+            }
+
+
+llm_breaker = CircuitBreaker(
+    window_s=getattr(settings, "LLM_BREAKER_WINDOW_S", 30),
+    min_calls=getattr(settings, "LLM_BREAKER_MIN_CALLS", 5),
+    failure_rate=getattr(settings, "LLM_BREAKER_FAILURE_RATE", 0.5),
+    open_s=getattr(settings, "LLM_BREAKER_OPEN_S", 20),
+    probes=getattr(settings, "LLM_BREAKER_PROBES", 1),
+)
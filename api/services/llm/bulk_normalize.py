@@ -0,0 +1,143 @@
+# api/services/llm/bulk_normalize.py
+"""
+Bulk intake normalisation for backfills.
+
+Loads intakes from data/emr_*.jsonl and/or the intake_payload table and runs
+them through MedicalNormalizer.normalize_many in chunks. The chunks share one
+normalisation table, so a repeated answer string is normalised once per run,
+not once per chunk. Prints throughput and optionally
+writes the normalised intakes as JSONL:
+
+    python -m api.services.llm.bulk_normalize --emr "data/emr_*.jsonl" --db api/copilot.db \
+        --out reports/normalized.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import logging
+import sqlite3
+from collections.abc import Iterable, Iterator
+from itertools import chain
+from pathlib import Path
+from typing import Any
+
+from api.services.llm.normalizer import MedicalNormalizer, medical_normalizer
+
+logger = logging.getLogger("llm")
+
+
+def iter_emr_jsonl(paths: Iterable[str | Path]) -> Iterator[tuple[str, dict[str, Any]]]:
+    """(id, record) per line; comment ("--" / "#") and blank lines are skipped"""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith(("--", "#")):
+                    continue
+                record = json.loads(line)
+                yield str(record.get("id", f"{Path(path).name}:{lineno}")), record
+
+
+def iter_intake_payload(db_path: str, limit: int | None = None) -> Iterator[tuple[str, dict]]:
+    """(session_id, answers) per intake_payload row, answers in the form-field shape"""
+    # shared with the batch summariser so both see the same answer keys
+    from api.services.llm.batch import intake_from_row
+
+    sql = "SELECT session_id, patient_data, answers_json FROM intake_payload"
+    params: tuple[Any, ...] = ()
+    if limit is not None:
+        sql += " LIMIT ?"
+        params = (limit,)
+    with sqlite3.connect(db_path) as conn:
+        for session_id, patient_json, answers_json in conn.execute(sql, params):
+            yield session_id, intake_from_row(patient_json, answers_json)["answers"]
+
+
+def normalize_chunks(
+    records: Iterable[tuple[str, dict[str, Any]]],
+    chunk_size: int = 5000,
+    normalizer: MedicalNormalizer = medical_normalizer,
+) -> Iterator[tuple[list[tuple[str, dict[str, Any], dict[str, list[str]]]], dict[str, Any]]]:
+    """
+    normalize_many over fixed-size chunks of (id, intake) records, sharing one
+    string table so strings seen in an earlier chunk are not normalised again.
+    Yields ([(id, normalized, applied_rules), ...], chunk_stats) per chunk.
+    """
+    table: dict[str, tuple[str, list[str]]] = {}
+    chunk: list[tuple[str, dict[str, Any]]] = []
+    for record in chain(records, [None]):
+        if record is not None:
+            chunk.append(record)
+        if chunk and (record is None or len(chunk) >= chunk_size):
+            results, stats = normalizer.normalize_many((intake for _, intake in chunk), table)
+            rows = [
+                (rid, normalized, rules)
+                for (rid, _), (normalized, rules) in zip(chunk, results, strict=True)
+            ]
+            chunk = []
+            yield rows, stats
+
+
+def _expand(pattern: str) -> Iterator[Path]:
+    """Glob relative or absolute patterns ("data/emr_*.jsonl", "/mnt/x/*.jsonl")"""
+    path = Path(pattern)
+    if not path.is_absolute():
+        return Path().glob(pattern)
+    return Path(path.anchor).glob(str(path.relative_to(path.anchor)))
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    ap = argparse.ArgumentParser(description="Bulk intake normalisation")
+    ap.add_argument("--emr", nargs="*", default=[], help="JSONL paths or globs")
+    ap.add_argument("--db", default=None, help="SQLite DB with intake_payload")
+    ap.add_argument("--limit", type=int, default=None)
+    ap.add_argument("--chunk", type=int, default=5000)
+    ap.add_argument("--out", default=None, help="JSONL output path")
+    args = ap.parse_args(argv)
+
+    def _records() -> Iterator[tuple[str, dict[str, Any]]]:
+        paths = sorted({p for pattern in args.emr for p in _expand(pattern)})
+        yield from iter_emr_jsonl(paths)
+        if args.db:
+            yield from iter_intake_payload(args.db, args.limit)
+
+    totals = {"intakes": 0, "strings": 0, "normalized_strings": 0, "seconds": 0.0}
+    with contextlib.ExitStack() as stack:
+        out = None
+        if args.out:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            out = stack.enter_context(Path(args.out).open("w", encoding="utf-8"))
+        for rows, stats in normalize_chunks(_records(), args.chunk):
+            for k in totals:
+                totals[k] += stats[k]
+            if out is not None:
+                for rid, normalized, rules in rows:
+                    row = {"id": rid, "normalized": normalized, "rules": rules}
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    secs = totals["seconds"]
+    # chunks share one table, so this sums to the distinct strings of the whole run
+    unique = totals.pop("normalized_strings")
+    report = {
+        **totals,
+        "unique_strings": unique,
+        "seconds": round(secs, 4),
+        "dedupe_ratio": round(totals["strings"] / unique, 2) if unique else 0,
+        "intakes_per_s": round(totals["intakes"] / secs, 1) if secs else 0,
+    }
+    print(
+        f"{report['intakes']} intakes, {report['strings']} strings "
+        f"({report['unique_strings']} unique, x{report['dedupe_ratio']}) "
+        f"in {report['seconds']:.3f}s → {report['intakes_per_s']:.0f} intakes/s"
+    )
+    if args.out:
+        print(f"Normalized intakes written to {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
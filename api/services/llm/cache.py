@@ -0,0 +1,362 @@
+# api/services/llm/cache.py
+"""
+LLM response caches.
+
+LRUTTLCache is the in-process tier. Two OrderedDicts give O(1) get/set: `_data`
+is kept in recency order (LRU eviction from the front) and `_expiry` in
+insertion order. The TTL is the same for every entry, so insertion order is also
+expiry order and a sweep only walks the entries that have actually expired.
+
+SQLiteCache is the durable tier shared by all workers on a host; TieredCache
+puts the first in front of the second.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("llm")
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate payload size in bytes (cached values are JSON dicts)"""
+    try:
+        return len(json.dumps(value, default=str).encode())
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class LRUTTLCache:
+    """Bounded (entries and bytes) LRU cache with per-cache TTL and expiry sweep"""
+
+    def __init__(
+        self,
+        ttl_s: float = 1800,
+        maxsize: int = 256,
+        max_bytes: int = 0,
+        sweep_interval_s: float = 60,
+    ):
+        self.ttl = ttl_s
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes  # 0 → no byte limit
+        self.sweep_interval_s = sweep_interval_s
+        self._data: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._expiry: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _now(self) -> float:
+        return time.time()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _pop(self, k: str) -> None:
+        _, size, _ = self._data.pop(k)
+        self._expiry.pop(k, None)
+        self.bytes -= size
+
+    def get(self, k: str) -> Any | None:
+        with self._lock:
+            entry = self._data.get(k)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self._now():
+                self._pop(k)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(k)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, k: str, v: Any) -> None:
+        size = _sizeof(v)
+        if self.max_bytes and size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        expires = self._now() + self.ttl
+        with self._lock:
+            if k in self._data:
+                self._pop(k)
+            self._data[k] = (expires, size, v)
+            self._expiry[k] = expires
+            self.bytes += size
+            self._sweep_locked(limit=8)
+            while len(self._data) > self.maxsize or (
+                self.max_bytes and self.bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+                self.evictions += 1
+        self._ensure_sweeper()
+
+    def _sweep_locked(self, limit: int | None = None) -> int:
+        now = self._now()
+        removed = 0
+        while self._expiry and (limit is None or removed < limit):
+            k, expires = next(iter(self._expiry.items()))
+            if expires > now:
+                break
+            self._pop(k)
+            removed += 1
+        self.expirations += removed
+        return removed
+
+    def sweep(self) -> int:
+        """Drop every expired entry; returns the number removed"""
+        with self._lock:
+            return self._sweep_locked()
+
+    def _ensure_sweeper(self) -> None:
+        if self.sweep_interval_s <= 0 or self._sweeper is not None:
+            return
+
+        def _run():
+            while not self._stop.wait(self.sweep_interval_s):
+                try:
+                    removed = self.sweep()
+                    if removed:
+                        logger.debug(f"LLM cache sweep removed {removed} expired entries")
+                except Exception as e:  # pragma: no cover
+                    logger.warning(f"LLM cache sweep failed: {e}")
+
+        self._sweeper = threading.Thread(target=_run, name="llm-cache-sweep", daemon=True)
+        self._sweeper.start()
+
+    def clear(self) -> None:
+        """Drop all entries and reset statistics"""
+        with self._lock:
+            self._data.clear()
+            self._expiry.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        total_requests = self.hits + self.misses
+        hit_rate = self.hits / total_requests if total_requests > 0 else 0
+        return {
+            "size": len(self._data),
+            "max_size": self.maxsize,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(hit_rate, 3),
+        }
+
+
+class SQLiteCache:
+    """
+    Durable LLM response cache shared by every worker on the host.
+
+    SQLite in WAL mode lets readers proceed while another worker writes; each
+    thread gets its own connection. Values over `compress_min_bytes` are stored
+    zlib-compressed. When the table grows past `max_bytes` the oldest writes are
+    evicted first (reads don't touch rows, so hits never contend for the lock).
+    Any SQLite error is logged and treated as a miss — the cache never fails a call.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_s: float = 86400,
+        max_bytes: int = 256 * 1024 * 1024,
+        compress_min_bytes: int = 2048,
+        prune_every: int = 64,
+    ):
+        self.path = path
+        self.ttl = ttl_s
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._writes_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS llm_cache ("
+                        " key TEXT PRIMARY KEY,"
+                        " expires_at REAL NOT NULL,"
+                        " created_at REAL NOT NULL,"
+                        " size INTEGER NOT NULL,"
+                        " compressed INTEGER NOT NULL,"
+                        " value BLOB NOT NULL)"
+                    )
+                    conn.execute(
+                        "CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache(created_at)"
+                    )
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _now(self) -> float:
+        return time.time()
+
+    def get(self, k: str) -> Any | None:
+        try:
+            row = (
+                self._conn()
+                .execute("SELECT expires_at, compressed, value FROM llm_cache WHERE key = ?", (k,))
+                .fetchone()
+            )
+            if row is None or row[0] <= self._now():
+                self.misses += 1
+                return None
+            blob = zlib.decompress(row[2]) if row[1] else row[2]
+            self.hits += 1
+            return json.loads(blob)
+        except Exception as e:
+            self.errors += 1
+            self.misses += 1
+            logger.warning(f"Persistent LLM cache read failed: {e}")
+            return None
+
+    def set(self, k: str, v: Any) -> None:
+        try:
+            blob = json.dumps(v, default=str).encode()
+            compressed = len(blob) >= self.compress_min_bytes
+            if compressed:
+                blob = zlib.compress(blob, 6)
+            now = self._now()
+            self._conn().execute(
+                "INSERT OR REPLACE INTO llm_cache"
+                " (key, expires_at, created_at, size, compressed, value)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (k, now + self.ttl, now, len(blob), int(compressed), blob),
+            )
+            self.writes += 1
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.prune_every:
+                self._writes_since_prune = 0
+                self.prune()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Persistent LLM cache write failed: {e}")
+
+    def prune(self) -> int:
+        """Delete expired rows, then the oldest rows until under max_bytes"""
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (self._now(),))
+        n = removed.rowcount or 0
+        if self.max_bytes:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total > self.max_bytes:
+                # trim to 90% so we don't prune again on the very next write
+                excess = total - int(self.max_bytes * 0.9)
+                cur = conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    " SELECT key FROM (SELECT key, SUM(size) OVER ("
+                    "  ORDER BY created_at ROWS UNBOUNDED PRECEDING) - size AS before"
+                    "  FROM llm_cache) WHERE before < ?)",
+                    (excess,),
+                )
+                evicted = cur.rowcount or 0
+                self.evictions += evicted
+                n += evicted
+        return n
+
+    def clear(self) -> None:
+        try:
+            self._conn().execute("DELETE FROM llm_cache")
+        except Exception as e:
+            logger.warning(f"Persistent LLM cache clear failed: {e}")
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def get_stats(self) -> dict:
+        total_requests = self.hits + self.misses
+        stats = {
+            "backend": "sqlite",
+            "path": self.path,
+            "ttl_s": self.ttl,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total_requests, 3) if total_requests else 0,
+        }
+        try:
+            count, size = (
+                self._conn()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache")
+                .fetchone()
+            )
+            stats.update({"size": count, "bytes": size})
+        except Exception as e:
+            stats["error"] = str(e)
+        return stats
+
+
+class TieredCache:
+    """In-process LRU in front of a shared persistent cache (promote on disk hit)"""
+
+    def __init__(self, memory: LRUTTLCache, persistent: SQLiteCache | None = None):
+        self.memory = memory
+        self.persistent = persistent
+
+    def get(self, k: str) -> Any | None:
+        v = self.memory.get(k)
+        if v is None and self.persistent is not None:
+            v = self.persistent.get(k)
+            if v is not None:
+                self.memory.set(k, v)
+        return v
+
+    def set(self, k: str, v: Any) -> None:
+        self.memory.set(k, v)
+        if self.persistent is not None:
+            self.persistent.set(k, v)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def get_stats(self) -> dict:
+        return self.memory.get_stats()
+
+    def get_persistent_stats(self) -> dict | None:
+        return self.persistent.get_stats() if self.persistent is not None else None
@@ -0,0 +1,130 @@
+# api/services/llm/canonical.py
+"""
+Canonical intake form and the summary cache keyed on it.
+
+The response cache in client.py keys on the exact prompt, so intakes that only
+differ in whitespace, casing, answer order or unanswered (empty) questions all
+miss. canonicalize() folds those differences away after medical_normalizer and
+negation processing; SummaryCache stores the raw LLM output per canonical form
+so LLMService can skip the provider call and just re-run finalize() (cheap,
+deterministic) for the new intake.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any
+
+from api.core.config import settings
+from api.services.llm.cache import LRUTTLCache
+from api.services.llm.prompts import SYSTEM
+
+_WS = re.compile(r"\s+")
+_EMPTY = (None, "", [], {})
+_PROMPT_VERSION = hashlib.sha256(SYSTEM.encode()).hexdigest()[:12]
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    Order- and formatting-insensitive form of an intake:
+    strings NFKC + casefold + collapsed whitespace; dict keys sorted and empty
+    values dropped; lists canonicalised, de-duplicated and sorted.
+    """
+    if isinstance(value, str):
+        return _WS.sub(" ", unicodedata.normalize("NFKC", value)).strip().casefold()
+    if isinstance(value, dict):
+        out = {}
+        for k in sorted(value, key=str):
+            v = canonicalize(value[k])
+            if v not in _EMPTY:
+                out[str(k)] = v
+        return out
+    if isinstance(value, list | tuple | set):
+        items = {}
+        for item in value:
+            c = canonicalize(item)
+            if c not in _EMPTY:
+                items.setdefault(json.dumps(c, sort_keys=True, ensure_ascii=False), c)
+        return [items[k] for k in sorted(items)]
+    return value
+
+
+def canonical_key(intake: dict[str, Any], model: str) -> str:
+    blob = json.dumps(
+        {"i": canonicalize(intake), "m": model, "p": _PROMPT_VERSION},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _exact_key(intake: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(intake, ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+class SummaryCache:
+    """Raw LLM summaries keyed by canonical intake; counts near-duplicate hits"""
+
+    def __init__(self, *, enabled: bool = True, maxsize: int = 4096, ttl_s: float = 24 * 3600):
+        self.enabled = enabled
+        self._store = LRUTTLCache(ttl_s=ttl_s, maxsize=maxsize, sweep_interval_s=0)
+        self.lookups = 0
+        self.exact_hits = 0
+        self.near_duplicate_hits = 0
+
+    def get(self, intake: dict[str, Any], model: str) -> dict[str, Any] | None:
+        if not self.enabled:
+            return None
+        self.lookups += 1
+        entry = self._store.get(canonical_key(intake, model))
+        if entry is None:
+            return None
+        if _exact_key(intake) in entry["seen"]:
+            # would also have hit the exact-prompt cache
+            self.exact_hits += 1
+        else:
+            self.near_duplicate_hits += 1
+        return copy.deepcopy(entry["raw"])
+
+    def put(self, intake: dict[str, Any], model: str, raw: dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        key = canonical_key(intake, model)
+        entry = self._store.get(key) or {"raw": raw, "seen": []}
+        # remember a few exact forms so hits can be classified
+        if _exact_key(intake) not in entry["seen"] and len(entry["seen"]) < 8:
+            entry["seen"].append(_exact_key(intake))
+        entry["raw"] = raw
+        self._store.set(key, entry)
+
+    def clear(self) -> None:
+        self._store.clear()
+        self.lookups = 0
+        self.exact_hits = 0
+        self.near_duplicate_hits = 0
+
+    def get_stats(self) -> dict[str, Any]:
+        hits = self.exact_hits + self.near_duplicate_hits
+        return {
+            "enabled": self.enabled,
+            "size": len(self._store),
+            "lookups": self.lookups,
+            "hits": hits,
+            "exact_hits": self.exact_hits,
+            "near_duplicate_hits": self.near_duplicate_hits,
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0,
+            # hits the exact-prompt cache alone would have missed
+            "extra_hit_rate": (
+                round(self.near_duplicate_hits / self.lookups, 3) if self.lookups else 0
+            ),
+        }
+
+
+summary_cache = SummaryCache(
+    enabled=getattr(settings, "LLM_CANONICAL_CACHE", True),
+    maxsize=getattr(settings, "LLM_CANONICAL_CACHE_MAX_ENTRIES", 4096),
+)
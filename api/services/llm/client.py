@@ -2,14 +2,18 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import hashlib
+import importlib.util
 import json
 import logging
 import os
+import threading
 import time
-from collections.abc import Callable
+from collections.abc import AsyncIterator, Callable
 from typing import Any
 
+import httpx
 from openai import (
     APIConnectionError,
     AsyncOpenAI,
@@ -19,6 +23,13 @@ from openai import (
 )
 
 from api.core.config import settings
+from api.services.llm.breaker import CircuitOpenError, llm_breaker
+from api.services.llm.cache import LRUTTLCache, SQLiteCache, TieredCache
+from api.services.llm.canonical import summary_cache
+from api.services.llm.hedge import llm_hedger
+from api.services.llm.limiter import estimate_tokens, llm_limiter
+from api.services.llm.stream import PartialJSON
+from api.services.llm.telemetry import llm_telemetry, new_call
 
 logger = logging.getLogger("llm")
 
@@ -47,75 +58,177 @@ OPENAI_API_KEY = getattr(
     settings, "OPENAI_API_KEY", getattr(settings, "openai_api_key", None)
 )
 
+LLM_EST_OUTPUT_TOKENS = int(getattr(settings, "LLM_EST_OUTPUT_TOKENS", 600))
+
 # Optional: Azure/OpenRouter etc custom endpoint
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # if none, basic
 
-# ---- Clients (sync/async) ----
-sync_client: OpenAI | None = None
-async_client: AsyncOpenAI | None = None
-if OPENAI_API_KEY:
-    base_kwargs = {"api_key": OPENAI_API_KEY}
+# ---- HTTP transport: explicit pool limits, keep-alive, HTTP/2 when available ----
+LLM_CONNECT_TIMEOUT_S = float(getattr(settings, "LLM_CONNECT_TIMEOUT_MS", 2000)) / 1000.0
+LLM_POOL_LIMITS = httpx.Limits(
+    max_connections=int(getattr(settings, "LLM_POOL_MAX_CONNECTIONS", 32)),
+    max_keepalive_connections=int(getattr(settings, "LLM_POOL_MAX_KEEPALIVE", 16)),
+    keepalive_expiry=float(getattr(settings, "LLM_POOL_KEEPALIVE_S", 30)),
+)
+LLM_HTTP2 = (
+    bool(getattr(settings, "LLM_HTTP2", True)) and importlib.util.find_spec("h2") is not None
+)
+
+
+def _request_timeout(timeout_s: float) -> httpx.Timeout:
+    # connect failures should surface fast; read gets the full call budget
+    return httpx.Timeout(timeout_s, connect=min(LLM_CONNECT_TIMEOUT_S, timeout_s))
+
+
+# ---- Clients (sync/async), created on first use ----
+# `async_client` / `sync_client` are overrides: tests and callers may assign them
+# (e.g. None to force the fallback path); left unset, get_*_client() builds the
+# default client once and returns that.
+_UNSET: Any = object()
+async_client: AsyncOpenAI | None = _UNSET
+sync_client: OpenAI | None = _UNSET
+_client_lock = threading.Lock()
+_http_clients: dict[str, httpx.Client | httpx.AsyncClient] = {}
+
+
+def _client_kwargs() -> dict[str, Any]:
+    kwargs: dict[str, Any] = {"api_key": OPENAI_API_KEY}
     if OPENAI_BASE_URL:
-        base_kwargs["base_url"] = OPENAI_BASE_URL
-    sync_client = OpenAI(**base_kwargs)
-    async_client = AsyncOpenAI(**base_kwargs)
-
-
-# ---- Enhanced TTL cache with metrics ----
-class _TTLCache:
-    def __init__(self, ttl_s: int = 1800, maxsize: int = 256):
-        self.ttl = ttl_s
-        self.store: dict[str, tuple[float, Any]] = {}
-        self.maxsize = maxsize
-        self.hits = 0
-        self.misses = 0
-        self.evictions = 0
-
-    def _now(self):
-        return time.time()
-
-    def get(self, k: str):
-        v = self.store.get(k)
-        if not v:
-            self.misses += 1
-            return None
+        kwargs["base_url"] = OPENAI_BASE_URL
+    return kwargs
 
-        ts, val = v
-        if self._now() - ts > self.ttl:
-            self.store.pop(k, None)
-            self.misses += 1
-            return None
 
-        self.hits += 1
-        return val
-
-    def set(self, k: str, v: Any):
-        if len(self.store) >= self.maxsize:
-            # drop oldest
-            oldest = min(self.store.items(), key=lambda x: x[1][0])[0]
-            self.store.pop(oldest, None)
-            self.evictions += 1
-
-        self.store[k] = (self._now(), v)
-
-    def get_stats(self) -> dict:
-        """Get cache statistics"""
-        total_requests = self.hits + self.misses
-        hit_rate = self.hits / total_requests if total_requests > 0 else 0
-        return {
-            "size": len(self.store),
-            "max_size": self.maxsize,
-            "hits": self.hits,
-            "misses": self.misses,
-            "evictions": self.evictions,
-            "hit_rate": round(hit_rate, 3),
+@functools.cache
+def _default_async_client() -> AsyncOpenAI | None:
+    if not OPENAI_API_KEY:
+        return None
+    http = httpx.AsyncClient(
+        limits=LLM_POOL_LIMITS,
+        timeout=_request_timeout(LLM_TIMEOUT_S),
+        http2=LLM_HTTP2,
+    )
+    _http_clients["async"] = http
+    logger.info(
+        f"LLM async client created (max_connections="
+        f"{LLM_POOL_LIMITS.max_connections}, http2={LLM_HTTP2})"
+    )
+    return AsyncOpenAI(**_client_kwargs(), http_client=http)
+
+
+@functools.cache
+def _default_sync_client() -> OpenAI | None:
+    if not OPENAI_API_KEY:
+        return None
+    http = httpx.Client(
+        limits=LLM_POOL_LIMITS,
+        timeout=_request_timeout(LLM_TIMEOUT_S),
+        http2=LLM_HTTP2,
+    )
+    _http_clients["sync"] = http
+    return OpenAI(**_client_kwargs(), http_client=http)
+
+
+def get_async_client() -> AsyncOpenAI | None:
+    if async_client is not _UNSET:
+        return async_client
+    with _client_lock:  # functools.cache alone may build twice under contention
+        return _default_async_client()
+
+
+def get_sync_client() -> OpenAI | None:
+    if sync_client is not _UNSET:
+        return sync_client
+    with _client_lock:
+        return _default_sync_client()
+
+
+def reset_clients() -> None:
+    """Forget the default clients; the next get_*_client() call builds new ones"""
+    with _client_lock:
+        _default_async_client.cache_clear()
+        _default_sync_client.cache_clear()
+        _http_clients.clear()
+
+
+def _connection_pool(http: httpx.Client | httpx.AsyncClient) -> Any:
+    # httpx exposes no pool introspection; this is the httpcore pool behind the
+    # default transport. Returns None when the layout differs (custom transport,
+    # other httpx/httpcore version) and callers fall back to the configured limits.
+    return getattr(getattr(http, "_transport", None), "_pool", None)
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Connection-pool utilisation of the (lazily created) HTTP clients"""
+    stats: dict[str, Any] = {
+        "max_connections": LLM_POOL_LIMITS.max_connections,
+        "max_keepalive": LLM_POOL_LIMITS.max_keepalive_connections,
+        "keepalive_expiry_s": LLM_POOL_LIMITS.keepalive_expiry,
+        "http2": LLM_HTTP2,
+        "clients": {},
+    }
+    for kind, http in _http_clients.items():
+        pool = _connection_pool(http)
+        conns = list(getattr(pool, "connections", None) or [])
+        if pool is None or not all(hasattr(c, "is_idle") for c in conns):
+            stats["clients"][kind] = {"closed": http.is_closed, "live_stats": False}
+            continue
+        idle = sum(1 for c in conns if c.is_idle())
+        active = len(conns) - idle
+        stats["clients"][kind] = {
+            "closed": http.is_closed,
+            "connections": len(conns),
+            "active": active,
+            "idle": idle,
+            "queued_requests": max(len(getattr(pool, "_requests", [])) - active, 0),
+            "utilisation": round(active / LLM_POOL_LIMITS.max_connections, 3),
         }
+    return stats
 
 
-_cache = _TTLCache()
+# ---- Response cache: in-process LRU + TTL, optionally backed by a shared on-disk tier ----
+def persistent_cache(cfg: Any = settings) -> SQLiteCache | None:
+    """On-disk response-cache tier configured by `cfg`, or None (memory only)"""
+    backend = str(getattr(cfg, "LLM_CACHE_BACKEND", "none")).lower()
+    if backend == "sqlite":
+        if getattr(cfg, "HIPAA_MODE", False):
+            # cached summaries are PHI; never persist them unencrypted
+            logger.warning("LLM_CACHE_BACKEND=sqlite ignored in HIPAA_MODE → memory only")
+            return None
+        return SQLiteCache(
+            getattr(cfg, "LLM_CACHE_PATH", "./data/llm_cache.db"),
+            ttl_s=getattr(cfg, "LLM_CACHE_DISK_TTL_S", 86400),
+            max_bytes=getattr(cfg, "LLM_CACHE_DISK_MAX_BYTES", 0),
+            compress_min_bytes=getattr(cfg, "LLM_CACHE_COMPRESS_MIN_BYTES", 2048),
+        )
+    if backend not in ("none", "memory", ""):
+        logger.warning(f"Unknown LLM_CACHE_BACKEND={backend!r} → memory only")
+    return None
+
+
+def build_response_cache(cfg: Any = settings) -> TieredCache:
+    """Memory tier plus the optional disk tier, both configured by `cfg`"""
+    return TieredCache(
+        LRUTTLCache(
+            ttl_s=getattr(cfg, "LLM_CACHE_TTL_S", 1800),
+            maxsize=getattr(cfg, "LLM_CACHE_MAX_ENTRIES", 256),
+            max_bytes=getattr(cfg, "LLM_CACHE_MAX_BYTES", 0),
+            sweep_interval_s=getattr(cfg, "LLM_CACHE_SWEEP_S", 60),
+        ),
+        persistent_cache(cfg),
+    )
+
+
+_cache = build_response_cache()
 
 
-def _ckey(
+def use_response_cache(cache: TieredCache) -> TieredCache:
+    """Swap in another response cache (e.g. one built from test settings); returns the old one"""
+    global _cache
+    previous, _cache = _cache, cache
+    return previous
+
+
+def cache_key(
     messages: list[dict],
     model: str,
     temperature: float,
@@ -124,6 +237,7 @@ def _ckey(
     top_p: float | None = None,
     seed: int | None = None,
 ) -> str:
+    """Response-cache key for one chat_json request"""
     blob = json.dumps(
         {
             "m": messages,
@@ -138,6 +252,22 @@ def _ckey(
     return hashlib.sha256(blob.encode()).hexdigest()
 
 
+def cache_get(key: str) -> dict | None:
+    """Response-cache lookup for a cache_key() (memory tier, then disk if enabled)"""
+    return _cache.get(key)
+
+
+def cache_set(key: str, data: dict) -> None:
+    _cache.set(key, data)
+
+
+def response_format(response_schema: dict | None) -> dict:
+    """OpenAI response_format: strict JSON schema if given, else any JSON object"""
+    if response_schema is None:
+        return {"type": "json_object"}
+    return {"type": "json_schema", "json_schema": response_schema}
+
+
 # ---- Enhanced Retry helpers ----
 def _is_retryable(e: Exception) -> bool:
     """Check if exception is retryable with more specific error handling"""
@@ -205,32 +335,69 @@ async def chat_json(
     Returns dict on success, raises exception on failure.
     Falls back to fallback_func if provided.
     """
-    if not async_client:
+    llm = get_async_client()
+    if not llm:
         raise RuntimeError("LLM client unavailable (no OPENAI_API_KEY)")
 
     # Force JSON schema setting
-    if response_schema is None:
-        rf = {"type": "json_object"}
-    else:
-        rf = {"type": "json_schema", "json_schema": response_schema}  # type: ignore
+    rf = response_format(response_schema)
 
-    key = _ckey(messages, model, temperature, rf, top_p=top_p, seed=seed)
+    key = cache_key(messages, model, temperature, rf, top_p=top_p, seed=seed)
+    t_start = time.perf_counter()
+    call = new_call(model)
     if use_cache:
         hit = _cache.get(key)
         if hit is not None:
+            call["cache"] = "hit"
+            _finish_call(call, t_start)
             return hit
-
-    async def _call():
-        try:
-            resp = await async_client.chat.completions.create(
+    else:
+        call["cache"] = "bypass"
+
+    est_tokens = estimate_tokens(messages, LLM_EST_OUTPUT_TOKENS)
+    requests_sent = 0
+
+    async def _request():
+        nonlocal requests_sent
+        requests_sent += 1
+        # each request (incl. retries and hedges) is admitted by the shared limiter
+        async with llm_limiter.slot(est_tokens) as wait_ms:
+            t0 = time.perf_counter()
+            resp = await llm.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=temperature,
                 top_p=top_p,
                 response_format=rf,
-                timeout=timeout_s,
+                timeout=_request_timeout(timeout_s),
                 seed=seed,
             )
+        network_ms = (time.perf_counter() - t0) * 1000
+        llm_hedger.tracker.record(network_ms)
+        call["queue_ms"] += wait_ms
+        call["network_ms"] += network_ms
+        _record_usage(call, resp)
+        return resp
+
+    async def _call():
+        call["attempts"] += 1
+        # open breaker → no provider call, no retry backoff; caller falls back
+        if not llm_breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker open")
+        try:
+            resp = await llm_hedger.run(_request)
+        except Exception as e:
+            # only provider-health errors count; a 4xx means the provider is up
+            if _is_retryable(e):
+                llm_breaker.record_failure()
+            else:
+                llm_breaker.record_success()
+            logger.error(f"LLM API call failed: {type(e).__name__}: {e}")
+            raise
+        llm_breaker.record_success()
+
+        t_parse = time.perf_counter()
+        try:
             txt = resp.choices[0].message.content or "{}"
 
             # JSON parsing attempt
@@ -256,26 +423,153 @@ async def chat_json(
         except Exception as e:
             logger.error(f"LLM API call failed: {type(e).__name__}: {e}")
             raise
+        finally:
+            call["parse_ms"] += (time.perf_counter() - t_parse) * 1000
 
     try:
         data = await _retry_async(_call, attempts=3)
         if use_cache:
             _cache.set(key, data)
+        call["hedged"] = requests_sent > call["attempts"]
+        _finish_call(call, t_start)
         return data
 
     except Exception as e:
-        logger.error(f"LLM chat_json failed after retries: {type(e).__name__}: {e}")
+        call["hedged"] = requests_sent > call["attempts"]
+        call["status"] = "error"
+        call["error"] = type(e).__name__
+        if isinstance(e, CircuitOpenError):
+            logger.info("LLM circuit breaker open → skipping provider call")
+        else:
+            logger.error(f"LLM chat_json failed after retries: {type(e).__name__}: {e}")
 
         # Use fallback function if available
         if fallback_func:
             logger.info("Using fallback function due to LLM failure")
             try:
                 fallback_result = fallback_func()
+                call["status"] = "fallback"
+                call["fallback"] = True
                 return fallback_result
             except Exception as fallback_error:
                 logger.error(f"Fallback function also failed: {fallback_error}")
+            finally:
+                _finish_call(call, t_start)
+        else:
+            _finish_call(call, t_start)
+
+        raise
+
+
+def _record_usage(call: dict[str, Any], resp: Any) -> None:
+    usage = getattr(resp, "usage", None)
+    if usage is not None:
+        call["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        call["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+
+def _finish_call(call: dict[str, Any], t_start: float) -> None:
+    call["total_ms"] = (time.perf_counter() - t_start) * 1000
+    for f in ("queue_ms", "network_ms", "parse_ms", "total_ms"):
+        call[f] = round(call[f], 2)
+    llm_telemetry.record(call)
+
+
+async def chat_json_stream(
+    *,
+    messages: list[dict],
+    model: str = LLM_MODEL,
+    temperature: float = LLM_TEMPERATURE,
+    top_p: float = LLM_TOP_P,
+    response_schema: dict | None = None,
+    timeout_s: float = LLM_TIMEOUT_S,
+    seed: int | None = LLM_SEED,
+    use_cache: bool = True,
+) -> AsyncIterator[tuple[dict, bool]]:
+    """
+    Streaming variant of chat_json. Yields (partial_dict, False) as the JSON
+    object is generated, then (final_dict, True) once it is complete.
+    No retries/fallback: a mid-stream failure raises and the caller falls back.
+    """
+    llm = get_async_client()
+    if not llm:
+        raise RuntimeError("LLM client unavailable (no OPENAI_API_KEY)")
+
+    rf = response_format(response_schema)
 
+    key = cache_key(messages, model, temperature, rf, top_p=top_p, seed=seed)
+    t_start = time.perf_counter()
+    call = new_call(model, stream=True)
+    if use_cache:
+        hit = _cache.get(key)
+        if hit is not None:
+            call["cache"] = "hit"
+            _finish_call(call, t_start)
+            yield hit, True
+            return
+    else:
+        call["cache"] = "bypass"
+
+    call["attempts"] = 1
+    if not llm_breaker.allow():
+        call["status"], call["error"] = "error", "CircuitOpenError"
+        _finish_call(call, t_start)
+        raise CircuitOpenError("LLM circuit breaker open")
+
+    parser = PartialJSON()
+    last: dict = {}
+    try:
+        async with llm_limiter.slot(estimate_tokens(messages, LLM_EST_OUTPUT_TOKENS)) as wait_ms:
+            call["queue_ms"] = wait_ms
+            t0 = time.perf_counter()
+            stream = await llm.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                top_p=top_p,
+                response_format=rf,
+                timeout=_request_timeout(timeout_s),
+                seed=seed,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                _record_usage(call, chunk)  # only the final chunk carries usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                t_parse = time.perf_counter()
+                parser.feed(delta)
+                snap = parser.snapshot()
+                call["parse_ms"] += (time.perf_counter() - t_parse) * 1000
+                if snap != last:
+                    last = snap
+                    yield snap, False
+            # includes time the consumer spent between chunks (SSE writes)
+            call["network_ms"] = (time.perf_counter() - t0) * 1000
+    except Exception as e:
+        if _is_retryable(e):
+            llm_breaker.record_failure()
+        else:
+            llm_breaker.record_success()
+        call["status"], call["error"] = "error", type(e).__name__
+        _finish_call(call, t_start)
+        logger.error(f"LLM stream failed: {type(e).__name__}: {e}")
         raise
+    llm_breaker.record_success()
+
+    text = parser.text
+    try:
+        # raw_decode: ignore anything the model wrote after the object
+        data, _ = json.JSONDecoder().raw_decode(text, max(text.find("{"), 0))
+    except json.JSONDecodeError as e:
+        call["status"], call["error"] = "error", type(e).__name__
+        _finish_call(call, t_start)
+        raise
+    _finish_call(call, t_start)
+    if use_cache:
+        _cache.set(key, data)
+    yield data, True
 
 
 # ---- Enhanced utility functions ----
@@ -310,18 +604,30 @@ def get_client_status() -> dict:
     config_status = validate_config()
     cache_stats = _cache.get_stats()
 
+    # don't create clients just to report status
+    overrides = {"sync": sync_client, "async": async_client}
+    clients = {
+        k: c is not None if c is not _UNSET else k in _http_clients for k, c in overrides.items()
+    }
+    has_async = async_client is not None if async_client is not _UNSET else bool(OPENAI_API_KEY)
+
     return {
-        "available": async_client is not None and config_status["valid"],
+        "available": has_async and config_status["valid"],
         "config_status": config_status,
         "cache": cache_stats,
-        "clients": {"sync": sync_client is not None, "async": async_client is not None},
+        "persistent_cache": _cache.get_persistent_stats(),
+        "limiter": llm_limiter.get_stats(),
+        "circuit_breaker": llm_breaker.get_state(),
+        "hedging": llm_hedger.get_stats(),
+        "telemetry": llm_telemetry.summary(),
+        "canonical_cache": summary_cache.get_stats(),
+        "clients": clients,
+        "pool": get_pool_stats(),
     }
 
 
 def clear_cache():
     """Clear the cache and reset statistics"""
-    _cache.store.clear()
-    _cache.hits = 0
-    _cache.misses = 0
-    _cache.evictions = 0
+    _cache.clear()
+    summary_cache.clear()
     logger.info("Cache cleared and statistics reset")
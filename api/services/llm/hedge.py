@@ -0,0 +1,135 @@
+# api/services/llm/hedge.py
+"""
+Hedged provider requests.
+
+If a request is still outstanding after the observed p90 latency, a duplicate
+is sent and whichever finishes first wins; the other is cancelled. Extra
+requests are capped at `max_ratio` of primaries so a slow provider can't double
+our traffic.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from api.core.config import settings
+
+logger = logging.getLogger("llm")
+
+T = TypeVar("T")
+
+LLM_HEDGE = bool(getattr(settings, "LLM_HEDGE", False))
+
+
+async def _cancel_all(tasks: list[asyncio.Future[Any]]) -> None:
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class LatencyTracker:
+    """Sliding window of successful request latencies"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, ms: float) -> None:
+        self._samples.append(ms)
+
+    def percentile(self, p: float) -> float | None:
+        """None until there are enough samples to trust the estimate"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(p * len(ordered)) - 1)]
+
+
+class Hedger:
+    def __init__(
+        self,
+        *,
+        enabled: bool = False,
+        max_ratio: float = 0.1,
+        min_delay_ms: float = 300,
+        tracker: LatencyTracker | None = None,
+    ):
+        self.enabled = enabled
+        self.max_ratio = max_ratio
+        self.min_delay_ms = min_delay_ms
+        self.tracker = tracker or LatencyTracker()
+        self.primaries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def delay_s(self) -> float | None:
+        p90 = self.tracker.percentile(0.9)
+        if p90 is None:
+            return None
+        return max(p90, self.min_delay_ms) / 1000.0
+
+    def _take_budget(self) -> bool:
+        if self.hedges + 1 > self.max_ratio * self.primaries:
+            self.over_budget += 1
+            return False
+        self.hedges += 1
+        return True
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn(), hedging with a second fn() once the p90 delay passes"""
+        self.primaries += 1
+        delay = self.delay_s() if self.enabled else None
+        if delay is None:
+            return await fn()
+
+        primary = asyncio.ensure_future(fn())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._take_budget():
+                return await primary
+
+            logger.info(f"Hedging LLM request after {delay * 1000:.0f}ms")
+            hedge = asyncio.ensure_future(fn())
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # both failed → surface the primary's error to the retry loop
+            return primary.result()
+        finally:
+            # the loser, or both when the caller is cancelled: cancel and wait
+            # for them so no request outlives this call
+            await _cancel_all([t for t in tasks if not t.done()])
+
+    def get_stats(self) -> dict[str, Any]:
+        delay = self.delay_s()
+        return {
+            "enabled": self.enabled,
+            "p90_ms": self.tracker.percentile(0.9),
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "primaries": self.primaries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "over_budget": self.over_budget,
+            "max_ratio": self.max_ratio,
+        }
+
+
+llm_hedger = Hedger(
+    enabled=LLM_HEDGE,
+    max_ratio=getattr(settings, "LLM_HEDGE_MAX_RATIO", 0.1),
+    min_delay_ms=getattr(settings, "LLM_HEDGE_MIN_DELAY_MS", 300),
+)
@@ -0,0 +1,153 @@
+# api/services/llm/limiter.py
+"""
+Client-side admission control for provider calls.
+
+Every chat completion goes through `llm_limiter.slot(tokens)` which
+  1. reserves one request and the estimated tokens from the RPM/TPM buckets
+     (reservations may go negative; the caller sleeps until they're paid back,
+     which keeps admission FIFO), then
+  2. waits for one of `max_concurrency` in-flight slots.
+Calls queue here instead of bursting into 429s and retry backoff.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any
+
+from api.core.config import settings
+
+logger = logging.getLogger("llm")
+
+# rough chars-per-token for English + JSON prompts
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: list[dict], max_output_tokens: int = 0) -> int:
+    """Cheap prompt-size estimate (no tokenizer): chars/4 + per-message overhead"""
+    chars = 0
+    for m in messages:
+        content = m.get("content") or ""
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    return chars // _CHARS_PER_TOKEN + 4 * len(messages) + max_output_tokens
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously; rate 0 → unlimited"""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self._rate_s = per_minute / 60.0
+        self._last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self._rate_s)
+        self._last = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` now; returns seconds until the bucket is back in credit"""
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill(time.monotonic())
+        # a single oversized request must not wait forever
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self._rate_s
+
+
+class LLMLimiter:
+    """Max in-flight requests + RPM/TPM token buckets, with queue-wait metrics"""
+
+    def __init__(self, max_concurrency: int = 8, rpm: float = 0, tpm: float = 0):
+        self.max_concurrency = max_concurrency
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._waits_ms: deque[float] = deque(maxlen=512)
+        self.queued = 0
+        self.admitted = 0
+        self.max_wait_ms = 0.0
+
+    async def _acquire_slot(self) -> None:
+        if self.max_concurrency <= 0:
+            return
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot was handed over just as we were cancelled
+                self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        if self.max_concurrency <= 0:
+            return
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                # hand the slot straight to the next waiter; in-flight count unchanged
+                fut.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, est_tokens: int = 0):
+        """Hold one admission for the duration of a provider request"""
+        t0 = time.perf_counter()
+        self.queued += 1
+        try:
+            delay = max(self.rpm.reserve(1), self.tpm.reserve(est_tokens))
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._acquire_slot()
+        finally:
+            self.queued -= 1
+        wait_ms = (time.perf_counter() - t0) * 1000
+        self._waits_ms.append(wait_ms)
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.admitted += 1
+        if wait_ms > 1000:
+            logger.info(f"LLM call queued {wait_ms:.0f}ms before admission")
+        try:
+            yield wait_ms
+        finally:
+            self._release_slot()
+
+    def get_stats(self) -> dict[str, Any]:
+        waits = sorted(self._waits_ms)
+
+        def _pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, math.ceil(p * len(waits)) - 1)], 2)
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rpm_limit": self.rpm.per_minute,
+            "tpm_limit": self.tpm.per_minute,
+            "wait_ms_p50": _pct(0.5),
+            "wait_ms_p95": _pct(0.95),
+            "wait_ms_max": round(self.max_wait_ms, 2),
+        }
+
+
+llm_limiter = LLMLimiter(
+    max_concurrency=getattr(settings, "LLM_MAX_CONCURRENCY", 8),
+    rpm=getattr(settings, "LLM_RPM_LIMIT", 0),
+    tpm=getattr(settings, "LLM_TPM_LIMIT", 0),
+)
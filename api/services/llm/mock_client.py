@@ -32,7 +32,7 @@ class MockOpenAIClient:
         logger.info(f"Mock LLM call: model={model}, temp={temperature}")
 
         # Generate mock response based on input
-        mock_response = self._generate_mock_response(messages, response_format)
+        mock_response = self.generate_mock_response(messages, response_format)
 
         return {
             "id": f"mock-{random.randint(1000, 9999)}",
@@ -53,7 +53,7 @@ class MockOpenAIClient:
             },
         }
 
-    def _generate_mock_response(
+    def generate_mock_response(
         self, messages: list[dict], response_format: dict
     ) -> str:
         """Generate mock response based on input messages"""
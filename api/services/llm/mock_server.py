@@ -0,0 +1,423 @@
+# api/services/llm/mock_server.py
+"""
+Local OpenAI-compatible stand-in for load tests.
+
+Serves /v1/chat/completions (plain and SSE streaming), /v1/models and enough
+of /v1/files + /v1/batches for OpenAIBatchBackend, with content generated by
+MockOpenAIClient. Latency, error/429 injection and throughput limits are
+configurable, so retries, the limiter, the breaker, hedging, caching and
+batching can be exercised end-to-end without network access:
+
+    python -m api.services.llm.mock_server --port 8099 --latency lognormal:400,0.6 \
+        --error-rate 0.02 --rate-limit-rate 0.05 --max-rpm 600
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=mock make api
+
+Latency specs: fixed:MS | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from dataclasses import asdict, dataclass, fields
+from typing import Any
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from api.services.llm.mock_client import mock_async_client
+
+logger = logging.getLogger("llm.mock")
+
+
+@dataclass
+class MockServerConfig:
+    latency: str = "lognormal:400,0.5"
+    error_rate: float = 0.0  # share of requests answered with a 500
+    rate_limit_rate: float = 0.0  # share of requests answered with a 429
+    max_rpm: int = 0  # requests per rolling minute before 429s; 0 = unlimited
+    max_concurrency: int = 0  # in-flight requests before 429s; 0 = unlimited
+    stream_chunk_chars: int = 16
+    stream_chunk_ms: float = 15.0  # delay between SSE chunks after the first
+    retry_after_s: float = 1.0
+    seed: int | None = None
+
+    @classmethod
+    def from_env(cls) -> MockServerConfig:
+        """MOCK_LLM_<FIELD> environment overrides, e.g. MOCK_LLM_ERROR_RATE=0.05"""
+        values: dict[str, Any] = {}
+        for f in fields(cls):
+            raw = os.getenv(f"MOCK_LLM_{f.name.upper()}")
+            if raw is not None:
+                values[f.name] = _coerce(f.name, raw)
+        return cls(**values)
+
+
+def _coerce(name: str, raw: Any) -> Any:
+    default = getattr(MockServerConfig, name)
+    if name == "seed":
+        return None if raw in (None, "") else int(raw)
+    if isinstance(default, bool):
+        return str(raw).lower() in ("1", "true", "yes")
+    return type(default)(raw)
+
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Callable returning one latency sample in ms for a spec like 'normal:300,50'"""
+    kind, _, args = spec.partition(":")
+    try:
+        params = [float(a) for a in args.split(",") if a.strip()]
+    except ValueError as e:
+        raise ValueError(f"Bad latency spec {spec!r}") from e
+    kind = kind.strip().lower()
+    if kind == "fixed" and len(params) == 1:
+        return lambda: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda: rng.uniform(params[0], params[1])
+    if kind == "normal" and len(params) == 2:
+        return lambda: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal" and len(params) == 2 and params[0] > 0:
+        mu = math.log(params[0])
+        return lambda: rng.lognormvariate(mu, params[1])
+    raise ValueError(f"Bad latency spec {spec!r}")
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class MockLLMState:
+    """Config, injected-fault RNG, throughput gates and counters for one app"""
+
+    def __init__(self, config: MockServerConfig):
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+        self.configure(config)
+        self.reset()
+
+    def configure(self, config: MockServerConfig) -> None:
+        # build everything first: a bad latency spec must leave the old config in place
+        rng = random.Random(config.seed)
+        sample_ms = latency_sampler(config.latency, rng)
+        self.config, self.rng, self.sample_ms = config, rng, sample_ms
+
+    def reset(self) -> None:
+        self.window: deque[float] = deque()
+        self.in_flight = 0
+        self.stats: dict[str, Any] = {
+            "requests": 0,
+            "ok": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "throttled": 0,
+            "streams": 0,
+            "peak_in_flight": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def admit(self) -> tuple[int, str] | None:
+        """(status, reason) when the request should be rejected, else None"""
+        cfg = self.config
+        now = time.monotonic()
+        while self.window and now - self.window[0] >= 60.0:
+            self.window.popleft()
+        if cfg.max_rpm and len(self.window) >= cfg.max_rpm:
+            self.stats["throttled"] += 1
+            return 429, "Rate limit reached for requests per minute"
+        if cfg.max_concurrency and self.in_flight >= cfg.max_concurrency:
+            self.stats["throttled"] += 1
+            return 429, "Too many concurrent requests"
+        self.window.append(now)
+        roll = self.rng.random()
+        if roll < cfg.error_rate:
+            self.stats["errors"] += 1
+            return 500, "Injected server error"
+        if roll < cfg.error_rate + cfg.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            return 429, "Injected rate limit"
+        return None
+
+    def retry_after(self) -> float:
+        if self.config.max_rpm and len(self.window) >= self.config.max_rpm:
+            return max(0.0, 60.0 - (time.monotonic() - self.window[0]))
+        return self.config.retry_after_s
+
+
+def _error(status: int, message: str, retry_after: float | None = None) -> JSONResponse:
+    err_type = "rate_limit_exceeded" if status == 429 else "server_error"
+    headers = {"retry-after": f"{retry_after:.2f}"} if retry_after is not None else None
+    return JSONResponse(
+        {"error": {"message": message, "type": err_type, "code": err_type}},
+        status_code=status,
+        headers=headers,
+    )
+
+
+def _completion(body: dict[str, Any]) -> dict[str, Any]:
+    messages = body.get("messages") or []
+    content = mock_async_client.generate_mock_response(messages, body.get("response_format") or {})
+    prompt_tokens = sum(_tokens(str(m.get("content", ""))) + 4 for m in messages)
+    completion_tokens = _tokens(content)
+    return {
+        "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def create_app(config: MockServerConfig | None = None) -> FastAPI:
+    app = FastAPI(title="Mock LLM provider")
+    state = MockLLMState(config or MockServerConfig.from_env())
+    app.state.mock = state
+
+    async def _sse(
+        resp: dict[str, Any], include_usage: bool, first_delay_s: float, release: Callable[[], None]
+    ) -> AsyncIterator[str]:
+        cfg = state.config
+        base = {k: resp[k] for k in ("id", "created", "model")}
+        base["object"] = "chat.completion.chunk"
+        content = resp["choices"][0]["message"]["content"]
+        size = max(1, cfg.stream_chunk_chars)
+        try:
+            await asyncio.sleep(first_delay_s)
+            for i in range(0, len(content), size):
+                delta: dict[str, Any] = {"content": content[i : i + size]}
+                if i == 0:
+                    delta["role"] = "assistant"
+                chunk = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if cfg.stream_chunk_ms:
+                    await asyncio.sleep(cfg.stream_chunk_ms / 1000.0)
+            done = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            yield f"data: {json.dumps(done)}\n\n"
+            if include_usage:
+                yield f"data: {json.dumps({**base, 'choices': [], 'usage': resp['usage']})}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            release()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state.stats["requests"] += 1
+        rejected = state.admit()
+        if rejected is not None:
+            status, message = rejected
+            return _error(status, message, state.retry_after() if status == 429 else None)
+
+        state.in_flight += 1
+        state.stats["peak_in_flight"] = max(state.stats["peak_in_flight"], state.in_flight)
+        resp = _completion(body)
+        state.stats["ok"] += 1
+        state.stats["prompt_tokens"] += resp["usage"]["prompt_tokens"]
+        state.stats["completion_tokens"] += resp["usage"]["completion_tokens"]
+        delay_s = state.sample_ms() / 1000.0
+
+        if body.get("stream"):
+            state.stats["streams"] += 1
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            released = False
+
+            def release() -> None:
+                nonlocal released
+                if not released:
+                    released = True
+                    state.in_flight -= 1
+
+            # the stream releases its slot as soon as it ends; the background task
+            # covers a body that is never iterated or is cancelled mid-stream
+            return StreamingResponse(
+                _sse(resp, include_usage, delay_s, release),
+                media_type="text/event-stream",
+                background=BackgroundTask(release),
+            )
+        try:
+            await asyncio.sleep(delay_s)
+        finally:
+            state.in_flight -= 1
+        return resp
+
+    @app.get("/v1/models")
+    async def models():
+        return {
+            "object": "list",
+            "data": [
+                {"id": m, "object": "model", "owned_by": "mock"}
+                for m in ("gpt-4o-mini", "gpt-4o", "gpt-4.1-mini", "gpt-4.1")
+            ],
+        }
+
+    # ---- Batch API: enough for OpenAIBatchBackend ----
+
+    def _file_obj(file_id: str, filename: str, purpose: str) -> dict[str, Any]:
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(state.files[file_id]),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    @app.post("/v1/files")
+    async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)):
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        state.files[file_id] = await file.read()
+        return _file_obj(file_id, file.filename or "upload.jsonl", purpose)
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        if file_id not in state.files:
+            raise HTTPException(status_code=404, detail="No such file")
+        return PlainTextResponse(state.files[file_id].decode())
+
+    async def _run_batch(batch: dict[str, Any]) -> None:
+        batch["status"] = "in_progress"
+        lines = state.files[batch["input_file_id"]].decode().splitlines()
+        out = []
+        for line in filter(str.strip, lines):
+            row = json.loads(line)
+            out.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                        "custom_id": row["custom_id"],
+                        "response": {"status_code": 200, "body": _completion(row["body"])},
+                        "error": None,
+                    }
+                )
+            )
+        # one latency sample for the whole job; the Batch API is not interactive
+        await asyncio.sleep(state.sample_ms() / 1000.0)
+        output_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        state.files[output_id] = "\n".join(out).encode()
+        batch.update(
+            status="completed",
+            output_file_id=output_id,
+            completed_at=int(time.time()),
+            request_counts={"total": len(out), "completed": len(out), "failed": 0},
+        )
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request):
+        body = await request.json()
+        if body.get("input_file_id") not in state.files:
+            raise HTTPException(status_code=404, detail="No such input file")
+        batch = {
+            "id": f"batch_mock_{uuid.uuid4().hex[:12]}",
+            "object": "batch",
+            "endpoint": body.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "validating",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "completed_at": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        state.batches[batch["id"]] = batch
+        batch["_task"] = asyncio.ensure_future(_run_batch(batch))
+        return {k: v for k, v in batch.items() if not k.startswith("_")}
+
+    @app.get("/v1/batches/{batch_id}")
+    async def get_batch(batch_id: str):
+        batch = state.batches.get(batch_id)
+        if batch is None:
+            raise HTTPException(status_code=404, detail="No such batch")
+        return {k: v for k, v in batch.items() if not k.startswith("_")}
+
+    # ---- control plane for benchmarks ----
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return {
+            **state.stats,
+            "in_flight": state.in_flight,
+            "config": asdict(state.config),
+        }
+
+    @app.post("/mock/config")
+    async def mock_config(request: Request):
+        """Change fault injection / limits mid-run, e.g. to simulate an outage"""
+        updates = await request.json()
+        current = asdict(state.config)
+        try:
+            for name, value in updates.items():
+                if name not in current:
+                    raise ValueError(f"Unknown setting {name!r}")
+                current[name] = _coerce(name, value)
+            state.configure(MockServerConfig(**current))
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        return asdict(state.config)
+
+    @app.post("/mock/reset")
+    async def mock_reset():
+        state.reset()
+        return {"ok": True}
+
+    return app
+
+
+def main(argv: list[str] | None = None) -> None:
+    env = MockServerConfig.from_env()
+    ap = argparse.ArgumentParser(description="Local OpenAI-compatible mock LLM server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--latency", default=env.latency, help="e.g. fixed:200, lognormal:400,0.5")
+    ap.add_argument("--error-rate", type=float, default=env.error_rate)
+    ap.add_argument("--rate-limit-rate", type=float, default=env.rate_limit_rate)
+    ap.add_argument("--max-rpm", type=int, default=env.max_rpm)
+    ap.add_argument("--max-concurrency", type=int, default=env.max_concurrency)
+    ap.add_argument("--stream-chunk-ms", type=float, default=env.stream_chunk_ms)
+    ap.add_argument("--seed", type=int, default=env.seed)
+    args = ap.parse_args(argv)
+
+    config = MockServerConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_rpm=args.max_rpm,
+        max_concurrency=args.max_concurrency,
+        stream_chunk_chars=env.stream_chunk_chars,
+        stream_chunk_ms=args.stream_chunk_ms,
+        retry_after_s=env.retry_after_s,
+        seed=args.seed,
+    )
+    latency_sampler(config.latency, random.Random())  # fail fast on a bad spec
+
+    import uvicorn
+
+    logger.info(f"Mock LLM on http://{args.host}:{args.port}/v1 ({asdict(config)})")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,6 +1,7 @@
 # api/services/llm/negation_processor.py
 import logging
 import re
+from functools import lru_cache
 from typing import Any
 
 # Get logger
@@ -34,7 +35,7 @@ class NegationProcessor:
         "swelling": "edema",
     }
 
-    def __init__(self):
+    def __init__(self, cache_size: int = 8192):
         # Negation patterns
         self.negation_patterns = [
             r"\bno\b",
@@ -74,6 +75,21 @@ class NegationProcessor:
             for pattern, replacement in self.contextual_patterns
         ]
 
+        # Single-pass forms of the above. Every multi-word cue starts with one of
+        # the single-word cues, so this alternation matches iff any pattern does.
+        self._negation_re = re.compile(
+            r"\b(?:no|none|nothing|not|denies|deny|without|absent|negative)\b", re.IGNORECASE
+        )
+        # Candidate scope starts for every contextual pattern in one scan; each
+        # is confirmed with that pattern's own match() so results are unchanged
+        self._scope_re = re.compile(r"\b(?=(no|not|denies|without)\s)", re.IGNORECASE)
+        self._scope_index = {"no": 0, "not": 1, "denies": 2, "without": 3}
+        self._none_of_these_re = re.compile(
+            r"\bno,?\s*none\s*of\s*(?:the\s*)?(?:these|above)\b"
+        )
+        # list items repeat heavily across intakes
+        self._classify = lru_cache(maxsize=cache_size)(self._classify_uncached)
+
         logger.info(
             f"Initialized negation processor with {len(self.compiled_patterns)} patterns"
         )
@@ -83,30 +99,45 @@ class NegationProcessor:
         if not text:
             return False
 
-        text_lower = text.lower()
-        return any(pattern.search(text_lower) for pattern in self.compiled_patterns)
+        return self._negation_re.search(text.lower()) is not None
 
     def extract_negated_items(self, text: str) -> list[str]:
         """Extract items that are being negated"""
         if not text:
             return []
 
-        negated_items = []
         text_lower = text.lower()
 
-        # Check contextual patterns
-        for pattern, replacement in self.compiled_contextual:
-            matches = pattern.findall(text_lower)
-            for match in matches:
-                negated_item = replacement.format(match.strip())
-                negated_items.append(negated_item)
+        # Check contextual patterns: same items and order as running findall()
+        # per pattern, i.e. non-overlapping within a pattern, grouped by pattern
+        per_pattern: list[list[str]] = [[] for _ in self.compiled_contextual]
+        ends = [0] * len(self.compiled_contextual)
+        for cue in self._scope_re.finditer(text_lower):
+            idx = self._scope_index[cue.group(1).lower()]
+            if cue.start() < ends[idx]:
+                continue
+            pattern, replacement = self.compiled_contextual[idx]
+            m = pattern.match(text_lower, cue.start())
+            if m is not None:
+                ends[idx] = m.end()
+                per_pattern[idx].append(replacement.format(m.group(1).strip()))
+        negated_items = [item for items in per_pattern for item in items]
 
         # Check for "no, none of these" patterns
-        if re.search(r"\bno,?\s*none\s*of\s*(?:the\s*)?(?:these|above)\b", text_lower):
+        if self._none_of_these_re.search(text_lower):
             negated_items.append("all_symptoms_negative")
 
         return negated_items
 
+    def _classify_uncached(self, text: str) -> tuple[bool, tuple[str, ...]]:
+        if not self.contains_negation(text):
+            return False, ()
+        return True, tuple(self.extract_negated_items(text))
+
+    def cache_info(self):
+        """Hit/miss counts of the per-item classification cache"""
+        return self._classify.cache_info()
+
     def process_negation_in_list(
         self, items: list[str]
     ) -> tuple[list[str], list[str], list[str]]:
@@ -126,10 +157,10 @@ class NegationProcessor:
 
         for item in items:
             item_str = str(item).strip()
+            negated, negated_terms = self._classify(item_str)
 
-            if self.contains_negation(item_str):
+            if negated:
                 # Extract what is being negated
-                negated_terms = self.extract_negated_items(item_str)
 
                 if "all_symptoms_negative" in negated_terms:
                     negated_all = True
@@ -189,8 +220,9 @@ class NegationProcessor:
 
             elif isinstance(value, str):
                 # Process string for negation
-                if self.contains_negation(value):
-                    negated_items = self.extract_negated_items(value)
+                negated, negated_terms = self._classify(value)
+                if negated:
+                    negated_items = list(negated_terms)
                     processed_data[key] = {
                         "positive": [],
                         "negative": negated_items,
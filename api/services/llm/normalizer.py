@@ -2,19 +2,62 @@
 import json
 import logging
 import re
+import time
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+from itertools import count
 from pathlib import Path
 from typing import Any
 
 # Get logger
 logger = logging.getLogger(__name__)
 
+# (kind, pattern, replacement); the log strings quote these verbatim
+_RULES = [
+    # Duration normalization
+    ("Duration", r"\b(\d+)\s*-\s*(\d+)\s*minutes?\b", r"\1-\2min"),
+    ("Duration", r"\bmore than (\d+)\s*minutes?\b", r"\1min+"),
+    ("Duration", r"\b(\d+)\s*minutes?\b", r"\1min"),
+    ("Duration", r"\bseconds?\b", "seconds"),
+    ("Duration", r"\bhours?\b", "hours"),
+    # Pain severity normalization ("very severe" must be tried before "severe")
+    ("Severity", r"\b(\d+)\s*-\s*(\d+)\b", r"\1-\2"),
+    ("Severity", r"\bmild\b", "mild"),
+    ("Severity", r"\bmoderate\b", "moderate"),
+    ("Severity", r"\bvery severe\b", "very_severe"),
+    ("Severity", r"\bsevere\b", "severe"),
+]
+_GROUP = re.compile(r"(?<!\\)\((?!\?)")
+_BACKREF = re.compile(r"\\(\d)")
+
+
+def _compile_rules() -> tuple[re.Pattern, list[str]]:
+    """
+    Fold _RULES into one alternation of named groups (r0, r1, ...); each rule's
+    own capture groups are renamed r<i>_<n> so replacements still expand.
+    """
+    parts, templates = [], []
+    for idx, (_, pattern, replacement) in enumerate(_RULES):
+        n = count(1)
+        inner = _GROUP.sub(lambda _m, i=idx, n=n: f"(?P<r{i}_{next(n)}>", pattern)
+        parts.append(f"(?P<r{idx}>{inner})")
+        templates.append(_BACKREF.sub(lambda m, i=idx: f"\\g<r{i}_{m.group(1)}>", replacement))
+    return re.compile("|".join(parts)), templates
+
+
+_RULES_RE, _RULE_TEMPLATES = _compile_rules()
+_WS = re.compile(r"\s+")
+
 
 class MedicalNormalizer:
     """Medical term normalization using synonym dictionary"""
 
-    def __init__(self, synonyms_path: str = "rag_index/synonyms.json"):
+    def __init__(self, synonyms_path: str = "rag_index/synonyms.json", cache_size: int = 8192):
         self.synonyms_path = Path(synonyms_path)
         self.synonyms_dict = self._load_synonyms()
+        self._compile_terms()
+        # questionnaire answers repeat heavily across intakes
+        self._normalize_cached = lru_cache(maxsize=cache_size)(self._normalize)
         logger.info(f"Loaded {len(self.synonyms_dict)} synonym groups")
 
     def _load_synonyms(self) -> dict[str, dict[str, Any]]:
@@ -38,25 +81,50 @@ class MedicalNormalizer:
             logger.error(f"Failed to load synonyms: {e}")
             return {}
 
+    def _compile_terms(self) -> None:
+        """One alternation over every synonym term, longest first"""
+        self._terms: dict[str, tuple[int, str, str]] = {}
+        for data in self.synonyms_dict.values():
+            if isinstance(data, dict) and "terms" in data and "normalized" in data:
+                for term in data["terms"]:
+                    # first group wins for a term listed twice, as before
+                    self._terms.setdefault(
+                        term.lower(), (len(self._terms), term, data["normalized"])
+                    )
+        if not self._terms:
+            self._term_re = None
+            return
+        alternation = "|".join(
+            re.escape(t) for t in sorted(self._terms, key=lambda t: (-len(t), t))
+        )
+        self._term_re = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+
     def normalize_text(self, text: str) -> tuple[str, list[str]]:
         """Normalize text and return (normalized_text, applied_rules)"""
         if not text:
             return "", []
+        normalized, applied_rules = self._normalize_cached(text)
+        return normalized, list(applied_rules)
+
+    def cache_info(self):
+        """Hit/miss counts of the normalize_text() memo cache"""
+        return self._normalize_cached.cache_info()
 
+    def _normalize(self, text: str) -> tuple[str, tuple[str, ...]]:
         normalized = text.lower().strip()
-        applied_rules = []
+        fired: dict[int, str] = {}
 
-        # Apply synonym normalization
-        for data in self.synonyms_dict.values():
-            if isinstance(data, dict) and "terms" in data and "normalized" in data:
-                terms = data["terms"]
-                normalized_value = data["normalized"]
+        # Synonym normalization: one left-to-right pass, longest term wins and
+        # replacements are never re-scanned
+        if self._term_re is not None:
+
+            def _sub(m: re.Match) -> str:
+                order, term, normalized_value = self._terms[m.group()]
+                fired[order] = f"{term} -> {normalized_value}"
+                return normalized_value
 
-                for term in terms:
-                    if term.lower() in normalized:
-                        # Replace with normalized term
-                        normalized = normalized.replace(term.lower(), normalized_value)
-                        applied_rules.append(f"{term} -> {normalized_value}")
+            normalized = self._term_re.sub(_sub, normalized)
+        applied_rules = [fired[k] for k in sorted(fired)]
 
         # Apply regex-based normalization
         normalized, regex_rules = self._apply_regex_normalization(normalized)
@@ -65,42 +133,26 @@ class MedicalNormalizer:
         if applied_rules:
             logger.debug(f"Applied normalizations: {applied_rules}")
 
-        return normalized, applied_rules
+        return normalized, tuple(applied_rules)
 
     def _apply_regex_normalization(self, text: str) -> tuple[str, list[str]]:
-        """Apply regex-based normalization rules"""
-        rules_applied = []
-
-        # Duration normalization
-        duration_patterns = [
-            (r"\b(\d+)\s*-\s*(\d+)\s*minutes?\b", r"\1-\2min"),
-            (r"\bmore than (\d+)\s*minutes?\b", r"\1min+"),
-            (r"\b(\d+)\s*minutes?\b", r"\1min"),
-            (r"\bseconds?\b", "seconds"),
-            (r"\bhours?\b", "hours"),
+        """Apply the duration/severity rules in one pass of the combined pattern"""
+        fired: set[int] = set()
+
+        def _sub(m: re.Match) -> str:
+            idx = int(m.lastgroup[1:])
+            fired.add(idx)
+            return m.expand(_RULE_TEMPLATES[idx])
+
+        text = _RULES_RE.sub(_sub, text)
+        rules_applied = [
+            f"{kind}: {pattern} -> {replacement}"
+            for idx, (kind, pattern, replacement) in enumerate(_RULES)
+            if idx in fired
         ]
 
-        for pattern, replacement in duration_patterns:
-            if re.search(pattern, text):
-                text = re.sub(pattern, replacement, text)
-                rules_applied.append(f"Duration: {pattern} -> {replacement}")
-
-        # Pain severity normalization
-        severity_patterns = [
-            (r"\b(\d+)\s*-\s*(\d+)\b", r"\1-\2"),
-            (r"\bmild\b", "mild"),
-            (r"\bmoderate\b", "moderate"),
-            (r"\bsevere\b", "severe"),
-            (r"\bvery severe\b", "very_severe"),
-        ]
-
-        for pattern, replacement in severity_patterns:
-            if re.search(pattern, text):
-                text = re.sub(pattern, replacement, text)
-                rules_applied.append(f"Severity: {pattern} -> {replacement}")
-
         # Clean up multiple spaces
-        text = re.sub(r"\s+", " ", text).strip()
+        text = _WS.sub(" ", text).strip()
 
         return text, rules_applied
 
@@ -108,12 +160,71 @@ class MedicalNormalizer:
         self, intake_data: dict[str, Any]
     ) -> tuple[dict[str, Any], dict[str, list[str]]]:
         """Normalize entire intake data structure"""
+        normalized_data, all_applied_rules = self._normalize_fields(
+            intake_data, self.normalize_text
+        )
+        logger.info(
+            f"Normalized intake data with {sum(len(rules) for rules in all_applied_rules.values())} total rules"
+        )
+        return normalized_data, all_applied_rules
+
+    def normalize_many(
+        self,
+        intakes: Iterable[dict[str, Any]],
+        table: dict[str, tuple[str, list[str]]] | None = None,
+    ) -> tuple[list[tuple[dict[str, Any], dict[str, list[str]]]], dict[str, Any]]:
+        """
+        Bulk normalize_intake_data for backfills: every distinct answer string in
+        the batch is normalised once and fanned back out. Pass the same `table`
+        to later batches to carry the de-duplication across them. Returns the
+        per-intake (normalized_data, applied_rules) pairs and throughput stats.
+        """
+        start = time.perf_counter()
+        intakes = list(intakes)
+        unique: dict[str, None] = {}
+        total = 0
+        for intake in intakes:
+            for value in intake.values():
+                for item in value if isinstance(value, (list, tuple)) else (value,):
+                    if isinstance(item, str):
+                        total += 1
+                        unique.setdefault(item)
+
+        # bypass the memo cache: a large batch would only evict the hot entries
+        if table is None:
+            table = {}
+        new = [text for text in unique if text not in table]
+        table.update((text, self._normalize(text)) for text in new)
+
+        def _lookup(text: str) -> tuple[str, list[str]]:
+            normalized, rules = table[text]
+            return normalized, list(rules)
+
+        results = [self._normalize_fields(intake, _lookup) for intake in intakes]
+        elapsed = time.perf_counter() - start
+        stats = {
+            "intakes": len(intakes),
+            "strings": total,
+            "unique_strings": len(unique),
+            "normalized_strings": len(new),  # unique strings not seen in earlier batches
+            "dedupe_ratio": round(total / len(unique), 2) if unique else 0,
+            "seconds": round(elapsed, 4),
+            "intakes_per_s": round(len(intakes) / elapsed, 1) if elapsed else 0,
+            "strings_per_s": round(total / elapsed, 1) if elapsed else 0,
+        }
+        logger.info(f"Bulk normalization: {stats}")
+        return results, stats
+
+    @staticmethod
+    def _normalize_fields(
+        intake_data: dict[str, Any], normalize: Callable[[str], tuple[str, list[str]]]
+    ) -> tuple[dict[str, Any], dict[str, list[str]]]:
         normalized_data = {}
         all_applied_rules = {}
 
         for key, value in intake_data.items():
             if isinstance(value, str):
-                normalized, rules = self.normalize_text(value)
+                normalized, rules = normalize(value)
                 normalized_data[key] = normalized
                 all_applied_rules[key] = rules
 
@@ -123,7 +234,7 @@ class MedicalNormalizer:
 
                 for item in value:
                     if isinstance(item, str):
-                        normalized_item, rules = self.normalize_text(item)
+                        normalized_item, rules = normalize(item)
                         normalized_items.append(normalized_item)
                         item_rules.extend(rules)
                     else:
@@ -137,9 +248,6 @@ class MedicalNormalizer:
                 normalized_data[key] = value
                 all_applied_rules[key] = []
 
-        logger.info(
-            f"Normalized intake data with {sum(len(rules) for rules in all_applied_rules.values())} total rules"
-        )
         return normalized_data, all_applied_rules
 
     def get_normalized_categories(self) -> dict[str, str]:
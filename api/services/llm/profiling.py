@@ -0,0 +1,177 @@
+# api/services/llm/profiling.py
+"""
+Stage-level timing for the summary pipeline.
+
+LLMService opens a Trace per request and wraps each step (redact, normalize,
+negation, prompt, cache lookup, LLM call, validate, rules) in trace.span().
+pipeline_profiler keeps a rolling window per stage for p50/p95, so a slow
+summary can be attributed to the provider or to our own pre-processing.
+A small share of traces can also be run under cProfile (sample_rate); the top
+functions are kept in memory and handed to an optional hook.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import math
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from api.core.config import settings
+
+logger = logging.getLogger("llm")
+
+DEBUG_HEADER = "X-Debug-Timings"
+
+
+class Trace:
+    """Ordered timing spans for one pipeline run"""
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self.spans: list[dict[str, Any]] = []
+        self.total_ms = 0.0
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.spans.append(
+                {
+                    "stage": stage,
+                    "start_ms": round((start - self._t0) * 1000, 3),
+                    "ms": round((end - start) * 1000, 3),
+                }
+            )
+
+    def finish(self) -> None:
+        self.total_ms = (time.perf_counter() - self._t0) * 1000
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"total_ms": round(self.total_ms, 3), "spans": list(self.spans)}
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return round(ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)], 3)
+
+
+class PipelineProfiler:
+    def __init__(
+        self,
+        window: int = 500,
+        sample_rate: float = 0.0,
+        keep_profiles: int = 5,
+        top_n: int = 25,
+        hook: Callable[[Trace, pstats.Stats], None] | None = None,
+    ):
+        self.window = window
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.hook = hook
+        self.profiles: deque[dict[str, Any]] = deque(maxlen=keep_profiles)
+        self._lock = threading.Lock()
+        self._profiling = False
+        self.reset()
+
+    def reset(self) -> None:
+        self.traces = 0
+        self._stages: dict[str, deque[float]] = {}
+        self._totals: deque[float] = deque(maxlen=self.window)
+        self.profiles.clear()
+
+    def record(self, trace: Trace) -> None:
+        if not trace.total_ms:
+            trace.finish()
+        with self._lock:
+            self.traces += 1
+            self._totals.append(trace.total_ms)
+            for s in trace.spans:
+                self._stages.setdefault(s["stage"], deque(maxlen=self.window)).append(s["ms"])
+
+    def _start_profile(self) -> cProfile.Profile | None:
+        # cProfile is per-thread; overlapping async requests share it, so one at a time
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        with self._lock:
+            if self._profiling:
+                return None
+            self._profiling = True
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # another profiler is active
+            self._profiling = False
+            return None
+        return prof
+
+    def _stop_profile(self, prof: cProfile.Profile, trace: Trace) -> None:
+        prof.disable()
+        self._profiling = False
+        out = io.StringIO()
+        stats = pstats.Stats(prof, stream=out).sort_stats("cumulative")
+        stats.print_stats(self.top_n)
+        self.profiles.append(
+            {"ts": time.time(), "total_ms": round(trace.total_ms, 3), "top": out.getvalue()}
+        )
+        if self.hook is not None:
+            try:
+                self.hook(trace, stats)
+            except Exception as e:
+                logger.warning(f"Profiler hook failed: {e}")
+
+    @contextmanager
+    def trace(self, trace: Trace | None = None) -> Iterator[Trace]:
+        """Time one run (recorded on exit); sampled runs also go through cProfile"""
+        trace = trace or Trace()
+        prof = self._start_profile()
+        try:
+            yield trace
+        finally:
+            trace.finish()
+            if prof is not None:
+                self._stop_profile(prof, trace)
+            self.record(trace)
+
+    def get_stats(self, *, profiles: bool = False) -> dict[str, Any]:
+        with self._lock:
+            stages = {}
+            for name, samples in self._stages.items():
+                ordered = sorted(samples)
+                stages[name] = {
+                    "count": len(ordered),
+                    "p50_ms": _percentile(ordered, 0.5),
+                    "p95_ms": _percentile(ordered, 0.95),
+                    "mean_ms": round(sum(ordered) / len(ordered), 3),
+                }
+            totals = sorted(self._totals)
+            out: dict[str, Any] = {
+                "traces": self.traces,
+                "total_ms": (
+                    {"p50_ms": _percentile(totals, 0.5), "p95_ms": _percentile(totals, 0.95)}
+                    if totals
+                    else {"p50_ms": 0.0, "p95_ms": 0.0}
+                ),
+                "stages": stages,
+                "sample_rate": self.sample_rate,
+                "profiles_kept": len(self.profiles),
+            }
+            if profiles:
+                out["profiles"] = list(self.profiles)
+            return out
+
+
+pipeline_profiler = PipelineProfiler(
+    window=getattr(settings, "LLM_PROFILE_WINDOW", 500),
+    sample_rate=getattr(settings, "LLM_PROFILE_SAMPLE_RATE", 0.0),
+)
@@ -1,4 +1,8 @@
 # api/services/llm/prompts.py
+import json
+
+from api.services.llm.limiter import estimate_tokens
+
 SYSTEM = (
     """
 You convert structured intake JSON into a clinician-ready HPI/ROS summary with flags.
@@ -52,10 +56,27 @@ CONSTRAINTS:
 - Strings must be plain ASCII quotes (") and UTF-8 text. No markdown.
 - All flags must be set to FALSE (calculation handled externally).
 
-INPUT_JSON:
-{INPUT_JSON}
+INPUT_JSON: provided as the user message.
 
 Return ONLY the JSON object per schema. Do not add any text before or after the JSON.
 
 """
 ).strip()
+
+
+def build_messages(intake: dict) -> list[dict]:
+    """
+    SYSTEM is byte-identical for every call (a cacheable prefix for the provider);
+    the intake is sent once, as compact JSON, in the user message.
+    """
+    return [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": json.dumps(intake, ensure_ascii=False, separators=(",", ":"))},
+    ]
+
+
+def prompt_token_report(messages: list[dict]) -> dict:
+    """Estimated prompt tokens per role (static prefix vs per-patient intake)"""
+    system = sum(estimate_tokens([m]) for m in messages if m["role"] == "system")
+    user = sum(estimate_tokens([m]) for m in messages if m["role"] != "system")
+    return {"system": system, "intake": user, "total": system + user}
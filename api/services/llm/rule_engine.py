@@ -1,248 +1,270 @@
 # api/services/llm/rule_engine.py
+"""
+Clinical flag rules.
+
+Rules are declared in data/rules/clinical_flags.json: `features` name the
+intake fields and terms to look for, `flags` combine features into criteria
+with justification templates. RuleSet compiles every term into one matcher,
+so an intake is lowercased and scanned once per field; flags are then cheap
+boolean checks over the extracted features. Adding a flag adds terms to the
+matcher, not another scan over the intake. evaluate_many() does the same for
+N encounters at once with features as NumPy boolean columns.
+"""
+
+import json
 import logging
+import re
+from collections.abc import Iterable, Iterator
+from pathlib import Path
 from typing import Any
 
+import numpy as np
+
+from api.core.config import settings
+
 # Get logger
 logger = logging.getLogger(__name__)
 
+RULES_FILE = "clinical_flags.json"
+_REPO_RULES = Path(__file__).resolve().parents[3] / "data" / "rules" / RULES_FILE
+
+# (term, field) of the first match, or None
+Feature = tuple[str, str] | None
+
+
+def _texts(value: Any) -> Iterator[str]:
+    """Strings a field contributes; negation-processed fields count positives only"""
+    if isinstance(value, dict):
+        if "positive" in value:
+            yield from _texts(value["positive"])
+        else:
+            for v in value.values():
+                yield from _texts(v)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield str(item)
+    elif value is not None:
+        yield str(value)
+
+
+class RuleSet:
+    """Declarative flag rules compiled into a single term matcher"""
+
+    def __init__(self, spec: dict[str, Any]):
+        self.features: dict[str, dict[str, Any]] = spec["features"]
+        self.flags: dict[str, dict[str, Any]] = spec["flags"]
+        self._validate()
+        self.feature_names = list(self.features)
+        col = {name: i for i, name in enumerate(self.feature_names)}
+        self._criteria_cols = {
+            name: [[col[f] for f in c["all"]] for c in flag["criteria"]]
+            for name, flag in self.flags.items()
+        }
 
-class ClinicalFlagRule:
-    """Individual clinical flag rule with justification tracking"""
+        terms = sorted({t.lower() for f in self.features.values() for t in f["terms"]})
+        # the lookahead finds the longest term at each offset; every shorter term
+        # starting there is one of its prefixes, so substring semantics are kept
+        self._prefixes = {t: [p for p in terms if t.startswith(p)] for t in terms}
+        alternation = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+        self._matcher = re.compile(f"(?=({alternation}))") if terms else None
+        self._terms = {name: f["terms"] for name, f in self.features.items()}
+        self._fields = {
+            name: None if f["fields"] == "*" else frozenset(f["fields"])
+            for name, f in self.features.items()
+        }
 
-    def __init__(self, name: str, condition_func, description: str):
-        self.name = name
-        self.condition_func = condition_func
-        self.description = description
-        self.justification: list[str] = []
+    def _validate(self) -> None:
+        seen: set[str] = set()
+        for name, flag in self.flags.items():
+            for criterion in flag["criteria"]:
+                unknown = set(criterion["all"]) - set(self.features)
+                if unknown:
+                    raise ValueError(f"Flag {name} uses unknown features {sorted(unknown)}")
+            if flag.get("requires") and flag["requires"] not in seen:
+                raise ValueError(f"Flag {name} requires {flag['requires']}, which is not before it")
+            seen.add(name)
+
+    def scan(
+        self, intake: dict[str, Any], memo: dict[str, dict[str, str]] | None = None
+    ) -> list[tuple[str, dict[str, str]]]:
+        """
+        (field, {feature: first matching term}) per intake field, one scan each.
+        `memo` reuses scans of identical field texts; callers own its lifetime
+        (field texts are patient data, so nothing is cached on the instance).
+        """
+        out = []
+        for key, value in intake.items():
+            text = "\n".join(_texts(value))
+            if memo is None:
+                matched = self._scan_text(text)
+            else:
+                matched = memo.get(text)
+                if matched is None:
+                    matched = memo[text] = self._scan_text(text)
+            out.append((key, matched))
+        return out
+
+    def _scan_text(self, text: str) -> dict[str, str]:
+        if self._matcher is None or not text:
+            return {}
+        found: set[str] = set()
+        for m in self._matcher.finditer(text.lower()):
+            found.update(self._prefixes[m.group(1)])
+        out = {}
+        for name, terms in self._terms.items():
+            term = next((t for t in terms if t.lower() in found), None)
+            if term is not None:
+                out[name] = term
+        return out
+
+    def extract(
+        self, intake: dict[str, Any], memo: dict[str, dict[str, str]] | None = None
+    ) -> dict[str, Feature]:
+        """Feature → (term, field) of its first match in field order, then term order"""
+        features: dict[str, Feature] = dict.fromkeys(self.features)
+        for key, matched in self.scan(intake, memo):
+            for name, term in matched.items():
+                fields = self._fields[name]
+                if features[name] is None and (fields is None or key in fields):
+                    features[name] = (term, key)
+        return features
 
     def evaluate(
-        self, intake_data: dict[str, Any], summary_data: dict[str, Any]
-    ) -> tuple[bool, list[str]]:
-        """Evaluate rule and return (result, justifications)"""
-        self.justification = []
-        try:
-            result = self.condition_func(intake_data, summary_data, self.justification)
-            return result, self.justification.copy()
-        except Exception as e:
-            logger.error(f"Rule {self.name} evaluation failed: {e}")
-            return False, [f"Rule evaluation error: {e}"]
+        self, features: dict[str, Feature]
+    ) -> tuple[dict[str, bool], dict[str, list[str]]]:
+        flags: dict[str, bool] = {}
+        justifications: dict[str, list[str]] = {}
+        for name, flag in self.flags.items():
+            justification: list[str] = []
+            required = flag.get("requires")
+            if required:
+                justification.extend(justifications[required])
+                if not flags[required]:
+                    justification.append(flag["requires_unmet"])
+                    flags[name], justifications[name] = False, justification
+                    continue
+
+            met = 0
+            for criterion in flag["criteria"]:
+                hits = [features[f] for f in criterion["all"]]
+                if all(hits):
+                    met += 1
+                    term, field = hits[0]
+                    justification.append(criterion["justification"].format(term=term, field=field))
+
+            result = met >= flag.get("min_criteria", 1)
+            if result and not met and flag.get("otherwise"):
+                justification.append(flag["otherwise"])
+            if result and flag.get("summary"):
+                justification.append(
+                    flag["summary"].format(met=met, total=len(flag["criteria"]))
+                )
+            flags[name], justifications[name] = result, justification
+        return flags, justifications
+
+    def evaluate_many(self, intakes: Iterable[dict[str, Any]]) -> "FlagBatch":
+        """Every flag as an array expression over the (N, n_features) feature matrix"""
+        memo: dict[str, dict[str, str]] = {}  # field texts repeat across encounters
+        hits = [self.extract(intake, memo) for intake in intakes]
+        n = len(hits)
+        features = np.array(
+            [[h[name] is not None for name in self.feature_names] for h in hits], dtype=bool
+        ).reshape(n, len(self.feature_names))
+
+        flags: dict[str, np.ndarray] = {}
+        criteria: dict[str, np.ndarray] = {}
+        for name, flag in self.flags.items():
+            cols = self._criteria_cols[name]
+            met = np.zeros((n, len(cols)), dtype=bool)
+            for j, c in enumerate(cols):
+                met[:, j] = features[:, c].all(axis=1)
+            result = met.sum(axis=1) >= flag.get("min_criteria", 1)
+            required = flag.get("requires")
+            if required:
+                result &= flags[required]
+                met &= flags[required][:, None]  # unmet requirement → no criteria reported
+            flags[name], criteria[name] = result, met
+        return FlagBatch(self, hits, features, flags, criteria)
+
+
+class FlagBatch:
+    """Flags for N encounters as boolean arrays, in input order"""
+
+    def __init__(
+        self,
+        ruleset: RuleSet,
+        hits: list[dict[str, Feature]],
+        features: np.ndarray,
+        flags: dict[str, np.ndarray],
+        criteria: dict[str, np.ndarray],
+    ):
+        self.ruleset = ruleset
+        self.hits = hits
+        self.features = features  # (N, n_features), columns = ruleset.feature_names
+        self.flags = flags  # flag → (N,)
+        self.criteria = criteria  # flag → (N, n_criteria): which justifications apply
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def justification_indices(self, name: str, i: int) -> list[int]:
+        """Indices into the flag's criteria (and their justification templates)"""
+        return np.flatnonzero(self.criteria[name][i]).tolist()
+
+    def row(self, i: int) -> tuple[dict[str, bool], dict[str, list[str]]]:
+        """Encounter i in calculate_flags() form, justification strings included"""
+        return self.ruleset.evaluate(self.hits[i])
+
+    def counts(self) -> dict[str, int]:
+        return {name: int(v.sum()) for name, v in self.flags.items()}
+
+
+def _rules_path() -> Path:
+    configured = Path(settings.rules_dir) / RULES_FILE
+    return configured if configured.exists() else _REPO_RULES
 
 
 class ClinicalRuleEngine:
     """Clinical flag calculation engine with rule justification logging"""
 
-    def __init__(self):
-        self.rules = self._initialize_rules()
+    def __init__(self, rules_path: str | Path | None = None):
+        self.rules_path = Path(rules_path) if rules_path else _rules_path()
+        with open(self.rules_path, encoding="utf-8") as f:
+            self.ruleset = RuleSet(json.load(f))
+        self.rules = self.ruleset.flags
         logger.info(f"Initialized clinical rule engine with {len(self.rules)} rules")
 
-    def _initialize_rules(self) -> dict[str, ClinicalFlagRule]:
-        """Initialize clinical flag rules"""
-        return {
-            "ischemic_features": ClinicalFlagRule(
-                name="ischemic_features",
-                condition_func=self._ischemic_features_rule,
-                description="Detects signs of myocardial ischemia",
-            ),
-            "dm_followup": ClinicalFlagRule(
-                name="dm_followup",
-                condition_func=self._dm_followup_rule,
-                description="Identifies diabetes mellitus follow-up needs",
-            ),
-            "labs_a1c_needed": ClinicalFlagRule(
-                name="labs_a1c_needed",
-                condition_func=self._labs_a1c_needed_rule,
-                description="Determines if HbA1c lab is needed",
-            ),
-        }
-
-    def _ischemic_features_rule(
-        self, intake: dict[str, Any], summary: dict[str, Any], justification: list[str]
-    ) -> bool:
-        """Rule for ischemic features detection"""
-        try:
-            # Extract relevant data from intake
-            q4_worse = intake.get("Q4_Worse_with", [])
-            q5_better = intake.get("Q5_Better_with", [])
-            q2_location = intake.get("Q2_Where_is_the_pain", [])
-            q6_symptoms = intake.get("Q6_Associated_symptoms", [])
-
-            # Rule 1: Exertional chest pain relieved by rest
-            exertion_worse = any(
-                "physical activity" in str(item).lower()
-                or "exercise" in str(item).lower()
-                for item in q4_worse
-            )
-            rest_better = any(
-                "rest" in str(item).lower() or "stopping activity" in str(item).lower()
-                for item in q5_better
-            )
-
-            if exertion_worse and rest_better:
-                justification.append("Exertional chest pain relieved by rest")
-
-            # Rule 2: Left arm radiation
-            left_arm_radiation = any(
-                "left arm" in str(item).lower() for item in q2_location
-            )
-            if left_arm_radiation:
-                justification.append("Pain radiates to left arm")
-
-            # Rule 3: Diaphoresis/sweating
-            diaphoresis = any(
-                "sweating" in str(item).lower() or "diaphoresis" in str(item).lower()
-                for item in q6_symptoms
-            )
-            if diaphoresis:
-                justification.append("Associated diaphoresis/sweating")
-
-            # Rule 4: Nausea/vomiting with chest pain
-            nausea = any(
-                "nausea" in str(item).lower() or "vomiting" in str(item).lower()
-                for item in q6_symptoms
-            )
-            if nausea:
-                justification.append("Associated nausea/vomiting")
-
-            # Rule 5: Pressure/squeezing quality
-            q3_character = intake.get("Q3_Pain_character", [])
-            pressure_quality = any(
-                "pressure" in str(item).lower() or "squeezing" in str(item).lower()
-                for item in q3_character
-            )
-            if pressure_quality:
-                justification.append("Pressure/squeezing pain quality")
-
-            # Combine conditions (any 2 or more = positive)
-            conditions_met = sum(
-                [
-                    exertion_worse and rest_better,
-                    left_arm_radiation,
-                    diaphoresis,
-                    nausea,
-                    pressure_quality,
-                ]
-            )
-
-            result = conditions_met >= 2
-            if result:
-                justification.append(f"Total conditions met: {conditions_met}/5")
-
-            return result
-
-        except Exception as e:
-            logger.error(f"Ischemic features rule error: {e}")
-            justification.append(f"Rule error: {e}")
-            return False
-
-    def _dm_followup_rule(
-        self, intake: dict[str, Any], summary: dict[str, Any], justification: list[str]
-    ) -> bool:
-        """Rule for diabetes mellitus follow-up detection"""
-        try:
-            # Check for diabetes-related terms in any field
-            diabetes_terms = [
-                "diabetes",
-                "dm",
-                "diabetic",
-                "glucose",
-                "sugar",
-                "insulin",
-                "a1c",
-                "hba1c",
-            ]
-
-            # Search through all intake fields
-            for key, value in intake.items():
-                if isinstance(value, (list, tuple)):
-                    value_str = " ".join(str(item) for item in value).lower()
-                else:
-                    value_str = str(value).lower()
-
-                for term in diabetes_terms:
-                    if term in value_str:
-                        justification.append(f"Diabetes term '{term}' found in {key}")
-                        return True
-
-            return False
-
-        except Exception as e:
-            logger.error(f"DM follow-up rule error: {e}")
-            justification.append(f"Rule error: {e}")
-            return False
-
-    def _labs_a1c_needed_rule(
-        self, intake: dict[str, Any], summary: dict[str, Any], justification: list[str]
-    ) -> bool:
-        """Rule for HbA1c lab necessity"""
-        try:
-            # First check if DM follow-up is needed
-            dm_needed = self._dm_followup_rule(intake, summary, justification)
-
-            if not dm_needed:
-                justification.append("DM follow-up not needed")
-                return False
-
-            # Check for A1c-related indicators
-            a1c_terms = ["a1c", "hba1c", "hemoglobin a1c", "glycated hemoglobin"]
-            a1c_due_terms = ["due", "overdue", "needed", "check", "test", "monitor"]
-
-            for key, value in intake.items():
-                if isinstance(value, (list, tuple)):
-                    value_str = " ".join(str(item) for item in value).lower()
-                else:
-                    value_str = str(value).lower()
-
-                # Check for A1c mention
-                for term in a1c_terms:
-                    if term in value_str:
-                        justification.append(f"A1c term '{term}' found in {key}")
-                        return True
-
-                # Check for "due" indicators
-                for term in a1c_due_terms:
-                    if term in value_str and any(
-                        a1c_term in value_str for a1c_term in a1c_terms
-                    ):
-                        justification.append(f"A1c monitoring indicator '{term}' found")
-                        return True
-
-            # Default: if DM follow-up needed, A1c may be needed
-            justification.append("DM follow-up needed - A1c may be indicated")
-            return True
-
-        except Exception as e:
-            logger.error(f"A1c labs rule error: {e}")
-            justification.append(f"Rule error: {e}")
-            return False
-
     def calculate_flags(
         self, intake_data: dict[str, Any], summary_data: dict[str, Any]
     ) -> tuple[dict[str, bool], dict[str, list[str]]]:
         """Calculate all clinical flags with justifications"""
-        flags = {}
-        justifications = {}
-
         logger.info("Starting clinical flag calculation")
 
-        for rule_name, rule in self.rules.items():
-            try:
-                result, justification = rule.evaluate(intake_data, summary_data)
-                flags[rule_name] = result
-                justifications[rule_name] = justification
-
-                logger.info(f"Flag {rule_name}: {result} - {', '.join(justification)}")
+        try:
+            flags, justifications = self.ruleset.evaluate(self.ruleset.extract(intake_data))
+        except Exception as e:
+            logger.error(f"Flag calculation failed: {e}")
+            flags = dict.fromkeys(self.rules, False)
+            justifications = {name: [f"Calculation error: {e}"] for name in self.rules}
 
-            except Exception as e:
-                logger.error(f"Flag calculation failed for {rule_name}: {e}")
-                flags[rule_name] = False
-                justifications[rule_name] = [f"Calculation error: {e}"]
+        for rule_name, result in flags.items():
+            logger.info(f"Flag {rule_name}: {result} - {', '.join(justifications[rule_name])}")
 
         logger.info(f"Flag calculation completed: {flags}")
         return flags, justifications
 
+    def evaluate_many(self, intakes: Iterable[dict[str, Any]]) -> FlagBatch:
+        """
+        Flags for many encounters (cohort analytics, re-scoring after a rule
+        change). FlagBatch.row(i) gives the same result as calculate_flags().
+        """
+        batch = self.ruleset.evaluate_many(intakes)
+        logger.info(f"Bulk flag evaluation over {len(batch)} encounters: {batch.counts()}")
+        return batch
+
     def get_rule_descriptions(self) -> dict[str, str]:
         """Get descriptions of all rules"""
-        return {name: rule.description for name, rule in self.rules.items()}
+        return {name: rule["description"] for name, rule in self.rules.items()}
 
 
 # Global rule engine instance
@@ -3,18 +3,20 @@ from __future__ import annotations
 
 import json
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 
-from api.services.llm.client import chat_json
+from api.services.llm.canonical import summary_cache
+from api.services.llm.client import chat_json, chat_json_stream
 from api.services.llm.fallback import templated as fallback_summary
 from api.services.llm.gate import guard_and_redact
 from api.services.llm.negation_processor import negation_processor
 from api.services.llm.normalizer import medical_normalizer
-from api.services.llm.prompts import SYSTEM
+from api.services.llm.profiling import Trace, pipeline_profiler
+from api.services.llm.prompts import build_messages, prompt_token_report
 from api.services.llm.rule_engine import clinical_rule_engine
 from api.services.llm.schema import SUMMARY_JSON_SCHEMA
-from api.services.llm.validators import parse_and_validate as validate_out
-from api.services.llm.validators import retry_with_correction
+from api.services.llm.validators import retry_with_correction, validate_summary_dict
 
 log = logging.getLogger("llm")
 
@@ -23,97 +25,190 @@ class LLMService:
     def __init__(self, model: str = "gpt-4o-mini"):
         self.model = model
 
-    async def summary(self, intake: dict[str, Any]) -> dict[str, Any]:
-        """Structured intake(JSON) → HPI/ROS/flags JSON with hardening"""
-        log.info("Starting hardened summary generation")
+    def prepare(self, intake: dict[str, Any], trace: Trace | None = None) -> dict[str, Any]:
+        """Steps 1-4: PHI redaction, normalization, negation, message construction"""
+        trace = trace or Trace()
 
-        try:
-            # 1) PHI protection
+        # 1) PHI protection
+        with trace.span("redact"):
             safe = guard_and_redact(intake)
-            log.debug("PHI redaction completed")
+        log.debug("PHI redaction completed")
 
-            # 2) Data normalization
-            normalized_intake, normalization_log = (
-                medical_normalizer.normalize_intake_data(safe)
-            )
-            log.info(
-                f"Data normalization applied: {len(normalization_log)} fields processed"
-            )
+        # 2) Data normalization
+        with trace.span("normalize"):
+            normalized_intake, normalization_log = medical_normalizer.normalize_intake_data(safe)
+        log.info(f"Data normalization applied: {len(normalization_log)} fields processed")
 
-            # 3) Negation processing
+        # 3) Negation processing
+        with trace.span("negation"):
             processed_intake, negation_log = negation_processor.process_intake_negation(
                 normalized_intake
             )
-            log.info(f"Negation processing completed: {negation_log}")
+        log.info(f"Negation processing completed: {negation_log}")
 
-            # 4) Message construction with hardened prompts
-            sys = SYSTEM.replace(
-                "{INPUT_JSON}", json.dumps(processed_intake, ensure_ascii=False)
-            )
-            messages = [
-                {"role": "system", "content": sys},
-                {
-                    "role": "user",
-                    "content": json.dumps(processed_intake, ensure_ascii=False),
-                },
-            ]
-
-            # 5) LLM call with stabilized parameters
-            def _fallback():
-                log.warning("Using fallback summary generation")
-                return fallback_summary(intake)  # type: ignore
+        # 4) Message construction: static system prefix, intake once in the user turn
+        with trace.span("prompt"):
+            messages = build_messages(processed_intake)
+            prompt_tokens = prompt_token_report(messages)
+        log.info(
+            f"Prompt tokens (est.): system={prompt_tokens['system']} "
+            f"intake={prompt_tokens['intake']}"
+        )
+        return {
+            "messages": messages,
+            "prompt_tokens": prompt_tokens,
+            "processed_intake": processed_intake,
+            "normalization_log": normalization_log,
+            "negation_log": negation_log,
+            "trace": trace,
+        }
 
-            raw = await chat_json(
-                messages=messages,
-                model=self.model,
-                temperature=0.1,  # Low temperature for stability
-                top_p=0.9,  # Controlled randomness
-                response_schema=SUMMARY_JSON_SCHEMA,
-                timeout_s=3.5,
-                seed=42,  # Fixed seed for reproducibility
-                use_cache=True,
-                fallback_func=_fallback,
-            )
-            log.info("LLM response received")
+    def chat_kwargs(self) -> dict[str, Any]:
+        return {
+            "model": self.model,
+            "temperature": 0.1,  # Low temperature for stability
+            "top_p": 0.9,  # Controlled randomness
+            "response_schema": SUMMARY_JSON_SCHEMA,
+            "timeout_s": 3.5,
+            "seed": 42,  # Fixed seed for reproducibility
+            "use_cache": True,
+        }
+
+    def finalize(self, raw: dict[str, Any], prepared: dict[str, Any]) -> dict[str, Any]:
+        """Steps 7-8: validation/correction, rule-engine flags, audit metadata"""
+        trace = prepared["trace"]
 
-            # 6) Enhanced validation with retry logic
+        # 7) Enhanced validation with retry logic
+        with trace.span("validate"):
             try:
-                text = json.dumps(raw, ensure_ascii=False)
-                out = validate_out(text)  # SummaryOut → dict conversion
-                summary_data = out.model_dump()
+                # raw is the client's parsed dict; no json.dumps/json.loads round trip
+                summary_data = validate_summary_dict(raw).model_dump()
                 log.info("JSON validation successful")
             except Exception as e:
                 log.warning(f"Initial validation failed, attempting correction: {e}")
                 summary_data = retry_with_correction(raw)
                 log.info("JSON correction successful")
 
-            # 7) External flag calculation with rule engine
-            log.info("Starting external flag calculation")
-            calculated_flags, flag_justifications = (
-                clinical_rule_engine.calculate_flags(processed_intake, summary_data)
+        # 8) External flag calculation with rule engine
+        log.info("Starting external flag calculation")
+        with trace.span("rules"):
+            calculated_flags, flag_justifications = clinical_rule_engine.calculate_flags(
+                prepared["processed_intake"], summary_data
             )
 
-            # Update flags in summary
-            summary_data["flags"] = calculated_flags
+        # Update flags in summary
+        summary_data["flags"] = calculated_flags
+
+        # Add justification metadata for audit
+        summary_data["_metadata"] = {
+            "normalization_log": prepared["normalization_log"],
+            "negation_log": prepared["negation_log"],
+            "flag_justifications": flag_justifications,
+            "prompt_tokens": prepared["prompt_tokens"],
+            "processing_timestamp": json.dumps({"timestamp": "now"}),  # Simplified for demo
+        }
+
+        log.info(f"Summary generation completed with flags: {calculated_flags}")
+        return summary_data
+
+    async def summary(self, intake: dict[str, Any], *, debug: bool = False) -> dict[str, Any]:
+        """
+        Structured intake(JSON) → HPI/ROS/flags JSON with hardening.
+        debug=True adds the per-stage timing spans as _metadata.timings.
+        """
+        log.info("Starting hardened summary generation")
+
+        with pipeline_profiler.trace() as trace:
+            result = await self._summary(intake, trace)
+        if debug:
+            result.setdefault("_metadata", {})["timings"] = trace.to_dict()
+        return result
+
+    async def _summary(self, intake: dict[str, Any], trace: Trace) -> dict[str, Any]:
+        try:
+            prepared = self.prepare(intake, trace)
+            processed = prepared["processed_intake"]
+
+            # 5) Canonical-intake cache: near-duplicate intakes reuse the LLM output
+            with trace.span("cache_lookup"):
+                raw = summary_cache.get(processed, self.model)
+            if raw is not None:
+                log.info("Canonical summary cache hit")
+                return self.finalize(raw, prepared)
 
-            # Add justification metadata for audit
-            summary_data["_metadata"] = {
-                "normalization_log": normalization_log,
-                "negation_log": negation_log,
-                "flag_justifications": flag_justifications,
-                "processing_timestamp": json.dumps(
-                    {"timestamp": "now"}
-                ),  # Simplified for demo
-            }
+            # 6) LLM call with stabilized parameters
+            used_fallback = False
 
-            log.info(f"Summary generation completed with flags: {calculated_flags}")
-            return summary_data
+            def _fallback():
+                nonlocal used_fallback
+                used_fallback = True
+                log.warning("Using fallback summary generation")
+                return fallback_summary(intake)  # type: ignore
+
+            with trace.span("llm_call"):
+                raw = await chat_json(
+                    messages=prepared["messages"], fallback_func=_fallback, **self.chat_kwargs()
+                )
+            log.info("LLM response received")
+            if not used_fallback:
+                summary_cache.put(processed, self.model, raw)
+
+            return self.finalize(raw, prepared)
 
         except Exception as e:
             log.error(f"Summary generation failed: {e}")
             log.warning("Falling back to basic summary")
             return fallback_summary(intake)  # type: ignore
 
+    async def summary_stream(
+        self, intake: dict[str, Any], *, debug: bool = False
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Streaming summary. Yields ("field", {"field", "value"}) whenever a
+        top-level field of the partial LLM output changes, then ("final", summary)
+        with the same validated/flagged result summary() would return.
+        """
+        # spans are recorded without cProfile sampling: the generator yields mid-run
+        trace = Trace()
+        prepared = None
+        raw = None
+        sent: dict[str, Any] = {}
+        try:
+            prepared = self.prepare(intake, trace)
+            with trace.span("cache_lookup"):
+                raw = summary_cache.get(prepared["processed_intake"], self.model)
+            if raw is None:
+                with trace.span("llm_call"):
+                    async for partial, done in chat_json_stream(
+                        messages=prepared["messages"], **self.chat_kwargs()
+                    ):
+                        if done:
+                            raw = partial
+                            summary_cache.put(prepared["processed_intake"], self.model, raw)
+                            break
+                        for field, value in partial.items():
+                            if sent.get(field) != value:
+                                sent[field] = value
+                                yield "field", {"field": field, "value": value}
+        except Exception as e:
+            log.error(f"Streaming summary failed: {e}")
+
+        final = None
+        if raw is not None and prepared is not None:
+            try:
+                final = self.finalize(raw, prepared)
+            except Exception as e:
+                log.error(f"Summary finalization failed: {e}")
+        if final is None:
+            log.warning("Falling back to basic summary")
+            final = fallback_summary(intake)  # type: ignore
+
+        trace.finish()
+        pipeline_profiler.record(trace)
+        if debug:
+            final.setdefault("_metadata", {})["timings"] = trace.to_dict()
+        yield "final", final
+
     # Placeholder methods for compatibility (hackathon scope)
     async def medical_analysis(self, symptoms, patient_age, medical_history):
         # Placeholder implementation
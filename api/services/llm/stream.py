@@ -0,0 +1,203 @@
+# api/services/llm/stream.py
+"""
+Incremental parser for a JSON object arriving as a token stream.
+
+`feed()` scans each new chunk once and builds the object as it goes: every
+completed key, string, number or literal is decoded on its own and inserted
+into the container that is still open. Closed containers never change again,
+so `snapshot()` only copies the open ones (plus a string value that is still
+being written, so the HPI shows up while it's generated) and shares everything
+else with the previous snapshot. Nothing re-parses the whole buffer.
+Incomplete keys, numbers and literals are left out until they finish.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+_DELIMS = set(",:]} \t\r\n")
+_INVALID: Any = object()
+
+
+class PartialJSON:
+    def __init__(self):
+        self._chunks: list[str] = []
+        # per open container: [bracket, expecting] with expecting in
+        # "key" | "colon" | "value" | "comma"
+        self._stack: list[list[str]] = []
+        # parallel to _stack: the container being built and its pending key
+        self._values: list[dict[str, Any] | list[Any]] = []
+        self._keys: list[str | None] = []
+        self._in_str = False
+        self._esc = False
+        self._hex = 0  # \uXXXX digits still to come
+        self._str_is_key = False
+        self._in_scalar = False
+        self._tok: list[str] = []  # raw text of the current string/scalar token
+        self._started = False
+        self._root: dict[str, Any] | None = None  # set once the object closes
+        self._version = 0  # bumped whenever the snapshot would change
+        self._snap_version = -1
+        self._last: dict[str, Any] = {}
+
+    @property
+    def text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def _take_token(self, chunk: str, start: int, end: int) -> str:
+        raw = "".join(self._tok) + chunk[start:end]
+        self._tok = []
+        return raw
+
+    def _add(self, value: Any) -> None:
+        """A value finished: store it in the innermost open container"""
+        self._stack[-1][1] = "comma"
+        if value is _INVALID:
+            return
+        container = self._values[-1]
+        if isinstance(container, dict):
+            key = self._keys[-1]
+            if key is not None:
+                container[key] = value
+                self._keys[-1] = None
+        else:
+            container.append(value)
+        self._version += 1
+
+    def _end_string(self, raw: str) -> None:
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            value = _INVALID
+        if self._str_is_key:
+            self._stack[-1][1] = "colon"
+            self._keys[-1] = None if value is _INVALID else value
+        else:
+            self._add(value)
+
+    def _end_scalar(self, raw: str) -> None:
+        try:
+            self._add(json.loads(raw))
+        except json.JSONDecodeError:
+            self._add(_INVALID)
+
+    def _close(self) -> None:
+        self._stack.pop()
+        self._keys.pop()
+        value = self._values.pop()
+        if self._stack:
+            self._add(value)
+        else:
+            self._root = value  # type: ignore[assignment]
+            self._version += 1
+
+    def feed(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+        if self._root is not None:
+            return  # anything after the object is ignored
+        tok_from = 0  # start of the current token in this chunk (0: began earlier)
+        for off, ch in enumerate(chunk):
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                    if ch == "u":
+                        self._hex = 4
+                elif self._hex:
+                    self._hex -= 1
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    self._end_string(self._take_token(chunk, tok_from, off))
+                continue
+
+            if self._in_scalar:
+                if ch not in _DELIMS:
+                    continue
+                self._in_scalar = False
+                self._end_scalar(self._take_token(chunk, tok_from, off))
+
+            if ch in " \t\r\n":
+                continue
+            if not self._started:
+                if ch != "{":
+                    continue  # tolerate leading prose / code fences
+                self._started = True
+            top = self._stack[-1] if self._stack else None
+            if ch in "{[":
+                self._stack.append([ch, "key" if ch == "{" else "value"])
+                self._values.append({} if ch == "{" else [])
+                self._keys.append(None)
+                self._version += 1
+            elif ch in "}]":
+                if self._stack:
+                    self._close()
+                if self._root is not None:
+                    return
+            elif ch == '"':
+                self._in_str = True
+                self._str_is_key = top is not None and top[0] == "{" and top[1] == "key"
+                tok_from = off + 1
+            elif ch == ":":
+                if top is not None:
+                    top[1] = "value"
+            elif ch == ",":
+                if top is not None:
+                    top[1] = "key" if top[0] == "{" else "value"
+            else:
+                self._in_scalar = True
+                tok_from = off
+
+        if self._in_str or self._in_scalar:
+            self._tok.append(chunk[tok_from:])
+            if self._in_str and not self._str_is_key:
+                self._version += 1  # the partial string value grew
+
+    def _partial_string(self) -> Any:
+        raw = "".join(self._tok)
+        self._tok = [raw]
+        # hold back an escape that is still arriving ("\" or "\u12")
+        if self._esc:
+            raw = raw[:-1]
+        elif self._hex:
+            raw = raw[: -(6 - self._hex)]
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return _INVALID
+        # first half of a surrogate pair: wait for the second
+        return value[:-1] if value and "\ud800" <= value[-1] <= "\udbff" else value
+
+    def _materialize(self) -> dict[str, Any]:
+        """Copy the open containers innermost-out, each holding the next one"""
+        child = _INVALID
+        if self._in_str and not self._str_is_key:
+            child = self._partial_string()
+        for container, key in zip(reversed(self._values), reversed(self._keys), strict=True):
+            if isinstance(container, dict):
+                copy: dict[str, Any] | list[Any] = dict(container)
+                if child is not _INVALID and key is not None:
+                    copy[key] = child
+            else:
+                copy = list(container)
+                if child is not _INVALID:
+                    copy.append(child)
+            child = copy
+        return child
+
+    def snapshot(self) -> dict[str, Any]:
+        """Best-effort dict of everything parsed so far"""
+        if self._root is not None:
+            return self._root
+        if not self._started:
+            return {}
+        if self._version != self._snap_version:
+            self._snap_version = self._version
+            self._last = self._materialize()
+        return self._last
+
+    def complete(self) -> bool:
+        return self._root is not None
@@ -1,14 +1,13 @@
 # api/services/llm/tasks/summarize.py
-import json
 import logging
 
 from api.core.schemas import SummaryIn, SummaryOut
 from api.services.llm.client import chat_json
 from api.services.llm.fallback import templated
 from api.services.llm.gate import guard_and_redact
-from api.services.llm.prompts import SYSTEM
+from api.services.llm.prompts import build_messages
 from api.services.llm.schema import SUMMARY_JSON_SCHEMA
-from api.services.llm.validators import parse_and_validate
+from api.services.llm.validators import validate_summary_dict
 
 logger = logging.getLogger(__name__)
 
@@ -18,23 +17,18 @@ async def run(body: SummaryIn) -> SummaryOut:
     Generate medical summary using LLM with fallback support
     """
     try:
-        # Keep instructions in system, put raw JSON in user message
-        system_prompt = SYSTEM
+        # Keep instructions in system, put raw JSON in user message (once)
         payload = guard_and_redact(body.model_dump())
-        user_payload = json.dumps(payload, ensure_ascii=False)
 
         data = await chat_json(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_payload},
-            ],
+            messages=build_messages(payload),
             response_schema=SUMMARY_JSON_SCHEMA,
             fallback_func=lambda: templated(body),
         )
 
         # Apply validator with FORBIDDEN scrub on success path
         try:
-            return parse_and_validate(json.dumps(data))
+            return validate_summary_dict(data)
         except Exception:
             return SummaryOut.model_validate(data)
 
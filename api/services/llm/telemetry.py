@@ -0,0 +1,174 @@
+# api/services/llm/telemetry.py
+"""
+Per-call LLM telemetry.
+
+chat_json/chat_json_stream fill one record per call (see new_call()) and hand it
+to llm_telemetry.record(). Records are kept in a bounded ring for recent-call
+inspection and folded into fixed-bucket histograms and counters, so the
+aggregate view costs O(1) memory regardless of traffic.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any
+
+# latency histogram upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 3500, 5000, 10000, math.inf)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, math.inf)
+TIMING_FIELDS = ("total_ms", "queue_ms", "network_ms", "parse_ms")
+
+# USD per 1M tokens (input, output); unknown models are reported without cost
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+
+def new_call(model: str, *, stream: bool = False) -> dict[str, Any]:
+    """Empty telemetry record; callers fill it in as the call progresses"""
+    return {
+        "ts": time.time(),
+        "model": model,
+        "stream": stream,
+        "cache": "miss",  # hit | miss | bypass
+        "attempts": 0,
+        "hedged": False,
+        "fallback": False,
+        "status": "ok",  # ok | error | fallback
+        "error": None,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "queue_ms": 0.0,
+        "network_ms": 0.0,
+        "parse_ms": 0.0,
+        "total_ms": 0.0,
+    }
+
+
+def estimate_cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    price = MODEL_PRICES.get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+class _Histogram:
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.total = 0.0
+        self.n = 0
+
+    def add(self, value: float) -> None:
+        for i, b in enumerate(self.bounds):
+            if value <= b:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.n += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "buckets": {
+                ("+Inf" if math.isinf(b) else str(b)): c
+                for b, c in zip(self.bounds, self.counts, strict=True)
+            },
+            "count": self.n,
+            "mean": round(self.total / self.n, 2) if self.n else 0,
+        }
+
+
+class LLMTelemetry:
+    def __init__(self, recent: int = 500):
+        self._recent: deque[dict[str, Any]] = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.counters: dict[str, int] = {
+            "cache_hits": 0,
+            "fallbacks": 0,
+            "errors": 0,
+            "retries": 0,
+            "hedged": 0,
+            "streams": 0,
+        }
+        self.tokens = {"prompt": 0, "completion": 0}
+        self.cost_usd = 0.0
+        self.by_model: dict[str, int] = {}
+        self.latency = {f: _Histogram(LATENCY_BUCKETS_MS) for f in TIMING_FIELDS}
+        self.prompt_tokens_hist = _Histogram(TOKEN_BUCKETS)
+        self._recent.clear()
+
+    def record(self, call: dict[str, Any]) -> None:
+        with self._lock:
+            self.calls += 1
+            self._recent.append(call)
+            self.by_model[call["model"]] = self.by_model.get(call["model"], 0) + 1
+            self.counters["cache_hits"] += call["cache"] == "hit"
+            self.counters["fallbacks"] += bool(call["fallback"])
+            self.counters["errors"] += call["status"] == "error"
+            self.counters["retries"] += max(0, call["attempts"] - 1)
+            self.counters["hedged"] += bool(call["hedged"])
+            self.counters["streams"] += bool(call["stream"])
+            self.latency["total_ms"].add(call["total_ms"])
+            if call["attempts"]:
+                # provider timings only mean something when a request was sent
+                for f in ("queue_ms", "network_ms", "parse_ms"):
+                    self.latency[f].add(call[f])
+            if call["prompt_tokens"]:
+                self.tokens["prompt"] += call["prompt_tokens"]
+                self.tokens["completion"] += call["completion_tokens"]
+                self.prompt_tokens_hist.add(call["prompt_tokens"])
+                cost = estimate_cost_usd(
+                    call["model"], call["prompt_tokens"], call["completion_tokens"]
+                )
+                if cost is not None:
+                    call["cost_usd"] = cost
+                    self.cost_usd += cost
+
+    def _percentiles(self, field: str) -> dict[str, float]:
+        values = sorted(c[field] for c in self._recent if field == "total_ms" or c["attempts"])
+        if not values:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+        def _p(q: float) -> float:
+            return round(values[min(len(values) - 1, math.ceil(q * len(values)) - 1)], 2)
+
+        return {"p50": _p(0.5), "p95": _p(0.95), "p99": _p(0.99)}
+
+    def summary(self) -> dict[str, Any]:
+        """Compact view for get_client_status()"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                **self.counters,
+                "tokens": dict(self.tokens),
+                "cost_usd": round(self.cost_usd, 6),
+                "total_ms": self._percentiles("total_ms"),
+            }
+
+    def get_stats(self, recent: int = 20) -> dict[str, Any]:
+        """Full metrics: counters, percentiles over recent calls, histograms"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "counters": dict(self.counters),
+                "by_model": dict(self.by_model),
+                "tokens": dict(self.tokens),
+                "cost_usd": round(self.cost_usd, 6),
+                "percentiles_ms": {f: self._percentiles(f) for f in TIMING_FIELDS},
+                "histograms_ms": {f: h.to_dict() for f, h in self.latency.items()},
+                "prompt_tokens_histogram": self.prompt_tokens_hist.to_dict(),
+                "recent": list(self._recent)[-recent:] if recent else [],
+            }
+
+
+llm_telemetry = LLMTelemetry()
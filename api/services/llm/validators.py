@@ -4,7 +4,10 @@ import logging
 import re
 from typing import Any
 
-from api.core.schemas import SummaryOut
+from pydantic import ConfigDict, TypeAdapter, ValidationError, with_config
+from typing_extensions import TypedDict
+
+from api.core.schemas import ROSSection, SummaryOut
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -153,46 +156,111 @@ def validate_json_structure(data: dict[str, Any]) -> tuple[bool, list[str]]:
     return len(errors) == 0, errors
 
 
-def parse_and_validate(text: str) -> SummaryOut:
-    """Parse and validate LLM response with enhanced validation"""
-    try:
-        # Parse JSON
-        data = json.loads(text)
+# SUMMARY_JSON_SCHEMA as strict TypedDicts: the pydantic-core validator is built
+# once at import, works on the dict the client already parsed and never coerces
+# ("true" is not a bool), matching the isinstance checks above
+_STRICT = ConfigDict(strict=True)
+# extra ROS systems / flags pass through like they did with SummaryOut.model_validate
+_STRICT_OPEN = ConfigDict(strict=True, extra="allow")
+
+
+@with_config(_STRICT)
+class _ROSSectionDict(TypedDict):
+    positive: list[str]
+    negative: list[str]
+
+
+@with_config(_STRICT_OPEN)
+class _ROSDict(TypedDict):
+    cardiovascular: _ROSSectionDict
+    respiratory: _ROSSectionDict
+    constitutional: _ROSSectionDict
+
+
+@with_config(_STRICT_OPEN)
+class _FlagsDict(TypedDict):
+    ischemic_features: bool
+    dm_followup: bool
+    labs_a1c_needed: bool
+
+
+@with_config(_STRICT)
+class _SummaryDict(TypedDict):
+    hpi: str
+    ros: _ROSDict
+    pmh: list[str]
+    meds: list[str]
+    flags: _FlagsDict
 
-        # Structure validation
-        is_valid, errors = validate_json_structure(data)
-        if not is_valid:
-            logger.error(f"JSON structure validation failed: {errors}")
-            raise ValueError(f"Structure validation failed: {'; '.join(errors)}")
 
-        # Sanitize HPI
-        if "hpi" in data:
-            data["hpi"] = sanitize_hpi(data["hpi"])
+_summary_validator = TypeAdapter(_SummaryDict)
 
-        # Validate content constraints
-        if "hpi" in data and len(data["hpi"]) > 600:
-            logger.warning(f"HPI too long ({len(data['hpi'])} chars), truncating")
-            data["hpi"] = data["hpi"][:600]
 
-        # Create and validate Pydantic model
-        summary = SummaryOut.model_validate(data)
+class _ExtrasDict(TypedDict):
+    """Pass-through extras, with the old (lax) SummaryOut field types"""
 
-        logger.info("JSON validation successful")
-        return summary
+    ros: dict[str, ROSSection]
+    flags: dict[str, bool]
 
+
+_extras_validator = TypeAdapter(_ExtrasDict)
+
+
+def _extras(values: dict[str, Any], known: type) -> dict[str, Any]:
+    return {k: v for k, v in values.items() if k not in known.__annotations__}
+
+
+def validate_summary_dict(data: Any) -> SummaryOut:
+    """Validate an already-parsed LLM response; `data` itself is not modified"""
+    try:
+        valid = _summary_validator.validate_python(data)
+        extras = {"ros": _extras(valid["ros"], _ROSDict), "flags": _extras(valid["flags"], _FlagsDict)}
+        if extras["ros"] or extras["flags"]:
+            extras = _extras_validator.validate_python(extras)
+    except ValidationError as e:
+        # failure path only: keep the readable structure messages where they apply
+        errors = validate_json_structure(data)[1] if isinstance(data, dict) else []
+        if not errors:
+            errors = [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()]
+        logger.error(f"JSON structure validation failed: {errors}")
+        raise ValueError(f"Structure validation failed: {'; '.join(errors)}") from e
+
+    hpi = sanitize_hpi(valid["hpi"])
+    if len(hpi) > 600:
+        logger.warning(f"HPI too long ({len(hpi)} chars), truncating")
+        hpi = hpi[:600]
+
+    # every field already has the model's types, so skip a second validation pass
+    ros = {
+        name: ROSSection.model_construct(**valid["ros"][name]) for name in _ROSDict.__annotations__
+    }
+    flags = {name: valid["flags"][name] for name in _FlagsDict.__annotations__}
+    summary = SummaryOut.model_construct(
+        hpi=hpi,
+        ros={**ros, **extras["ros"]},
+        pmh=valid["pmh"],
+        meds=valid["meds"],
+        flags={**flags, **extras["flags"]},
+    )
+    logger.info("JSON validation successful")
+    return summary
+
+
+def parse_and_validate(text: str) -> SummaryOut:
+    """Parse and validate a raw LLM response string"""
+    try:
+        data = json.loads(text)
     except json.JSONDecodeError as e:
         logger.error(f"JSON parsing failed: {e}")
         raise ValueError(f"Invalid JSON: {e}")
-    except Exception as e:
-        logger.error(f"Validation failed: {e}")
-        raise ValueError(f"Validation error: {e}")
+    return validate_summary_dict(data)
 
 
 def retry_with_correction(data: dict[str, Any], max_retries: int = 2) -> SummaryOut:
     """Retry parsing with corrections"""
     for attempt in range(max_retries):
         try:
-            return parse_and_validate(json.dumps(data, ensure_ascii=False))
+            return validate_summary_dict(data)
         except Exception as e:
             logger.warning(f"Retry attempt {attempt + 1} failed: {e}")
             if attempt < max_retries - 1:
@@ -9,19 +9,21 @@ This module provides:
 """
 
 from .index import build_index
-from .retrieve import init_retriever, make_query, retrieve
+from .retrieve import init_retriever, make_query, retrieve, retrieve_async
 from .store import RAGStore
 from .summarize import to_cards
-from .types import DocChunk, EvidenceCard, Retrieval
+from .types import DocChunk, EvidenceCard, Retrieval, RetrievalResult
 
 __all__ = [
     "DocChunk",
     "EvidenceCard",
     "RAGStore",
     "Retrieval",
+    "RetrievalResult",
     "build_index",
     "init_retriever",
     "make_query",
     "retrieve",
+    "retrieve_async",
     "to_cards",
 ]
@@ -0,0 +1,416 @@
+# api/services/rag/bench.py
+"""
+RAG retrieval benchmark.
+
+Builds a synthetic corpus of configurable size from docs/-style text, runs a
+labelled query set through RAGStore.search / BM25 / the fused retrieve() path
+for each FAISS index type and fusion setting, and reports latency percentiles,
+QPS, memory and recall@k as JSON so runs can be compared across commits.
+
+Memory is reported per configuration: index_bytes is the FAISS index itself
+(native memory tracemalloc cannot see), build_peak_mb and query_peak_mb are
+the tracemalloc peaks (Python + NumPy heap) of the build and of one pass
+over the queries. The traced pass runs after the timed one, so tracing never
+skews the latency figures; --no-memory skips it.
+
+    python -m api.services.rag.bench --chunks 2000 --queries 200 --index flat hnsw ivf
+
+The default "hash" encoder is a deterministic feature-hashing embedder so the
+benchmark runs offline; pass --encoder minilm to use the production model.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import math
+import platform
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import faiss
+import numpy as np
+
+from .index import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    MODEL_NAME,
+    chunk_sentences,
+    iter_files,
+    l2_normalize,
+    read_file,
+    split_sentences,
+    title_from_path,
+)
+from .store import RAGStore
+
+# module object, not the retrieve() function the package re-exports
+_retrieve = importlib.import_module(".retrieve", __package__)
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+# name -> (w_emb, w_bm25); "retrieve" runs the production retrieve() path
+FUSIONS: dict[str, tuple[float, float] | None] = {
+    "embedding": (1.0, 0.0),
+    "bm25": (0.0, 1.0),
+    "hybrid": (0.6, 0.4),
+    "hybrid_emb_heavy": (0.8, 0.2),
+    "retrieve": None,
+}
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOP = {
+    "the", "and", "for", "with", "that", "this", "are", "was", "from", "have",
+    "not", "but", "should", "may", "can", "been", "were", "which", "their", "into",
+}  # fmt: skip
+
+
+class HashEncoder:
+    """Deterministic unigram+bigram feature-hashing encoder (offline stand-in)"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _bucket(self, tok: str) -> tuple[int, float]:
+        h = int.from_bytes(hashlib.blake2b(tok.encode(), digest_size=8).digest(), "little")
+        return h % self.dim, (1.0 if (h >> 63) & 1 else -1.0)
+
+    def encode(self, texts: list[str], *, normalize_embeddings: bool = True, **_: Any):
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            toks = _TOKEN.findall(text.lower())
+            for tok in toks + [f"{a}_{b}" for a, b in itertools.pairwise(toks)]:
+                j, sign = self._bucket(tok)
+                out[row, j] += sign
+        return l2_normalize(out) if normalize_embeddings else out
+
+
+def _load_encoder(name: str):
+    if name == "hash":
+        return HashEncoder()
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(MODEL_NAME if name == "minilm" else name)
+
+
+# ---- Corpus + labelled queries ----
+def synthetic_corpus(
+    docs_dir: str = "docs",
+    n_chunks: int = 1000,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> list[dict[str, Any]]:
+    """
+    Chunk docs/ the same way build_index() does, then pad to n_chunks with
+    perturbed copies (sentence order shuffled, one sentence dropped).
+    """
+    rng = random.Random(seed)
+    base: list[dict[str, Any]] = []
+    for f in iter_files(Path(docs_dir)):
+        for ci, (txt, start, end) in enumerate(
+            chunk_sentences(split_sentences(read_file(f)), chunk_size, overlap)
+        ):
+            base.append(
+                {
+                    "id": f"{f.stem}__{ci:04d}",
+                    "title": title_from_path(f),
+                    "source": title_from_path(f),
+                    "text": txt,
+                    "file": f.name,
+                    "start": start,
+                    "end": end,
+                    "url": None,
+                    "year": None,
+                    "section": None,
+                    "tags_json": {"type": "synthetic"},
+                }
+            )
+    if not base:
+        raise RuntimeError(f"No documents found under {docs_dir} (expected .txt/.md)")
+
+    corpus = base[:n_chunks]
+    rep = 0
+    while len(corpus) < n_chunks:
+        src = base[rep % len(base)]
+        sents = split_sentences(src["text"])
+        rng.shuffle(sents)
+        if len(sents) > 2:
+            sents.pop(rng.randrange(len(sents)))
+        corpus.append({**src, "id": f"{src['id']}__r{rep:05d}", "text": " ".join(sents)})
+        rep += 1
+    return corpus
+
+
+def labelled_queries(
+    corpus: list[dict[str, Any]], n_queries: int = 100, seed: int = 0
+) -> list[dict[str, Any]]:
+    """
+    Queries are 4-8 content words sampled from one sentence of a random chunk;
+    every chunk containing that sentence verbatim counts as relevant.
+    """
+    rng = random.Random(seed + 1)
+    queries: list[dict[str, Any]] = []
+    attempts = 0
+    while len(queries) < n_queries and attempts < n_queries * 20:
+        attempts += 1
+        chunk = rng.choice(corpus)
+        sents = [s for s in split_sentences(chunk["text"]) if len(s) > 40]
+        if not sents:
+            continue
+        sent = rng.choice(sents)
+        words = [w for w in _TOKEN.findall(sent.lower()) if len(w) > 2 and w not in _STOP]
+        if len(words) < 4:
+            continue
+        start = rng.randrange(0, max(1, len(words) - 4))
+        text = " ".join(words[start : start + rng.randint(4, 8)])
+        relevant = {c["id"] for c in corpus if sent in c["text"]}
+        queries.append({"query": text, "relevant": relevant})
+    return queries
+
+
+# ---- Index construction ----
+def _build_faiss(kind: str, emb: np.ndarray, nprobe: int) -> faiss.Index:
+    d = emb.shape[1]
+    if kind == "flat":
+        index = faiss.IndexFlatIP(d)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(d, 32, faiss.METRIC_INNER_PRODUCT)
+    elif kind == "ivf":
+        nlist = max(1, min(int(math.sqrt(len(emb))), len(emb) // 39 or 1))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(d), d, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(emb)
+        index.nprobe = min(nprobe, nlist)
+    else:
+        raise ValueError(f"Unknown index type: {kind}")
+    index.add(emb)
+    return index
+
+
+def _percentiles(lat_ms: list[float]) -> dict[str, float]:
+    arr = np.asarray(lat_ms or [0.0])
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+    }
+
+
+def _recall_at_k(ids: list[str], relevant: set[str], k: int) -> float:
+    # denominator capped at k: replicas can make |relevant| > k
+    if not relevant:
+        return 0.0
+    return len(set(ids[:k]) & relevant) / min(len(relevant), k)
+
+
+def _run_fusion(
+    name: str, queries: list[dict[str, Any]], store: RAGStore, k: int
+) -> dict[str, Any]:
+    weights = FUSIONS[name]
+    fetch_k = _retrieve.fetch_k(k)
+    lat: list[float] = []
+    recalls: list[float] = []
+    t_start = time.perf_counter()
+    for q in queries:
+        t0 = time.perf_counter()
+        if weights is None:
+            rets = _retrieve.retrieve({"cc": q["query"]}, k=k)
+            ids = [r["chunk"]["id"] for r in rets]
+        else:
+            w_emb, w_bm25 = weights
+            emb = _retrieve.embedding_hits(q["query"], fetch_k) if w_emb else []
+            bm = _retrieve.bm25_hits(q["query"], fetch_k) if w_bm25 else []
+            if emb and bm:
+                merged = _retrieve.merge_scores(emb, bm, w_emb=w_emb, w_bm25=w_bm25)
+            else:
+                merged = emb or bm
+            ids = [store.get_meta(i)["id"] for i, _ in merged[:k]]
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        recalls.append(_recall_at_k(ids, q["relevant"], k))
+    wall = time.perf_counter() - t_start
+    return {
+        **_percentiles(lat),
+        "qps": round(len(queries) / wall, 2) if wall > 0 else 0.0,
+        f"recall@{k}": round(float(np.mean(recalls or [0.0])), 4),
+    }
+
+
+@contextmanager
+def _traced_peak() -> Iterator[dict[str, float]]:
+    """Peak heap (tracemalloc) allocated inside the block, in MB, as out["peak_mb"]"""
+    out: dict[str, float] = {}
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    try:
+        yield out
+    finally:
+        peak = tracemalloc.get_traced_memory()[1]
+        if not was_tracing:
+            tracemalloc.stop()
+        out["peak_mb"] = round(max(0, peak - base) / 2**20, 3)
+
+
+def _git_commit() -> str:
+    git = shutil.which("git")
+    if git is None:
+        return "unknown"
+    try:
+        return subprocess.run(  # noqa: S603 - fixed git invocation, no user input
+            [git, "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=5,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_benchmark(
+    *,
+    docs_dir: str = "docs",
+    n_chunks: int = 1000,
+    n_queries: int = 100,
+    k: int = 4,
+    index_types: list[str] | tuple[str, ...] = INDEX_TYPES,
+    fusions: list[str] | tuple[str, ...] = tuple(FUSIONS),
+    encoder: str = "hash",
+    nprobe: int = 8,
+    seed: int = 0,
+    memory: bool = True,
+) -> dict[str, Any]:
+    """Run the full matrix and return a machine-readable result dict"""
+    corpus = synthetic_corpus(docs_dir, n_chunks=n_chunks, seed=seed)
+    queries = labelled_queries(corpus, n_queries=n_queries, seed=seed)
+    enc = _load_encoder(encoder)
+    texts = [c["text"] for c in corpus]
+
+    t0 = time.perf_counter()
+    emb = np.asarray(enc.encode(texts, normalize_embeddings=True), dtype="float32")
+    encode_s = time.perf_counter() - t0
+    logger.info(f"Encoded {len(texts)} chunks in {encode_s:.2f}s; {len(queries)} queries")
+
+    results: list[dict[str, Any]] = []
+    for kind in index_types:
+        with tempfile.TemporaryDirectory(prefix="rag_bench_") as tmp:
+            # the build is FAISS native code, so tracing it costs next to nothing
+            with _traced_peak() as build_mem:
+                t0 = time.perf_counter()
+                index = _build_faiss(kind, emb, nprobe)
+                build_s = time.perf_counter() - t0
+                faiss.write_index(index, str(Path(tmp) / "index.faiss"))
+                (Path(tmp) / "meta.json").write_text(json.dumps(corpus), encoding="utf-8")
+                store = RAGStore(tmp)
+            del index
+            if kind == "ivf":
+                faiss.ParameterSpace().set_index_parameter(store.index, "nprobe", nprobe)
+            index_bytes = int(faiss.serialize_index(store.index).nbytes)
+
+            with _retrieve.use_backend(store, enc, store.get_corpus_texts()):
+                for fusion in fusions:
+                    row = _run_fusion(fusion, queries, store, k)
+                    row.update(
+                        {
+                            "index": kind,
+                            "fusion": fusion,
+                            "build_s": round(build_s, 3),
+                            "index_bytes": index_bytes,
+                            "build_peak_mb": build_mem["peak_mb"],
+                        }
+                    )
+                    if memory:
+                        with _traced_peak() as query_mem:
+                            _run_fusion(fusion, queries, store, k)
+                        row["query_peak_mb"] = query_mem["peak_mb"]
+                    results.append(row)
+                    logger.info(f"{kind}/{fusion}: {row}")
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "docs_dir": docs_dir,
+            "chunks": len(corpus),
+            "queries": len(queries),
+            "k": k,
+            "encoder": encoder,
+            "nprobe": nprobe,
+            "seed": seed,
+            "memory": memory,
+        },
+        "env": {
+            "python": platform.python_version(),
+            "faiss": getattr(faiss, "__version__", "unknown"),
+            "machine": platform.machine(),
+        },
+        "encode_s": round(encode_s, 3),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    ap = argparse.ArgumentParser(description="RAG retrieval benchmark")
+    ap.add_argument("--docs", default="docs")
+    ap.add_argument("--chunks", type=int, default=1000)
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("-k", type=int, default=4)
+    ap.add_argument("--index", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    ap.add_argument("--fusion", nargs="+", default=list(FUSIONS), choices=list(FUSIONS))
+    ap.add_argument("--encoder", default="hash", help="hash | minilm | <model name>")
+    ap.add_argument("--nprobe", type=int, default=8)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument(
+        "--no-memory", dest="memory", action="store_false", help="skip the traced memory pass"
+    )
+    ap.add_argument("--out", default=None, help="JSON output path")
+    args = ap.parse_args(argv)
+
+    report = run_benchmark(
+        docs_dir=args.docs,
+        n_chunks=args.chunks,
+        n_queries=args.queries,
+        k=args.k,
+        index_types=args.index,
+        fusions=args.fusion,
+        encoder=args.encoder,
+        nprobe=args.nprobe,
+        seed=args.seed,
+        memory=args.memory,
+    )
+    out = Path(
+        args.out or f"reports/bench/rag_{report['commit']}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for row in report["results"]:
+        print(
+            f"{row['index']:>5} {row['fusion']:>17}  p50={row['p50_ms']:.2f}ms "
+            f"p95={row['p95_ms']:.2f}ms p99={row['p99_ms']:.2f}ms qps={row['qps']:.0f} "
+            f"recall@{args.k}={row[f'recall@{args.k}']:.3f}"
+        )
+    print(f"Results written to {out}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
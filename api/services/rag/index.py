@@ -42,13 +42,16 @@ class DocChunk:
     tags_json: dict[str, Any] | None = None
 
 
-def _iter_files(docs_dir: Path) -> Iterable[Path]:
+# ---- Build stages: build_index() runs these in order; bench.py reuses them ----
+def iter_files(docs_dir: Path) -> Iterable[Path]:
+    """Indexable documents (.txt/.md) under docs_dir, in a stable order"""
     for p in sorted(docs_dir.rglob("*")):
         if p.is_file() and p.suffix.lower() in VALID_EXTS:
             yield p
 
 
-def _read_file(path: Path) -> str:
+def read_file(path: Path) -> str:
+    """Document text, tolerant of encoding errors"""
     try:
         return path.read_text(encoding="utf-8", errors="ignore")
     except Exception:
@@ -56,7 +59,7 @@ def _read_file(path: Path) -> str:
         return path.read_text(encoding="latin-1", errors="ignore")
 
 
-def _sentences(text: str) -> list[str]:
+def split_sentences(text: str) -> list[str]:
     # light-weight sentence split; keeps punctuation
     text = re.sub(r"\r\n?", "\n", text).strip()
     if not text:
@@ -64,7 +67,7 @@ def _sentences(text: str) -> list[str]:
     return [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
 
 
-def _chunk_sentences(
+def chunk_sentences(
     sents: list[str],
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     overlap: int = DEFAULT_CHUNK_OVERLAP,
@@ -118,12 +121,14 @@ def _chunk_sentences(
     return chunks
 
 
-def _normalize(vecs: np.ndarray) -> np.ndarray:
+def l2_normalize(vecs: np.ndarray) -> np.ndarray:
+    """Unit-length rows, so inner product == cosine similarity"""
     norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
     return vecs / norms
 
 
-def _title_from_path(p: Path) -> str:
+def title_from_path(p: Path) -> str:
+    """Display title for a document, e.g. chest_pain-guideline.md -> Chest Pain Guideline"""
     return p.stem.replace("_", " ").replace("-", " ").strip().title()
 
 
@@ -148,7 +153,7 @@ def build_index(
     out_path = Path(out_dir)
     out_path.mkdir(parents=True, exist_ok=True)
 
-    files = list(_iter_files(docs_path))
+    files = list(iter_files(docs_path))
     if max_docs is not None:
         files = files[:max_docs]
 
@@ -165,10 +170,10 @@ def build_index(
 
     for fi, f in enumerate(files):
         logger.info(f"Processing file {fi + 1}/{len(files)}: {f.name}")
-        raw = _read_file(f)
-        sents = _sentences(raw)
-        chs = _chunk_sentences(sents, chunk_size=chunk_size, overlap=overlap)
-        title = _title_from_path(f)
+        raw = read_file(f)
+        sents = split_sentences(raw)
+        chs = chunk_sentences(sents, chunk_size=chunk_size, overlap=overlap)
+        title = title_from_path(f)
         source = title  # simple source label
         logger.debug(f"File {f.name}: {len(chs)} chunks created")
 
@@ -214,7 +219,7 @@ def build_index(
     # Embeddings
     embeddings = model.encode(all_texts, batch_size=64, show_progress_bar=True)
     embeddings = np.asarray(embeddings).astype("float32")
-    embeddings = _normalize(embeddings)
+    embeddings = l2_normalize(embeddings)
 
     d = embeddings.shape[1]
     logger.info(f"Embedding dimension: {d}")
@@ -0,0 +1,195 @@
+# api/services/rag/precompute.py
+"""
+Precomputed evidence cards.
+
+The /evidence query is driven almost entirely by summary flags and a handful of
+codes, so the query space is tiny. warm() runs full retrieval once for every
+flag combination x common code set and stores the ranked cards keyed by the
+expanded query they produce; lookups then become a dict hit and RAG only runs
+for misses (free-text cc/HPI, unusual code sets).
+"""
+
+from __future__ import annotations
+
+import copy
+import csv
+import importlib
+import itertools
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .summarize import to_cards
+
+# module object, not the retrieve() function the package re-exports
+_retrieve = importlib.import_module(".retrieve", __package__)
+
+logger = logging.getLogger(__name__)
+
+RAG_PRECOMPUTE = os.getenv("RAG_PRECOMPUTE", "true").lower() in ("1", "true", "yes")
+# number of ICD and CPT codes (by rule weight / frequency) to precompute for
+RAG_PRECOMPUTE_CODES = int(os.getenv("RAG_PRECOMPUTE_CODES", "4"))
+
+FLAG_NAMES = ("ischemic_features", "dm_followup", "labs_a1c_needed")
+RULES_DIR = Path(__file__).parent.parent.parent.parent / "data" / "rules"
+
+CardKey = tuple[str, str, tuple[str, ...], int]
+
+
+def card_keywords(summary: dict[str, Any]) -> list[str]:
+    """Keywords used for snippet highlighting (flag names + leading codes/labels)"""
+    flags = list((summary.get("flags") or {}).keys())
+    codes = summary.get("codes") or {}
+    return (
+        flags
+        + (codes.get("icd") or [])[:3]
+        + (codes.get("cpt") or [])[:3]
+        + (codes.get("labels") or [])[:5]
+    )
+
+
+def _default_code_sets(limit: int = RAG_PRECOMPUTE_CODES) -> list[dict[str, list[str]]]:
+    """
+    Code sets to warm: no codes, then the top ICD codes (by rule weight) and the
+    most frequently triggered CPT codes from data/rules, each on its own.
+    """
+    sets: list[dict[str, list[str]]] = [{}]
+    try:
+        icd_weight: dict[str, float] = {}
+        with open(RULES_DIR / "symptom_icd.csv", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                code = (r.get("icd_code") or "").strip()
+                if code:
+                    w = float(r.get("weight") or 0)
+                    icd_weight[code] = max(w, icd_weight.get(code, 0.0))
+        for code, _ in sorted(icd_weight.items(), key=lambda x: x[1], reverse=True)[:limit]:
+            sets.append({"icd": [code]})
+
+        cpt_count: dict[str, int] = {}
+        with open(RULES_DIR / "trigger_cpt.csv", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                code = (r.get("cpt") or "").strip()
+                if code:
+                    cpt_count[code] = cpt_count.get(code, 0) + 1
+        for code, _ in sorted(cpt_count.items(), key=lambda x: x[1], reverse=True)[:limit]:
+            sets.append({"cpt": [code]})
+    except Exception as e:
+        logger.warning(f"Could not derive code sets from rules: {e!s}")
+    return sets
+
+
+class PrecomputedCards:
+    """Ranked evidence cards keyed by the expanded query they were retrieved for"""
+
+    def __init__(self):
+        self._cards: dict[CardKey, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._warming = False
+        self.hits = 0
+        self.misses = 0
+        self.built_at: float | None = None
+        self.build_s: float | None = None
+
+    @staticmethod
+    def key(summary: dict[str, Any], max_cards: int) -> CardKey:
+        # make_query output fully determines retrieval; keywords determine highlighting
+        q = _retrieve.make_query(summary)
+        return (q["embed"], q["bm25"], tuple(card_keywords(summary)), max_cards)
+
+    def get(self, summary: dict[str, Any], max_cards: int = 2) -> list[dict] | None:
+        """Return a copy of the precomputed cards, or None on a miss"""
+        if not self._cards:
+            return None
+        try:
+            cards = self._cards.get(self.key(summary, max_cards))
+        except Exception:
+            cards = None
+        if cards is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # callers re-rank/annotate cards in place
+        return copy.deepcopy(cards)
+
+    def warm(
+        self,
+        code_sets: list[dict[str, list[str]]] | None = None,
+        max_cards: int = 2,
+        k: int = 8,
+    ) -> dict[str, Any]:
+        """Retrieve and store cards for every flag combination x code set"""
+        if not _retrieve.USE_RAG:
+            return {"entries": 0, "skipped": "rag disabled"}
+
+        code_sets = _default_code_sets() if code_sets is None else code_sets
+        t0 = time.perf_counter()
+        built: dict[CardKey, list[dict[str, Any]]] = {}
+        for values in itertools.product((False, True), repeat=len(FLAG_NAMES)):
+            for codes in code_sets:
+                summary = {"flags": dict(zip(FLAG_NAMES, values, strict=True))}
+                if codes:
+                    summary["codes"] = codes
+                key = self.key(summary, max_cards)
+                if key in built:
+                    # flags that don't change the query (e.g. labs_a1c_needed)
+                    continue
+                rets = _retrieve.retrieve(summary, k=k)
+                if not rets:
+                    # retrieval failed → leave it to the live path
+                    continue
+                built[key] = to_cards(rets, max_cards=max_cards, keywords=list(key[2]))
+
+        with self._lock:
+            self._cards = built
+            self.built_at = time.time()
+            self.build_s = round(time.perf_counter() - t0, 3)
+        logger.info(
+            f"Precomputed {len(built)} evidence card sets in {self.build_s}s "
+            f"({len(code_sets)} code sets)"
+        )
+        return {"entries": len(built), "build_s": self.build_s}
+
+    def clear(self):
+        with self._lock:
+            self._cards = {}
+            self.built_at = None
+
+    def get_stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cards),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0,
+            "built_at": self.built_at,
+            "build_s": self.build_s,
+            "warming": self._warming,
+        }
+
+    def schedule_warmup(self) -> bool:
+        """Warm in a daemon thread (startup / after index reload); no-op if running"""
+        if not (RAG_PRECOMPUTE and _retrieve.USE_RAG):
+            return False
+        with self._lock:
+            if self._warming:
+                return False
+            self._warming = True
+
+        def _run():
+            try:
+                if _retrieve.get_store() is None:
+                    _retrieve.init_retriever()
+                self.warm()
+            except Exception as e:
+                logger.warning(f"Evidence warm-up failed → live RAG only: {e!s}")
+            finally:
+                self._warming = False
+
+        threading.Thread(target=_run, name="evidence-warmup", daemon=True).start()
+        return True
+
+
+precomputed_cards = PrecomputedCards()
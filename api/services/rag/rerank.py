@@ -0,0 +1,164 @@
+# api/services/rag/rerank.py
+"""
+Optional CPU cross-encoder re-ranking over the fused top-N candidates.
+
+Only the first `max_candidates` fused hits are scored (strict budget), pairs are
+scored in batches, and scores are cached in an LRU keyed on (query plan, chunk
+id) so repeated flag-driven queries never re-score the same chunk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+RAG_RERANK = os.getenv("RAG_RERANK", "false").lower() in ("1", "true", "yes")
+RAG_RERANK_MODEL = os.getenv("RAG_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RAG_RERANK_CANDIDATES = int(os.getenv("RAG_RERANK_CANDIDATES", "12"))
+RAG_RERANK_BATCH = int(os.getenv("RAG_RERANK_BATCH", "16"))
+RAG_RERANK_CACHE_SIZE = int(os.getenv("RAG_RERANK_CACHE_SIZE", "4096"))
+
+Scorer = Callable[[list[tuple[str, str]]], list[float]]
+
+
+def _sigmoid(x: float) -> float:
+    # keep card scores in [0, 1] like the fused scores they replace
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+
+class Reranker:
+    """Cross-encoder re-ranker with candidate budget, batching and an LRU score cache"""
+
+    def __init__(
+        self,
+        model_name: str = RAG_RERANK_MODEL,
+        max_candidates: int = RAG_RERANK_CANDIDATES,
+        batch_size: int = RAG_RERANK_BATCH,
+        cache_size: int = RAG_RERANK_CACHE_SIZE,
+        scorer: Scorer | None = None,
+    ):
+        self.model_name = model_name
+        self.max_candidates = max_candidates
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._scorer = scorer
+        self._cache: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    def _get_scorer(self) -> Scorer:
+        if self._scorer is None:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(self.model_name, device="cpu")
+            logger.info(f"Loaded re-ranker model: {self.model_name}")
+
+            def _predict(pairs: list[tuple[str, str]]) -> list[float]:
+                return [float(s) for s in model.predict(pairs, batch_size=self.batch_size)]
+
+            self._scorer = _predict
+        return self._scorer
+
+    @staticmethod
+    def plan_key(query: str) -> str:
+        return hashlib.sha1(query.encode(), usedforsecurity=False).hexdigest()
+
+    def _cache_get(self, key: tuple[str, str]) -> float | None:
+        with self._lock:
+            score = self._cache.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def _cache_put(self, key: tuple[str, str], score: float):
+        with self._lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(
+        self,
+        query: str,
+        candidates: list[tuple[int, float]],
+        get_meta: Callable[[int], dict[str, Any]],
+        k: int,
+    ) -> list[tuple[int, float]]:
+        """
+        candidates: fused [(idx, score)] in descending order.
+        Returns top-k [(idx, score)]: the first max_candidates re-scored by the
+        cross-encoder, then any candidates beyond the budget in fused order, so
+        k results come back whenever k exist. Tail scores are scaled below the
+        lowest re-ranked score so a later sort by score keeps them last.
+        """
+        budget = candidates[: self.max_candidates]
+        if not budget:
+            return []
+
+        plan = self.plan_key(query)
+        scores: dict[int, float] = {}
+        pending: list[tuple[int, tuple[str, str], str]] = []
+        for idx, _ in budget:
+            meta = get_meta(idx)
+            key = (plan, str(meta.get("id") or idx))
+            cached = self._cache_get(key)
+            if cached is not None:
+                scores[idx] = cached
+            else:
+                pending.append((idx, key, meta.get("text") or ""))
+
+        if pending:
+            scorer = self._get_scorer()
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start : start + self.batch_size]
+                raw = scorer([(query, text) for _, _, text in batch])
+                self.batches += 1
+                for (idx, key, _), s in zip(batch, raw, strict=True):
+                    scores[idx] = _sigmoid(float(s))
+                    self._cache_put(key, scores[idx])
+
+        ranked = sorted(((i, scores[i]) for i, _ in budget), key=lambda x: x[1], reverse=True)
+        tail = candidates[self.max_candidates : k]
+        if tail:
+            floor = ranked[-1][1]
+            top = max(s for _, s in tail)
+            tail = [(i, floor * s / (top + 1.0)) for i, s in tail]
+        return (ranked + tail)[:k]
+
+    def get_stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": RAG_RERANK,
+            "model": self.model_name,
+            "max_candidates": self.max_candidates,
+            "batch_size": self.batch_size,
+            "cache_size": len(self._cache),
+            "cache_max_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0,
+            "batches": self.batches,
+        }
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+reranker = Reranker()
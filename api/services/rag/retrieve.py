@@ -1,21 +1,30 @@
 # api/services/rag/retrieve.py
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import logging
 import os
 import re
+import time
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Any
 
 from sentence_transformers import SentenceTransformer
 
+# Import settings to use consistent RAG flag
+from api.core.config import settings
+
 from .query_expand import (
     bm25_or_clause,
     boost_key_terms,
     expand_query_text,
     load_synonyms,
 )
-from .types import Retrieval
+from .rerank import RAG_RERANK, reranker
+from .store import RAGStore
+from .types import Retrieval, RetrievalResult
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -25,14 +34,20 @@ try:
 except Exception:  # pragma: no cover
     BM25Okapi = None  # type: ignore
 
-# Import settings to use consistent RAG flag
-from api.core.config import settings  # noqa: E402
-from .store import RAGStore  # noqa: E402
-
 USE_RAG = bool(getattr(settings, "enable_rag", False))
 RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", "rag_index")
 RAG_TOPK = int(os.getenv("RAG_TOPK", "4"))
 
+# Per-stage deadlines for retrieve_async (milliseconds)
+RAG_EMBED_DEADLINE_MS = int(os.getenv("RAG_EMBED_DEADLINE_MS", "450"))
+RAG_BM25_DEADLINE_MS = int(os.getenv("RAG_BM25_DEADLINE_MS", "250"))
+RAG_INIT_DEADLINE_MS = int(os.getenv("RAG_INIT_DEADLINE_MS", "2000"))
+RAG_RERANK_DEADLINE_MS = int(os.getenv("RAG_RERANK_DEADLINE_MS", "300"))
+
+# Candidates pulled from each retriever before fusion (0 → max(8, 2k)).
+# With the re-ranker on, a smaller ANN fetch is usually enough.
+RAG_FETCH_K = int(os.getenv("RAG_FETCH_K", "0"))
+
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 # Load synonyms for query expansion
@@ -89,6 +104,28 @@ def init_retriever() -> bool:
     return True
 
 
+def get_store() -> RAGStore | None:
+    """The loaded store, or None until init_retriever() has run"""
+    return _store
+
+
+@contextlib.contextmanager
+def use_backend(store: RAGStore, model: Any, corpus_texts: list[str]) -> Iterator[None]:
+    """
+    Serve retrieval from `store`/`model` (anything with SentenceTransformer's
+    encode()) with BM25 over `corpus_texts`, then restore the previous state.
+    Used by the benchmark to run the production stages on a synthetic index.
+    """
+    global USE_RAG, _store, _model, _bm25, _tokenized
+    saved = (USE_RAG, _store, _model, _bm25, _tokenized)
+    try:
+        USE_RAG, _store, _model, _bm25, _tokenized = True, store, model, None, None
+        _maybe_init_bm25(corpus_texts)
+        yield
+    finally:
+        USE_RAG, _store, _model, _bm25, _tokenized = saved
+
+
 def make_query(summary: dict[str, Any]) -> dict[str, str]:
     """create expanded query from flags + codes/labels + HPI/ROS (domain-tagged)"""
     parts: list[str] = []
@@ -157,7 +194,7 @@ def _minmax_norm(scores: list[float]) -> list[float]:
     return [(s - lo) / (hi - lo) for s in scores]
 
 
-def _merge_scores(
+def merge_scores(
     emb_results: list[tuple[int, float]],
     bm25_results: list[tuple[int, float]],
     w_emb: float = 0.6,
@@ -188,6 +225,65 @@ def _merge_scores(
     return merged
 
 
+def fetch_k(k: int) -> int:
+    """Candidate count pulled from each retriever before fusion"""
+    if RAG_FETCH_K > 0:
+        return max(k, RAG_FETCH_K)
+    return max(8, k * 2)
+
+
+def embedding_hits(embed_query: str, top_k: int) -> list[tuple[int, float]]:
+    """Encode the expanded query and run the FAISS ANN search"""
+    if _store is None:
+        return []
+    q_emb = _get_model().encode([embed_query], normalize_embeddings=True)
+    return _store.search(q_emb, top_k=top_k)  # [(idx, score)]
+
+
+def bm25_hits(bm25_query: str, top_k: int) -> list[tuple[int, float]]:
+    """Score the expanded BM25 query against the whole corpus and keep top-n"""
+    if _bm25 is None or _tokenized is None:
+        return []
+    q_tokens = _tokenize(bm25_query)
+    # BM25 scores are generated for all documents → take top n
+    scores = _bm25.get_scores(q_tokens)  # type: ignore[union-attr]
+    return sorted(list(enumerate(scores)), key=lambda x: x[1], reverse=True)[:top_k]
+
+
+def _fuse(
+    emb_hits: list[tuple[int, float]], bm_hits: list[tuple[int, float]]
+) -> list[tuple[int, float]]:
+    """Rerank with empty result guards"""
+    if emb_hits and bm_hits:
+        # both available - merge scores
+        return merge_scores(emb_hits, bm_hits, w_emb=0.6, w_bm25=0.4)
+    if emb_hits:
+        # only embedding results available
+        idxs = [i for i, _ in emb_hits]
+        norm = _minmax_norm([s for _, s in emb_hits])
+        return list(zip(idxs, norm, strict=False))
+    # only BM25 results available (or nothing)
+    return list(bm_hits)
+
+
+def _rerank(query: str, merged: list[tuple[int, float]], k: int) -> list[tuple[int, float]]:
+    """Cross-encoder re-rank of the fused top-N (candidate budget applies)"""
+    if _store is None or not merged:
+        return merged
+    return reranker.rerank(query, merged, _store.get_meta, k)
+
+
+def _materialize(merged: list[tuple[int, float]], k: int) -> list[Retrieval]:
+    """Top-k meta combination"""
+    results: list[Retrieval] = []
+    if _store is None:
+        return results
+    for idx, score in merged[:k]:
+        meta = _store.get_meta(idx)  # {'id','title','source','text','file',...}
+        results.append({"chunk": meta, "score": float(round(score, 4))})  # type: ignore
+    return results
+
+
 def retrieve(summary: dict[str, Any], k: int = RAG_TOPK) -> list[Retrieval]:
     """
     hybrid search: embedding(required) + BM25(optional) → weighted rerank → top-k
@@ -211,59 +307,155 @@ def retrieve(summary: dict[str, Any], k: int = RAG_TOPK) -> list[Retrieval]:
     try:
         # 1) Generate expanded queries
         query_dict = make_query(summary)
-        embed_query = query_dict["embed"]
-        bm25_query = query_dict["bm25"]
-
         logger.debug(f"Base query: {query_dict['base']}")
-        logger.debug(f"Embed query: {embed_query}")
-        logger.debug(f"BM25 query: {bm25_query}")
+        logger.debug(f"Embed query: {query_dict['embed']}")
+        logger.debug(f"BM25 query: {query_dict['bm25']}")
 
         # 2) embedding ANN with expanded query
-        q_emb = _get_model().encode([embed_query], normalize_embeddings=True)
-        emb_hits: list[tuple[int, float]] = _store.search(
-            q_emb,
-            top_k=max(8, k * 2),
-        )  # [(idx, score)]
+        emb_hits = embedding_hits(query_dict["embed"], fetch_k(k))
         logger.info(f"Embedding search returned {len(emb_hits)} hits")
 
         # 3) BM25 with expanded query (optional)
-        bm_hits: list[tuple[int, float]] = []
-        if _bm25 is not None and _tokenized is not None:
-            # Use expanded BM25 query for better keyword matching
-            q_tokens = _tokenize(bm25_query)  # use expanded query
-            # BM25 scores are generated for all documents → take top n
-            scores = _bm25.get_scores(q_tokens)  # type: ignore[union-attr]
-            bm_hits = sorted(list(enumerate(scores)), key=lambda x: x[1], reverse=True)[
-                : max(8, k * 2)
-            ]
-
-        # 3) rerank with empty result guards
-        if emb_hits and bm_hits:
-            # both available - merge scores
-            merged = _merge_scores(emb_hits, bm_hits, w_emb=0.6, w_bm25=0.4)
-        elif emb_hits:
-            # only embedding results available
-            idxs = [i for i, _ in emb_hits]
-            norm = _minmax_norm([s for _, s in emb_hits])
-            merged = list(zip(idxs, norm, strict=False))
-        elif bm_hits:
-            # only BM25 results available - fallback
-            merged = bm_hits
-        else:
-            # no results from either method
-            return []
+        bm_hits = bm25_hits(query_dict["bm25"], fetch_k(k))
 
-        # 4) Top-k meta combination
-        top = merged[:k]
-        results: list[Retrieval] = []
-        for idx, score in top:
-            meta = _store.get_meta(
-                idx,
-            )  # {'id','title','source','text','file','start','end','url',...}
-            # Retrieval type: {"chunk": meta, "score": float}
-            results.append({"chunk": meta, "score": float(round(score, 4))})  # type: ignore
-        return results
+        # 4) rerank + top-k meta combination
+        merged = _fuse(emb_hits, bm_hits)
+        if RAG_RERANK:
+            try:
+                merged = _rerank(query_dict["base"], merged, k)
+            except Exception as e:
+                logger.warning(f"Re-ranking failed → fused order: {e!s}")
+        return _materialize(merged, k)
 
     except Exception:
         # fallback to empty results on any error
         return []
+
+
+# ---- Async pipeline with per-stage deadlines ----
+async def _run_stage(
+    name: str, fn: Any, *args: Any, deadline_ms: int
+) -> tuple[Any, str, float]:
+    """
+    Run a blocking retrieval stage in the default executor under its own deadline.
+    Returns (hits, status, elapsed_ms) with status in {"ok", "timeout", "error"}.
+
+    Note: a timed-out stage is abandoned, not interrupted — the worker thread
+    finishes in the background and its result is dropped.
+    """
+    t0 = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        hits = await asyncio.wait_for(
+            loop.run_in_executor(None, fn, *args), timeout=deadline_ms / 1000.0
+        )
+        status = "ok"
+    except TimeoutError:
+        logger.warning(f"RAG stage '{name}' exceeded {deadline_ms}ms deadline")
+        hits, status = [], "timeout"
+    except Exception as e:
+        logger.warning(f"RAG stage '{name}' failed: {type(e).__name__}: {e}")
+        hits, status = [], "error"
+    return hits, status, round((time.perf_counter() - t0) * 1000.0, 2)
+
+
+def _empty_result(stages: dict[str, str], timings: dict[str, float]) -> RetrievalResult:
+    return {"results": [], "degraded": True, "stages": stages, "timings_ms": timings}
+
+
+async def retrieve_async(
+    summary: dict[str, Any],
+    k: int = RAG_TOPK,
+    *,
+    embed_deadline_ms: int = RAG_EMBED_DEADLINE_MS,
+    bm25_deadline_ms: int = RAG_BM25_DEADLINE_MS,
+) -> RetrievalResult:
+    """
+    Async hybrid search: embedding search and BM25 run concurrently, each under
+    its own deadline. If one side times out or fails, the other side's hits are
+    still fused and returned with degraded=True instead of an empty list.
+    """
+    logger.info(f"Async RAG retrieval started with k={k}")
+    stages: dict[str, str] = {}
+    timings: dict[str, float] = {}
+
+    if not USE_RAG:
+        logger.info("RAG disabled, returning empty results")
+        return {"results": [], "degraded": False, "stages": {}, "timings_ms": {}}
+
+    if _store is None:
+        # index load is blocking I/O → keep it off the event loop
+        _, status, ms = await _run_stage(
+            "init", init_retriever, deadline_ms=RAG_INIT_DEADLINE_MS
+        )
+        stages["init"], timings["init"] = status, ms
+        if _store is None:
+            return _empty_result(stages, timings)
+
+    try:
+        query_dict = make_query(summary)
+    except Exception as e:
+        logger.warning(f"RAG query expansion failed: {e!s}")
+        stages["query"] = "error"
+        return _empty_result(stages, timings)
+    stages["query"] = "ok"
+
+    top_n = fetch_k(k)
+    (emb_hits, emb_status, emb_ms), (bm_hits, bm_status, bm_ms) = await asyncio.gather(
+        _run_stage(
+            "embedding",
+            embedding_hits,
+            query_dict["embed"],
+            top_n,
+            deadline_ms=embed_deadline_ms,
+        ),
+        _run_stage(
+            "bm25", bm25_hits, query_dict["bm25"], top_n, deadline_ms=bm25_deadline_ms
+        ),
+    )
+    stages["embedding"], timings["embedding"] = emb_status, emb_ms
+    stages["bm25"], timings["bm25"] = bm_status, bm_ms
+    if _bm25 is None:
+        # BM25 never built (rank_bm25 missing / no corpus) → not a degradation
+        stages["bm25"] = "skipped"
+
+    try:
+        merged = _fuse(emb_hits, bm_hits)
+    except Exception as e:
+        logger.warning(f"RAG fusion failed: {e!s}")
+        stages["fusion"] = "error"
+        return _empty_result(stages, timings)
+    stages["fusion"] = "ok"
+
+    # result set is complete at this point; a slow re-ranker only costs ordering
+    degraded = any(s in ("timeout", "error") for s in stages.values())
+
+    if RAG_RERANK and merged:
+        reranked, status, ms = await _run_stage(
+            "rerank",
+            _rerank,
+            query_dict["base"],
+            merged,
+            k,
+            deadline_ms=RAG_RERANK_DEADLINE_MS,
+        )
+        stages["rerank"], timings["rerank"] = status, ms
+        if status == "ok":
+            merged = reranked
+
+    try:
+        results = _materialize(merged, k)
+    except Exception as e:
+        logger.warning(f"RAG materialization failed: {e!s}")
+        stages["fusion"] = "error"
+        return _empty_result(stages, timings)
+    logger.info(
+        f"Async RAG retrieval returned {len(results)} results "
+        f"(embedding={emb_status}, bm25={stages['bm25']}, degraded={degraded})"
+    )
+    return {
+        "results": results,
+        "degraded": degraded,
+        "stages": stages,
+        "timings_ms": timings,
+    }
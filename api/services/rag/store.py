@@ -59,6 +59,16 @@ class RAGStore:
             self.meta = self.meta[:min_rows]
             self._rows = min_rows
 
+        # Pre-parse tags_json once here instead of on every card build
+        for m in self.meta:
+            tags = m.get("tags_json")
+            if isinstance(tags, str):
+                try:
+                    parsed = json.loads(tags)
+                except json.JSONDecodeError:
+                    parsed = None
+                m["tags_json"] = parsed if isinstance(parsed, dict) else {}
+
         # Simple per-process cache for get_meta()
         self._meta_cache: dict[int, dict[str, Any]] = {}
 
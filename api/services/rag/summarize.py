@@ -1,8 +1,10 @@
 # api/services/rag/summarize.py
 from __future__ import annotations
 
+import json
 import logging
 import re
+from functools import lru_cache
 from typing import Any
 
 # Get logger
@@ -17,11 +19,52 @@ def _clean(text: str) -> str:
     return text[:MAX_CHARS].rstrip()
 
 
+@lru_cache(maxsize=256)
+def _compile_keywords(keywords: tuple[str, ...]) -> re.Pattern | None:
+    # longest first so "chest pain" wins over "chest" at the same position
+    terms = sorted({k.strip() for k in keywords if k and k.strip()}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+
+
+def compile_keywords(keywords: list[str] | None) -> re.Pattern | None:
+    """Compile a keyword set into one case-insensitive alternation (cached per set)"""
+    if not keywords:
+        return None
+    return _compile_keywords(tuple(str(k) for k in keywords))
+
+
+def highlight(snippet: str, pattern: re.Pattern | None) -> str:
+    """Wrap every keyword occurrence in **bold** in a single pass, keeping original case"""
+    if pattern is None or not snippet:
+        return snippet
+    return pattern.sub(r"**\g<0>**", snippet)
+
+
+def parse_tags(tags_json: Any) -> dict[str, Any]:
+    """tags_json may be a dict (pre-parsed at index load) or a raw JSON string"""
+    if isinstance(tags_json, dict):
+        return tags_json
+    if isinstance(tags_json, str):
+        try:
+            tags = json.loads(tags_json)
+            return tags if isinstance(tags, dict) else {}
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    return {}
+
+
 def to_cards(
-    rets: list[dict], max_cards: int = 2, keywords: list[str] | None = None
+    rets: list[dict],
+    max_cards: int = 2,
+    keywords: list[str] | re.Pattern | None = None,
 ) -> list[dict[str, Any]]:
     logger.info(f"Converting {len(rets)} RAG results to {max_cards} evidence cards")
 
+    # keyword set compiled once for the whole batch of results
+    pattern = keywords if isinstance(keywords, re.Pattern) else compile_keywords(keywords)
+
     # 1. sort bsed on score
     ranked = sorted(rets, key=lambda x: x.get("score", 0), reverse=True)
 
@@ -37,32 +80,15 @@ def to_cards(
         key = (
             title.lower(),
             str(chunk.get("year", "")),
-            chunk.get("section", "").lower(),
+            (chunk.get("section") or "").lower(),
         )
         if key in seen:
             logger.debug(f"Skipping duplicate card: {title}")
             continue
         seen.add(key)
 
-        # Parse tags_json if available
-        tags = {}
-        try:
-            tags_json = chunk.get("tags_json")
-            if isinstance(tags_json, str):
-                import json
-
-                tags = json.loads(tags_json)
-            elif isinstance(tags_json, dict):
-                tags = tags_json
-        except (json.JSONDecodeError, TypeError):
-            tags = {}
-
         # keyword highlight (optional)
-        snippet = _clean(chunk.get("text") or "")
-        if keywords:
-            for kw in keywords:
-                if kw.lower() in snippet.lower():
-                    snippet = snippet.replace(kw, f"**{kw}**")
+        snippet = highlight(_clean(chunk.get("text") or ""), pattern)
 
         cards.append(
             {
@@ -74,7 +100,7 @@ def to_cards(
                 "link": chunk.get("url") or "",
                 "year": chunk.get("year") or "",
                 "section": chunk.get("section") or "",
-                "tags": tags,
+                "tags": parse_tags(chunk.get("tags_json")),
             }
         )
 
@@ -21,6 +21,13 @@ class Retrieval(TypedDict):
     score: float
 
 
+class RetrievalResult(TypedDict):
+    results: list[Retrieval]
+    degraded: bool  # True when a stage timed out/failed and results are partial
+    stages: dict[str, str]  # stage -> "ok" | "timeout" | "error" | "skipped"
+    timings_ms: dict[str, float]
+
+
 class EvidenceCard(TypedDict):
     title: str
     snippet: str
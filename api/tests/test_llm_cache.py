@@ -7,13 +7,32 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 import pytest
 
 from api.core.schemas import SummaryIn
+from api.services.llm.client import clear_cache
 from api.services.llm.tasks import summarize as task
 
 
+def _disk_settings(tmp_path, **overrides):
+    from api.core.config import settings
+
+    update = {"LLM_CACHE_BACKEND": "sqlite", "LLM_CACHE_PATH": str(tmp_path / "llm_cache.db")}
+    return settings.model_copy(update={**update, **overrides})
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    """Both response-cache tiers, with the disk tier in tmp_path rather than ./data"""
+    from api.services.llm import client
+
+    cache = client.build_response_cache(_disk_settings(tmp_path, LLM_CACHE_SWEEP_S=0))
+    previous = client.use_response_cache(cache)
+    yield cache
+    client.use_response_cache(previous)
+
+
 @pytest.mark.anyio
-async def test_cache_hit(monkeypatch):
+async def test_cache_hit(disk_cache):
     # check if cache functionality is working
-    from api.services.llm.client import _cache, clear_cache
+    assert disk_cache.persistent is not None
 
     # initialize cache
     clear_cache()
@@ -30,5 +49,109 @@ async def test_cache_hit(monkeypatch):
     assert result1.flags == result2.flags
 
     # check cache statistics
-    cache_stats = _cache.get_stats()
+    cache_stats = disk_cache.get_stats()
     assert cache_stats["size"] >= 0  # check if cache exists
+
+
+def test_lru_ttl_cache_eviction_and_expiry(monkeypatch):
+    from api.services.llm.cache import LRUTTLCache
+
+    cache = LRUTTLCache(ttl_s=10, maxsize=2, sweep_interval_s=0)
+    now = [1000.0]
+    monkeypatch.setattr(cache, "_now", lambda: now[0])
+
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # "a" is now most recently used
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None  # LRU entry evicted
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_stats()["bytes"] == len('{"v": 1}') + len('{"v": 3}')
+
+    now[0] += 11
+    assert cache.sweep() == 2
+    assert len(cache) == 0
+    assert cache.bytes == 0
+
+    small = LRUTTLCache(maxsize=100, max_bytes=20, sweep_interval_s=0)
+    small.set("x", {"v": "0123456789"})
+    small.set("y", {"v": 1})
+    assert small.get("x") is None
+    assert small.get("y") == {"v": 1}
+
+
+def test_disk_tier_is_opt_in_and_off_in_hipaa_mode(tmp_path):
+    from api.core.config import Settings
+    from api.services.llm.cache import SQLiteCache
+    from api.services.llm.client import persistent_cache
+
+    assert Settings.model_fields["LLM_CACHE_BACKEND"].default == "none"
+    assert persistent_cache(_disk_settings(tmp_path, LLM_CACHE_BACKEND="none")) is None
+    assert isinstance(persistent_cache(_disk_settings(tmp_path)), SQLiteCache)
+    assert persistent_cache(_disk_settings(tmp_path, HIPAA_MODE=True)) is None
+
+
+def test_sqlite_cache_shared_and_compressed(tmp_path):
+    from api.services.llm.cache import LRUTTLCache, SQLiteCache, TieredCache
+
+    path = str(tmp_path / "llm_cache.db")
+    big = {"hpi": "chest pain " * 500}
+    disk_a = SQLiteCache(path, compress_min_bytes=64)
+    worker_a = TieredCache(LRUTTLCache(sweep_interval_s=0), disk_a)
+    worker_a.set("k", big)
+
+    # a second worker (fresh memory tier) reads it from disk and promotes it
+    disk = SQLiteCache(path)
+    worker_b = TieredCache(LRUTTLCache(sweep_interval_s=0), disk)
+    assert worker_b.get("k") == big
+    assert worker_b.memory.get_stats()["size"] == 1
+    stats = disk.get_stats()
+    assert stats["hits"] == 1
+    assert stats["size"] == 1
+    assert stats["bytes"] < len(str(big))  # stored compressed
+
+    capped = SQLiteCache(path, max_bytes=1, prune_every=1)
+    capped.set("k2", {"v": 1})
+    assert capped.get_stats()["size"] <= 1
+
+
+@pytest.mark.anyio
+async def test_canonical_cache_reuses_near_duplicate_intake(monkeypatch):
+    from api.services.llm.canonical import canonicalize, summary_cache
+    from api.services.llm.service import llm_service
+
+    assert canonicalize({"a": " Chest  PAIN ", "b": ["SOB", "nausea", "sob"], "c": ""}) == {
+        "a": "chest pain",
+        "b": ["nausea", "sob"],
+    }
+
+    calls = []
+
+    async def fake_chat_json(**kwargs):
+        calls.append(kwargs)
+        return {
+            "hpi": "Patient reports chest pain.",
+            "ros": {
+                "cardiovascular": {"positive": ["chest pain"], "negative": []},
+                "respiratory": {"positive": [], "negative": []},
+                "constitutional": {"positive": [], "negative": []},
+            },
+            "pmh": [],
+            "meds": [],
+            "flags": {"ischemic_features": False, "dm_followup": False, "labs_a1c_needed": False},
+        }
+
+    monkeypatch.setattr("api.services.llm.service.chat_json", fake_chat_json)
+    clear_cache()
+
+    first = {"answers": {"cc": "Chest pain", "associated": ["nausea", "diaphoresis"]}}
+    second = {"answers": {"associated": ["diaphoresis", "nausea"], "cc": "chest  pain", "x": ""}}
+    out1 = await llm_service.summary(first)
+    out2 = await llm_service.summary(second)
+
+    assert len(calls) == 1
+    assert out1["hpi"] == out2["hpi"]
+    stats = summary_cache.get_stats()
+    assert stats["near_duplicate_hits"] == 1
+    assert stats["extra_hit_rate"] == 0.5
+    clear_cache()
@@ -33,3 +33,34 @@ async def test_json_parse_error_falls_back(monkeypatch):
     body = SummaryIn(encounterId="e5", patient={"age": 40}, answers={"cc": "headache"})
     out = await task.run(body)
     assert isinstance(out.hpi, str)
+
+
+@pytest.mark.anyio
+async def test_open_breaker_skips_provider(monkeypatch):
+    from api.services.llm import client
+    from api.services.llm.breaker import CircuitBreaker
+
+    calls = []
+
+    class _Completions:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            raise TimeoutError("provider timeout")
+
+    class _Client:
+        class chat:
+            completions = _Completions()
+
+    breaker = CircuitBreaker(min_calls=2, failure_rate=0.5, open_s=60)
+    monkeypatch.setattr(client, "async_client", _Client())
+    monkeypatch.setattr(client, "llm_breaker", breaker)
+
+    msgs = [{"role": "user", "content": "breaker test"}]
+    out = await client.chat_json(messages=msgs, use_cache=False, fallback_func=lambda: {"fb": 1})
+    assert out == {"fb": 1}
+    assert len(calls) == 2  # third attempt rejected by the now-open breaker
+    assert breaker.get_state()["state"] == "open"
+
+    out = await client.chat_json(messages=msgs, use_cache=False, fallback_func=lambda: {"fb": 2})
+    assert out == {"fb": 2}
+    assert len(calls) == 2
@@ -0,0 +1,62 @@
+# api/tests/test_llm_hedge.py
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+from api.services.llm.hedge import Hedger, LatencyTracker
+
+
+def _hedger(max_ratio: float = 0.5) -> Hedger:
+    tracker = LatencyTracker(min_samples=1)
+    tracker.record(20)
+    hedger = Hedger(enabled=True, max_ratio=max_ratio, min_delay_ms=0, tracker=tracker)
+    hedger.primaries = 1
+    return hedger
+
+
+@pytest.mark.anyio
+async def test_hedger_takes_faster_duplicate_within_budget():
+    hedger = _hedger()
+    delays = iter([1.0, 0.0])
+
+    async def request():
+        d = next(delays)
+        await asyncio.sleep(d)
+        return d
+
+    assert await hedger.run(request) == 0.0  # slow primary, hedge wins
+    assert hedger.hedge_wins == 1
+
+    # budget (0.5 x 3 primaries → 1 hedge) already spent → wait for the primary
+    delays = iter([0.05])
+    assert await hedger.run(request) == 0.05
+    assert hedger.over_budget == 1
+
+
+@pytest.mark.anyio
+async def test_hedger_cancels_and_awaits_both_requests_when_caller_is_cancelled():
+    hedger = _hedger()
+    started = 0
+    cancelled = 0
+
+    async def request():
+        nonlocal started, cancelled
+        started += 1
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0)  # cleanup that needs the loop
+            cancelled += 1
+            raise
+
+    caller = asyncio.ensure_future(hedger.run(request))
+    while started < 2:  # primary, then the hedge after the 20ms delay
+        await asyncio.sleep(0.005)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    assert cancelled == 2  # both finished before run() returned
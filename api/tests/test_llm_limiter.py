@@ -0,0 +1,42 @@
+# api/tests/test_llm_limiter.py
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+from api.services.llm.limiter import LLMLimiter, TokenBucket, estimate_tokens
+
+
+@pytest.mark.anyio
+async def test_limiter_caps_in_flight_and_records_waits():
+    limiter = LLMLimiter(max_concurrency=2)
+    peak = 0
+    active = 0
+
+    async def call():
+        nonlocal peak, active
+        async with limiter.slot(10):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    stats = limiter.get_stats()
+    assert peak == 2
+    assert stats["admitted"] == 6
+    assert stats["in_flight"] == 0
+    assert stats["wait_ms_max"] >= 30  # later calls queued behind two rounds
+
+
+def test_token_bucket_reservation_and_estimate():
+    bucket = TokenBucket(per_minute=60)  # one per second
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert TokenBucket(per_minute=0).reserve(10**6) == 0.0
+
+    msgs = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "y" * 40}]
+    assert estimate_tokens(msgs, max_output_tokens=100) == 110 + 8 + 100
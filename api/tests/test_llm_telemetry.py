@@ -0,0 +1,61 @@
+# api/tests/test_llm_telemetry.py
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+from api.services.llm import client
+from api.services.llm.telemetry import LLMTelemetry
+
+
+@pytest.mark.anyio
+async def test_chat_json_records_usage_timings_and_cache(monkeypatch):
+    class _Completions:
+        async def create(self, **kwargs):
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content='{"ok": true}'))],
+                usage=SimpleNamespace(prompt_tokens=1200, completion_tokens=300),
+            )
+
+    telemetry = LLMTelemetry()
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=_Completions()))
+    monkeypatch.setattr(client, "async_client", fake)
+    monkeypatch.setattr(client, "llm_telemetry", telemetry)
+    client.clear_cache()
+
+    msgs = [{"role": "user", "content": "telemetry test"}]
+    assert await client.chat_json(messages=msgs, model="gpt-4o-mini") == {"ok": True}
+    assert await client.chat_json(messages=msgs, model="gpt-4o-mini") == {"ok": True}
+
+    stats = telemetry.get_stats()
+    first, second = stats["recent"]
+    assert first["cache"] == "miss"
+    assert first["attempts"] == 1
+    assert first["prompt_tokens"] == 1200
+    assert first["cost_usd"] == pytest.approx(0.00036)
+    assert second["cache"] == "hit"
+    assert second["attempts"] == 0
+    assert stats["counters"]["cache_hits"] == 1
+    assert stats["tokens"] == {"prompt": 1200, "completion": 300}
+    assert stats["histograms_ms"]["network_ms"]["count"] == 1
+    client.clear_cache()
+
+
+def test_client_created_lazily_with_pool_limits(monkeypatch):
+    monkeypatch.setattr(client, "OPENAI_API_KEY", "sk-test")
+    client.reset_clients()
+    try:
+        assert client.get_client_status()["clients"]["async"] is False  # status doesn't create
+        llm = client.get_async_client()  # first call builds it
+        assert llm is not None
+        assert llm is client.get_async_client()
+        assert client.get_client_status()["clients"]["async"] is True
+        pool = client.get_pool_stats()["clients"]["async"]
+        assert pool["connections"] == 0
+        assert pool["utilisation"] == 0
+        assert client.get_pool_stats()["max_connections"] == client.LLM_POOL_LIMITS.max_connections
+    finally:
+        client.reset_clients()
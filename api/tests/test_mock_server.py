@@ -0,0 +1,93 @@
+# api/tests/test_mock_server.py
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI
+from starlette.requests import Request
+
+from api.services.llm import client
+from api.services.llm.batch import OpenAIBatchBackend
+from api.services.llm.mock_server import MockServerConfig, create_app
+
+MSGS = [{"role": "user", "content": "Patient reports chest pain"}]
+
+
+def test_mock_server_injects_faults_and_limits_throughput():
+    app = create_app(MockServerConfig(latency="fixed:0", max_rpm=2, seed=1))
+    http = TestClient(app)
+    body = {"model": "gpt-4o-mini", "messages": MSGS}
+
+    ok = http.post("/v1/chat/completions", json=body)
+    assert ok.status_code == 200
+    assert ok.json()["usage"]["completion_tokens"] > 0
+    assert http.post("/v1/chat/completions", json=body).status_code == 200
+    throttled = http.post("/v1/chat/completions", json=body)
+    assert throttled.status_code == 429
+    assert float(throttled.headers["retry-after"]) > 0
+
+    http.post("/mock/config", json={"max_rpm": 0, "error_rate": 1.0})
+    assert http.post("/v1/chat/completions", json=body).status_code == 500
+
+    stats = http.get("/mock/stats").json()
+    assert stats["ok"] == 2
+    assert stats["throttled"] == 1
+    assert stats["errors"] == 1
+
+    bad = http.post("/mock/config", json={"latency": "bogus:1", "error_rate": 0.0})
+    assert bad.status_code == 400
+    config = http.get("/mock/stats").json()["config"]
+    assert config["latency"] == "fixed:0"  # rejected update leaves the config untouched
+    assert config["error_rate"] == 1.0
+
+
+@pytest.mark.anyio
+async def test_stream_slot_released_when_body_never_iterated():
+    app = create_app(MockServerConfig(latency="fixed:0"))
+    endpoint = next(
+        r.endpoint for r in app.routes if getattr(r, "path", "") == "/v1/chat/completions"
+    )
+    payload = json.dumps({"model": "gpt-4o-mini", "messages": MSGS, "stream": True}).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    resp = await endpoint(Request({"type": "http", "method": "POST", "headers": []}, receive))
+    assert app.state.mock.in_flight == 1
+    await resp.background()  # what Starlette runs after the response, streamed or not
+    assert app.state.mock.in_flight == 0
+    await resp.background()  # releasing twice is a no-op
+    assert app.state.mock.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_chat_json_and_batch_backend_against_mock_server(monkeypatch):
+    app = create_app(MockServerConfig(latency="fixed:1", stream_chunk_ms=0))
+    llm = AsyncOpenAI(
+        api_key="mock",
+        base_url="http://mock/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+    )
+    monkeypatch.setattr(client, "async_client", llm)
+    client.clear_cache()
+
+    out = await client.chat_json(messages=MSGS, use_cache=False)
+    assert out["flags"]["ischemic_features"] is True
+
+    backend = OpenAIBatchBackend()
+    batch_id = await backend.submit(
+        [{"custom_id": "a", "body": {"model": "gpt-4o-mini", "messages": MSGS}}]
+    )
+    for _ in range(50):
+        if await backend.poll(batch_id) == "completed":
+            break
+        await asyncio.sleep(0.01)
+    results = await backend.results(batch_id)
+    assert results["a"]["hpi"].startswith("Patient")
@@ -0,0 +1,25 @@
+# api/tests/test_negation.py
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from api.services.llm.negation_processor import NegationProcessor
+
+
+def test_negation_single_scan_and_cache():
+    n = NegationProcessor()
+    assert n.contains_negation("Denies fever")
+    assert not n.contains_negation("notable cough")
+
+    # same items and order as one findall() per contextual pattern
+    assert n.extract_negated_items("no fever and not cough, without chills") == [
+        "no_fever and not cough",
+        "not_cough",
+        "without_chills",
+    ]
+    assert n.extract_negated_items("No, none of these") == ["all_symptoms_negative"]
+
+    items = ["chest pain", "no nausea", "chest pain"]
+    assert n.process_negation_in_list(items) == (["chest pain", "chest pain"], ["no_nausea"], False)
+    assert n.cache_info().hits == 1
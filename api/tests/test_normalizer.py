@@ -0,0 +1,55 @@
+# api/tests/test_normalizer.py
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from api.services.llm.normalizer import MedicalNormalizer
+
+SYNONYMS = Path(__file__).parent.parent.parent / "rag_index" / "synonyms.json"
+
+
+def test_normalize_text_single_pass():
+    n = MedicalNormalizer(str(SYNONYMS))
+
+    text, rules = n.normalize_text("Chest pressure for 5 - 10 minutes, very severe")
+    assert text == "chest_pain for 5-10min, very_severe"
+    assert rules[0] == "chest pressure -> chest_pain"
+    assert r"Duration: \b(\d+)\s*-\s*(\d+)\s*minutes?\b -> \1-\2min" in rules
+
+    # terms match whole words only and replacements are not re-scanned
+    text, _ = n.normalize_text("vomiting, admitted, more than 45 minutes")
+    assert text == "vomiting, admitted, 45min+"
+    assert n.normalize_text("HbA1c")[0] == "hba1c"
+
+
+def test_normalize_text_memoised():
+    n = MedicalNormalizer(str(SYNONYMS))
+    first = n.normalize_text("SOB at rest")
+    first[1].append("mutated by caller")
+    assert n.normalize_text("SOB at rest") == (
+        "dyspnea at rest_relief",
+        ["rest -> rest_relief", "SOB -> dyspnea"],  # synonym-group order
+    )
+    assert n.cache_info().hits == 1
+
+
+def test_normalize_many_matches_single_and_dedupes():
+    from api.services.llm.bulk_normalize import iter_emr_jsonl, normalize_chunks
+
+    n = MedicalNormalizer(str(SYNONYMS))
+    emr = sorted((SYNONYMS.parent.parent / "data").glob("emr_*.jsonl"))
+    intakes = [record for _, record in iter_emr_jsonl(emr)] * 3
+    assert len(intakes) == 6  # comment header lines skipped
+
+    results, stats = n.normalize_many(intakes)
+    assert results == [n.normalize_intake_data(i) for i in intakes]
+    _, once = n.normalize_many(intakes[:2])
+    assert stats["strings"] == 3 * once["strings"]
+    assert stats["unique_strings"] == once["unique_strings"] < once["strings"]
+
+    chunks = list(normalize_chunks(((str(i), x) for i, x in enumerate(intakes)), 4, n))
+    assert [len(rows) for rows, _ in chunks] == [4, 2]
+    assert chunks[1][0][0][1] == results[4][0]
+    assert chunks[1][1]["unique_strings"] > 0
+    assert chunks[1][1]["normalized_strings"] == 0  # all seen in the first chunk
@@ -0,0 +1,26 @@
+# api/tests/test_phi_redactor.py
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from api.middleware.phi_redactor import _redact_text, redact_obj
+
+
+def test_redacts_every_candidate_in_one_pass():
+    text = "SSN 123-45-6789, call 404.555.1234, zip 30332-1234, MRN AB12CD34"
+    assert _redact_text(text) == ("SSN [REDACTED], call [REDACTED], zip [REDACTED], MRN [REDACTED]")
+    # idempotent: existing markers are not re-matched as IDs
+    assert _redact_text(_redact_text(text)) == _redact_text(text)
+    assert _redact_text("[REDACTED] and 404-555-1234") == "[REDACTED] and [REDACTED]"
+
+
+def test_redact_obj_copy_on_write():
+    clean = {"answers": {"cc": "chest pain", "pmh": ["htn"]}, "patient": {"age": 55}}
+    assert redact_obj(clean) is clean
+
+    payload = {"answers": {"cc": "chest pain", "phone": "404-555-1234"}, "patient": {"age": 55}}
+    out = redact_obj(payload)
+    assert out["answers"]["phone"] == "[REDACTED]"
+    assert payload["answers"]["phone"] == "404-555-1234"  # input untouched
+    assert out["patient"] is payload["patient"]  # unchanged branches are shared
@@ -0,0 +1,169 @@
+# api/tests/test_rag_async.py
+import importlib
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+# the package re-exports the retrieve() function under the same name
+r = importlib.import_module("api.services.rag.retrieve")
+
+
+class _FakeStore:
+    def get_meta(self, i):
+        return {"id": f"doc__{i:04d}", "title": f"Doc {i}", "text": "chest pain"}
+
+
+@pytest.fixture
+def fake_rag(monkeypatch):
+    monkeypatch.setattr(r, "USE_RAG", True)
+    monkeypatch.setattr(r, "_store", _FakeStore())
+    monkeypatch.setattr(r, "_bm25", object())
+    monkeypatch.setattr(r, "bm25_hits", lambda _q, _top_k: [(3, 9.0), (1, 4.0)])
+    return monkeypatch
+
+
+def _summary():
+    return {"flags": {"ischemic_features": True}, "codes": {}}
+
+
+@pytest.mark.anyio
+async def test_retrieve_async_fuses_both_stages(fake_rag):
+    fake_rag.setattr(r, "embedding_hits", lambda _q, _top_k: [(1, 0.9), (2, 0.5)])
+    out = await r.retrieve_async(_summary(), k=3)
+    assert out["degraded"] is False
+    assert out["stages"]["embedding"] == "ok"
+    assert out["stages"]["bm25"] == "ok"
+    assert out["results"][0]["chunk"]["id"] == "doc__0001"
+
+
+@pytest.mark.anyio
+async def test_retrieve_async_slow_encoder_returns_bm25_only(fake_rag):
+    def slow_embedding(q, top_k):
+        time.sleep(0.3)
+        return [(2, 0.99)]
+
+    fake_rag.setattr(r, "embedding_hits", slow_embedding)
+    out = await r.retrieve_async(_summary(), k=2, embed_deadline_ms=20)
+    assert out["degraded"] is True
+    assert out["stages"]["embedding"] == "timeout"
+    assert [x["chunk"]["id"] for x in out["results"]] == ["doc__0003", "doc__0001"]
+
+
+@pytest.mark.anyio
+async def test_retrieve_async_stage_error_is_partial(fake_rag):
+    def broken(q, top_k):
+        raise RuntimeError("encoder unavailable")
+
+    fake_rag.setattr(r, "embedding_hits", broken)
+    out = await r.retrieve_async(_summary(), k=1)
+    assert out["degraded"] is True
+    assert out["stages"]["embedding"] == "error"
+    assert len(out["results"]) == 1
+
+
+def test_precomputed_cards_lookup(monkeypatch):
+    from api.services.rag.precompute import PrecomputedCards
+
+    calls = []
+
+    def fake_retrieve(summary, k=4):
+        calls.append(summary)
+        return [{"chunk": {"title": "ACC/AHA", "text": "ECG and troponin"}, "score": 0.9}]
+
+    monkeypatch.setattr(r, "USE_RAG", True)
+    monkeypatch.setattr(r, "retrieve", fake_retrieve)
+
+    pc = PrecomputedCards()
+    info = pc.warm(code_sets=[{}, {"icd": ["I20.9"]}])
+    # labs_a1c_needed doesn't change the query → 4 flag combos x 2 code sets
+    assert info["entries"] == len(calls) == 8
+
+    flags = {"ischemic_features": True, "dm_followup": False, "labs_a1c_needed": True}
+    cards = pc.get({"flags": flags, "codes": {"icd": ["I20.9"]}})
+    assert cards
+    assert cards[0]["title"] == "ACC/AHA"
+    cards[0]["rank"] = 99  # callers mutate; stored cards must not change
+    assert pc.get({"flags": flags, "codes": {"icd": ["I20.9"]}})[0]["rank"] == 1
+
+    # free-text chief complaint changes the query → miss, live RAG handles it
+    assert pc.get({"flags": flags, "cc": "palpitations"}) is None
+    assert pc.get_stats()["hits"] == 2
+
+
+def test_to_cards_highlights_in_one_pass():
+    from api.services.rag.summarize import to_cards
+
+    rets = [
+        {
+            "chunk": {
+                "title": "ESC 0/1h",
+                "text": "Chest pain with raised Troponin; repeat troponin at 1h.",
+                "section": None,
+                "tags_json": '{"type": "guideline"}',
+            },
+            "score": 0.8,
+        }
+    ]
+    cards = to_cards(rets, keywords=["troponin", "chest", "chest pain"])
+    assert cards[0]["snippet"] == (
+        "**Chest pain** with raised **Troponin**; repeat **troponin** at 1h."
+    )
+    assert cards[0]["tags"] == {"type": "guideline"}
+
+
+@pytest.mark.anyio
+async def test_rerank_budget_cache_and_async_stage(fake_rag):
+    from api.services.rag.rerank import Reranker
+
+    scored = []
+
+    def scorer(pairs):
+        scored.extend(pairs)
+        # "troponin" chunks are the relevant ones
+        return [4.0 if "troponin" in text else -4.0 for _, text in pairs]
+
+    def get_meta(i):
+        return {"id": f"doc__{i:04d}", "text": "troponin" if i == 3 else "diet"}
+
+    rr = Reranker(max_candidates=2, batch_size=1, scorer=scorer)
+    merged = [(1, 0.9), (3, 0.8), (2, 0.1)]
+    out = rr.rerank("chest pain", merged, get_meta, k=3)
+    assert [i for i, _ in out] == [3, 1, 2]
+    assert out[2][0] == 2  # beyond the budget: follows in fused order, not scored
+    assert out[2][1] < out[1][1]
+    assert len(scored) == 2
+    assert rr.batches == 2
+    assert rr.rerank("chest pain", merged, get_meta, k=3) == out
+    assert len(scored) == 2
+    assert rr.get_stats()["hits"] == 2
+
+    fake_rag.setattr(r, "RAG_RERANK", True)
+    fake_rag.setattr(r, "reranker", rr)
+    fake_rag.setattr(r, "embedding_hits", lambda _q, _top_k: [(1, 0.9), (2, 0.5)])
+    res = await r.retrieve_async(_summary(), k=2)
+    assert res["stages"]["rerank"] == "ok"
+    assert res["degraded"] is False
+
+
+def test_rerank_tail_stays_below_reranked_cards():
+    from api.services.rag.rerank import Reranker
+    from api.services.rag.summarize import to_cards
+
+    def get_meta(i):
+        return {"id": f"doc__{i:04d}", "text": "diet"}
+
+    # every budget item scores low, while the unscored tail has high fused scores
+    rr = Reranker(max_candidates=2, scorer=lambda pairs: [-6.0] * len(pairs))
+    merged = [(1, 1.0), (2, 0.95), (3, 0.9), (4, 0.8), (5, 0.7)]
+    out = rr.rerank("chest pain", merged, get_meta, k=4)
+    assert [i for i, _ in out] == [1, 2, 3, 4]
+    assert out[2][1] < out[1][1]
+    assert out[3][1] < out[2][1]
+
+    rets = [{"chunk": {"title": f"Doc {i}", "text": "diet"}, "score": s} for i, s in out]
+    cards = to_cards(rets, max_cards=4)
+    assert [c["title"] for c in cards] == ["Doc 1", "Doc 2", "Doc 3", "Doc 4"]
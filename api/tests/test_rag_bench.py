@@ -0,0 +1,36 @@
+# api/tests/test_rag_bench.py
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from api.services.rag import bench
+
+
+def test_benchmark_reports_latency_and_recall(tmp_path):
+    report = bench.main(
+        [
+            "--chunks", "80",
+            "--queries", "10",
+            "--index", "flat", "ivf",
+            "--fusion", "bm25", "hybrid", "retrieve",
+            "--out", str(tmp_path / "bench.json"),
+        ]
+    )  # fmt: skip
+    assert (tmp_path / "bench.json").exists()
+    assert report["config"]["chunks"] == 80
+    assert len(report["results"]) == 6
+    for row in report["results"]:
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+        assert row["qps"] > 0
+        assert 0.0 <= row["recall@4"] <= 1.0
+        assert row["index_bytes"] > 0
+        assert row["build_peak_mb"] >= 0
+        assert row["query_peak_mb"] > 0
+    flat, ivf = (
+        {r["fusion"]: r for r in report["results"] if r["index"] == kind}
+        for kind in ("flat", "ivf")
+    )
+    assert flat["hybrid"]["index_bytes"] != ivf["hybrid"]["index_bytes"]  # per index type
+    hybrid = [r for r in report["results"] if r["fusion"] == "hybrid"]
+    assert all(r["recall@4"] > 0 for r in hybrid)
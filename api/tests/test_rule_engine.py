@@ -0,0 +1,82 @@
+# api/tests/test_rule_engine.py
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+from api.services.llm.rule_engine import ClinicalRuleEngine, RuleSet
+
+
+def _processed(positive, negative=()):
+    return {"positive": list(positive), "negative": list(negative), "all_negated": False}
+
+
+def test_flags_on_negation_processed_intake():
+    engine = ClinicalRuleEngine()
+    intake = {
+        "Q2_Where_is_the_pain": _processed(["left_arm_radiation"]),
+        "Q4_Worse_with": _processed(["exertional"]),
+        "Q5_Better_with": _processed(["rest_relief"]),
+        "Q6_Associated_symptoms": _processed(["diaphoresis"], ["no_nausea"]),
+        "pmh": _processed([], ["no_diabetes"]),
+    }
+    flags, why = engine.calculate_flags(intake, {})
+    assert flags == {"ischemic_features": True, "dm_followup": False, "labs_a1c_needed": False}
+    assert why["ischemic_features"] == [
+        "Exertional chest pain relieved by rest",
+        "Pain radiates to left arm",
+        "Associated diaphoresis/sweating",
+        "Total conditions met: 3/5",
+    ]
+
+    flags, why = engine.calculate_flags({"pmh": ["T2DM"], "notes": "HbA1c overdue"}, {})
+    assert flags["labs_a1c_needed"] is True
+    assert why["labs_a1c_needed"] == [
+        "Diabetes term 'dm' found in pmh",
+        "A1c term 'a1c' found in notes",
+    ]
+
+
+def test_declarative_rules_file(tmp_path):
+    spec = json.loads(Path(ClinicalRuleEngine().rules_path).read_text())
+    spec["features"]["syncope"] = {"fields": "*", "terms": ["fainting", "syncope"]}
+    spec["flags"]["syncope_workup"] = {
+        "description": "Syncope reported",
+        "criteria": [{"all": ["syncope"], "justification": "'{term}' in {field}"}],
+    }
+    path = tmp_path / "clinical_flags.json"
+    path.write_text(json.dumps(spec))
+
+    engine = ClinicalRuleEngine(path)
+    flags, why = engine.calculate_flags({"cc": "Fainting at work"}, {})
+    assert flags["syncope_workup"]
+    assert why["syncope_workup"] == ["'fainting' in cc"]
+    assert engine.get_rule_descriptions()["syncope_workup"] == "Syncope reported"
+
+    spec["flags"]["syncope_workup"]["criteria"][0]["all"] = ["nope"]
+    with pytest.raises(ValueError, match="unknown features"):
+        RuleSet(spec)
+
+
+def test_evaluate_many_matches_single():
+    engine = ClinicalRuleEngine()
+    intakes = [
+        {"Q2_Where_is_the_pain": ["left arm"], "Q6_Associated_symptoms": ["nausea", "sweating"]},
+        {"pmh": ["diabetes"], "notes": "a1c due"},
+        {"pmh": ["hypertension"]},
+        {},
+    ] * 25
+    batch = engine.evaluate_many(intakes)
+
+    assert len(batch) == 100
+    assert batch.features.shape == (100, len(batch.ruleset.feature_names))
+    for i in range(4):
+        flags, why = engine.calculate_flags(intakes[i], {})
+        assert {k: bool(v[i]) for k, v in batch.flags.items()} == flags
+        assert batch.row(i) == (flags, why)
+    assert batch.counts() == {"ischemic_features": 25, "dm_followup": 25, "labs_a1c_needed": 25}
+    assert batch.justification_indices("ischemic_features", 0) == [1, 2, 3]
+    assert batch.justification_indices("labs_a1c_needed", 2) == []
@@ -1,4 +1,5 @@
 # api/tests/test_summary.py
+import json
 import sys
 from pathlib import Path
 
@@ -125,3 +126,102 @@ async def test_summary_forbidden_phrase_filtered(monkeypatch):
     )
     out = await task.run(body)
     assert not FORBIDDEN.search(out.hpi)
+
+
+def test_validate_summary_dict_matches_text_path_and_is_strict():
+    data = {
+        "hpi": "Patient reports chest pain; prescribed rest. " + "x" * 700,
+        "ros": {
+            "cardiovascular": {"positive": ["chest pain"], "negative": []},
+            "respiratory": {"positive": [], "negative": ["cough"]},
+            "constitutional": {"positive": [], "negative": []},
+        },
+        "pmh": ["diabetes"],
+        "meds": [],
+        "flags": {"ischemic_features": True, "dm_followup": True, "labs_a1c_needed": False},
+    }
+    out = validators.validate_summary_dict(data)
+    assert out == validators.parse_and_validate(json.dumps(data))
+    assert len(out.hpi) == 600
+    assert not FORBIDDEN.search(out.hpi)
+    assert data["hpi"].startswith("Patient reports chest pain; prescribed")  # input untouched
+
+    bad = {**data, "flags": {**data["flags"], "dm_followup": "true"}, "pmh": "diabetes"}
+    with pytest.raises(ValueError, match="Structure validation failed") as exc:
+        validators.validate_summary_dict(bad)
+    assert "Flag dm_followup must be boolean" in str(exc.value)
+    assert "pmh must be array" in str(exc.value)
+
+    # keys outside the schema's required set pass through, as with SummaryOut.model_validate
+    extra = {
+        **data,
+        "ros": {**data["ros"], "gastrointestinal": {"positive": ["nausea"], "negative": []}},
+        "flags": {**data["flags"], "syncope_workup": False},
+    }
+    out = validators.validate_summary_dict(extra)
+    assert out.ros["gastrointestinal"].positive == ["nausea"]
+    assert out.flags["syncope_workup"] is False
+    assert out == validators.parse_and_validate(json.dumps(extra))
+
+    extra["ros"]["gastrointestinal"] = {"positive": [1], "negative": []}
+    with pytest.raises(ValueError, match=r"ros\.gastrointestinal\.positive\.0"):
+        validators.validate_summary_dict(extra)
+
+
+def test_prompt_has_static_prefix_and_single_intake():
+    from api.services.llm.prompts import SYSTEM, build_messages, prompt_token_report
+
+    a = build_messages({"answers": {"cc": "chest pain"}})
+    b = build_messages({"answers": {"cc": "palpitations"}})
+    assert a[0] == b[0]  # cacheable prefix
+    assert a[0]["content"] == SYSTEM
+    assert "{INPUT_JSON}" not in SYSTEM
+    assert sum("chest pain" in m["content"] for m in a) == 1
+    report = prompt_token_report(a)
+    assert report["total"] == report["system"] + report["intake"]
+
+
+@pytest.mark.anyio
+async def test_summary_stage_timings(monkeypatch):
+    from api.services.llm import service
+    from api.services.llm.profiling import PipelineProfiler
+
+    async def fake_chat_json(*_args, **_kwargs):
+        return {
+            "hpi": "40-year-old patient reports dizziness.",
+            "ros": {
+                "cardiovascular": {"positive": [], "negative": []},
+                "respiratory": {"positive": [], "negative": []},
+                "constitutional": {"positive": ["dizziness"], "negative": []},
+            },
+            "pmh": [],
+            "meds": [],
+            "flags": {"ischemic_features": False, "dm_followup": False, "labs_a1c_needed": False},
+        }
+
+    profiler = PipelineProfiler(sample_rate=1.0)
+    monkeypatch.setattr(service, "chat_json", fake_chat_json)
+    monkeypatch.setattr(service, "pipeline_profiler", profiler)
+    service.summary_cache.clear()
+
+    out = await service.llm_service.summary({"answers": {"cc": "dizziness"}}, debug=True)
+    stages = [s["stage"] for s in out["_metadata"]["timings"]["spans"]]
+    assert stages == [
+        "redact",
+        "normalize",
+        "negation",
+        "prompt",
+        "cache_lookup",
+        "llm_call",
+        "validate",
+        "rules",
+    ]
+    plain = await service.llm_service.summary({"answers": {"cc": "dizziness"}})
+    assert "timings" not in plain["_metadata"]
+
+    stats = profiler.get_stats(profiles=True)
+    assert stats["traces"] == 2
+    assert stats["stages"]["normalize"]["count"] == 2
+    assert stats["stages"]["llm_call"]["count"] == 1  # second run hit the summary cache
+    assert stats["profiles"]
+    assert "cumulative" in stats["profiles"][0]["top"]
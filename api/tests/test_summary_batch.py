@@ -0,0 +1,161 @@
+# api/tests/test_summary_batch.py
+import asyncio
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+from pydantic import ValidationError
+
+from api.routers.summary import BatchSummaryRequest
+from api.services.llm.batch import (
+    BatchJobs,
+    BatchSummaryRunner,
+    LocalBatchBackend,
+    _claim_pending,
+    summarize_pending,
+)
+
+LLM_OUT = {
+    "hpi": "Patient reports chest pain on exertion.",
+    "ros": {
+        "cardiovascular": {"positive": ["chest pain"], "negative": []},
+        "respiratory": {"positive": [], "negative": []},
+        "constitutional": {"positive": [], "negative": []},
+    },
+    "pmh": [],
+    "meds": [],
+    "flags": {"ischemic_features": False, "dm_followup": False, "labs_a1c_needed": False},
+}
+
+
+def _runner(seen):
+    async def complete(body):
+        user = json.loads(body["messages"][-1]["content"])
+        seen.append(user)
+        if "headache" in json.dumps(user):
+            raise RuntimeError("provider rejected item")
+        return LLM_OUT
+
+    return BatchSummaryRunner(backend=LocalBatchBackend(complete), poll_interval_s=0.01)
+
+
+@pytest.mark.anyio
+async def test_batch_runner_per_item_fallback():
+    seen = []
+    out = await _runner(seen).run(
+        {
+            "a": {"patient": {"age": 61}, "answers": {"cc": "chest pain batch-a"}},
+            "b": {"patient": {"age": 30}, "answers": {"cc": "headache batch-b"}},
+        }
+    )
+    assert len(seen) == 2
+    assert out["a"]["status"] == "done"
+    assert out["a"]["summary"]["hpi"] == LLM_OUT["hpi"]
+    assert out["b"]["status"] == "fallback"
+    assert "headache" in out["b"]["summary"]["hpi"]
+
+
+@pytest.mark.anyio
+async def test_summarize_pending_writes_back(tmp_path):
+    db = str(tmp_path / "app.db")
+    with sqlite3.connect(db) as conn:
+        conn.execute(
+            "CREATE TABLE intake_payload (session_id TEXT PRIMARY KEY, patient_data TEXT,"
+            " answers_json TEXT NOT NULL, ai_summary_status TEXT DEFAULT 'pending')"
+        )
+        conn.execute(
+            "INSERT INTO intake_payload VALUES ('s1', ?, ?, 'pending')",
+            (json.dumps({"age": 70, "gender": "male"}), json.dumps({"q1": "chest tightness"})),
+        )
+        conn.execute("INSERT INTO intake_payload VALUES ('s2', NULL, '{}', 'done')")
+
+    seen = []
+    counts = await summarize_pending(_runner(seen), db_path=db)
+    assert counts == {"selected": 1, "done": 1}
+    assert seen[0]["answers"]["chief_complaint"] == "chest tightness"
+
+    with sqlite3.connect(db) as conn:
+        status, summary = conn.execute(
+            "SELECT ai_summary_status, ai_summary_json FROM intake_payload WHERE session_id='s1'"
+        ).fetchone()
+    assert status == "done"
+    assert json.loads(summary)["hpi"] == LLM_OUT["hpi"]
+
+
+def _pending_db(path) -> str:
+    db = str(path / "app.db")
+    with sqlite3.connect(db) as conn:
+        conn.execute(
+            "CREATE TABLE intake_payload (session_id TEXT PRIMARY KEY, patient_data TEXT,"
+            " answers_json TEXT NOT NULL, ai_summary_status TEXT DEFAULT 'pending')"
+        )
+        conn.execute("INSERT INTO intake_payload VALUES ('s1', NULL, '{}', 'pending')")
+    return db
+
+
+def _status(db: str) -> str:
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT ai_summary_status FROM intake_payload").fetchone()[0]
+
+
+def test_pending_rows_are_claimed_once(tmp_path):
+    db = _pending_db(tmp_path)
+    with sqlite3.connect(db) as conn:
+        conn.executemany(
+            "INSERT INTO intake_payload VALUES (?, NULL, '{}', 'pending')",
+            [(f"s{i}",) for i in range(2, 11)],
+        )
+
+    first = {r[0] for r in _claim_pending(db, 6)}
+    second = {r[0] for r in _claim_pending(db, 6)}
+    assert len(first) == 6
+    assert len(second) == 4
+    assert not first & second
+    assert _claim_pending(db, 6) == []
+
+    with pytest.raises(ValidationError):
+        BatchSummaryRequest(pending=True, limit=-1)  # SQLite would read LIMIT -1 as "all"
+
+
+@pytest.mark.anyio
+async def test_summarize_pending_releases_rows_when_cancelled(tmp_path):
+    db = _pending_db(tmp_path)
+    started = asyncio.Event()
+
+    class StuckRunner:
+        async def run(self, items):
+            started.set()
+            await asyncio.sleep(60)
+
+    task = asyncio.ensure_future(summarize_pending(StuckRunner(), db_path=db))
+    await started.wait()
+    assert _status(db) == "processing"
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert _status(db) == "pending"
+
+
+@pytest.mark.anyio
+async def test_batch_jobs_evicts_finished_jobs():
+    async def work(n):
+        return {"n": n}
+
+    jobs = BatchJobs(ttl_s=3600, max_jobs=2)
+    first = jobs.start(work(1), "intakes", 1)
+    second = jobs.start(work(2), "intakes", 1)
+    await asyncio.sleep(0)
+    third = jobs.start(work(3), "intakes", 1)  # over max_jobs → oldest finished goes
+    assert jobs.get(first) is None
+    assert jobs.get(second)["result"] == {"n": 2}
+    assert jobs.get(third) is not None
+
+    expiring = BatchJobs(ttl_s=0, max_jobs=10)
+    job_id = expiring.start(work(4), "intakes", 1)
+    assert expiring.get(job_id)["status"] == "running"  # running jobs are kept
+    await asyncio.sleep(0)
+    assert expiring.get(job_id) is None
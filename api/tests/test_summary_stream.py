@@ -0,0 +1,78 @@
+# api/tests/test_summary_stream.py
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+from api.services.llm.service import llm_service
+from api.services.llm.stream import PartialJSON
+
+DOC = {
+    "hpi": '55-year-old male with "exertional" chest pain.',
+    "ros": {
+        "cardiovascular": {"positive": ["chest pain"], "negative": []},
+        "respiratory": {"positive": [], "negative": []},
+        "constitutional": {"positive": [], "negative": []},
+    },
+    "pmh": ["hypertension"],
+    "meds": [],
+    "flags": {"ischemic_features": True, "dm_followup": False, "labs_a1c_needed": False},
+}
+
+
+def test_partial_json_snapshots():
+    text = json.dumps(DOC)
+    p = PartialJSON()
+    p.feed(text[:30])
+    assert p.snapshot() == {"hpi": DOC["hpi"][:21]}  # partial string value shown
+    p.feed(text[30:60])
+    assert p.snapshot()["hpi"] == DOC["hpi"]
+    p.feed(text[60:])
+    assert p.complete()
+    assert p.snapshot() == DOC
+
+
+def test_partial_json_snapshots_share_finished_values():
+    text = json.dumps(DOC)
+    p = PartialJSON()
+    p.feed(text[: text.index('"respiratory"')])
+    first = p.snapshot()
+    assert p.snapshot() is first  # nothing new parsed → same snapshot, no rebuild
+    p.feed(' "respiratory": {"positive": ["coug')
+    second = p.snapshot()
+    assert second["ros"]["respiratory"]["positive"] == ["coug"]  # escape-free partial shown
+    # closed containers are shared, only the open path is copied
+    assert second["ros"]["cardiovascular"] is first["ros"]["cardiovascular"]
+    assert second["ros"] is not first["ros"]
+
+    p = PartialJSON()
+    p.feed('{"hpi": "caf\\u00')
+    assert p.snapshot() == {"hpi": "caf"}  # half an escape is held back
+    p.feed('e9"}')
+    assert p.snapshot() == {"hpi": "café"}
+
+
+@pytest.mark.anyio
+async def test_summary_stream_emits_fields_then_final(monkeypatch):
+    async def fake_stream(**_kwargs):
+        text = json.dumps(DOC)
+        p = PartialJSON()
+        for i in range(0, len(text), 16):
+            p.feed(text[i : i + 16])
+            yield p.snapshot(), False
+        yield DOC, True
+
+    monkeypatch.setattr("api.services.llm.service.chat_json_stream", fake_stream)
+    events = [e async for e in llm_service.summary_stream({"answers": {"cc": "chest pain"}})]
+
+    kinds = [k for k, _ in events]
+    assert kinds[0] == "field"
+    assert kinds[-1] == "final"
+    assert kinds.count("final") == 1
+    assert events[0][1]["field"] == "hpi"
+    final = events[-1][1]
+    assert final["hpi"].startswith("55-year-old")
+    assert "_metadata" in final